@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# @file compare_schedule_parsers.py
+# @brief Regression check for the streaming Schedule Of Classes parser.
+#
+#        Parses a saved sched_layout_*.htm page with both the streaming parser
+#        (parse_schedules_page) and the original BeautifulSoup-based parser
+#        (parse_schedules_page_bs4), reports the time and peak memory of each,
+#        and exits with status 1 if their outputs differ.
+#
+#        USAGE: compare_schedule_parsers.py [PAGE]...
+#
+#        Save a page to compare with, for example:
+#        $ curl -o fall.htm http://enr-apps.as.cmu.edu/assets/SOC/sched_layout_fall.htm
+# @since 2026-10-17
+
+
+import contextlib
+import io
+import sys
+import time
+import tracemalloc
+from cmu_course_api.parse_schedules import parse_schedules_page, \
+    parse_schedules_page_bs4
+
+
+# @function measure
+# @brief Runs a parser on a page, with its progress output suppressed.
+# @return: (result, seconds, peak bytes allocated)
+def measure(parser, page):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = parser(page)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        parser(page)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return (result, elapsed, peak)
+
+
+# @function first_difference
+# @brief Returns a description of the first course that differs, or None.
+def first_difference(expected, actual):
+    if expected['semester'] != actual['semester']:
+        return 'semester: %r != %r' % (expected['semester'],
+                                       actual['semester'])
+    for (i, (old, new)) in enumerate(zip(expected['schedules'],
+                                         actual['schedules'])):
+        if old != new:
+            return 'course %d (%s):\n  bs4:       %r\n  streaming: %r' % \
+                (i, old.get('num'), old, new)
+    if len(expected['schedules']) != len(actual['schedules']):
+        return '%d courses != %d courses' % (len(expected['schedules']),
+                                             len(actual['schedules']))
+    return None
+
+
+def main(paths):
+    failed = False
+    for path in paths:
+        with open(path, 'rb') as f:
+            page = f.read()
+
+        (expected, bs4_time, bs4_peak) = measure(parse_schedules_page_bs4,
+                                                 page)
+        (actual, stream_time, stream_peak) = measure(parse_schedules_page,
+                                                     page)
+        difference = first_difference(expected, actual)
+
+        print('%s (%d bytes, %d courses)' % (path, len(page),
+                                             len(expected['schedules'])))
+        print('  bs4:       %8.3fs %8.1f MB' % (bs4_time, bs4_peak / 1e6))
+        print('  streaming: %8.3fs %8.1f MB' % (stream_time,
+                                                stream_peak / 1e6))
+        if difference:
+            print('  MISMATCH: ' + difference)
+            failed = True
+        else:
+            print('  outputs are identical')
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print('USAGE: compare_schedule_parsers.py [PAGE]...')
+        sys.exit(2)
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# @file fce_join.py
+# @brief Benchmark of join_fces against a join that scans every FCE entry for
+#        each course and instructor, as consumers of the two outputs used to.
+#
+#        Joins synthetic FCEs (see synthetic.py) into a synthetic semester
+#        whose course numbers and instructors overlap with them. Exits with
+#        status 1 if the two joins differ.
+#
+#        USAGE: fce_join.py [--courses COUNT] [--scale SCALE]
+# @since 2026-10-17
+
+
+import argparse
+import copy
+import random
+import sys
+import tempfile
+import time
+import synthetic
+from cmu_course_api.fce_join import FCEIndex, join_fces, \
+    normalize_course_id, normalize_instructor
+from cmu_course_api.parse_fces import iter_fce_folder
+
+
+# @function full_name
+# @brief Turns an FCE instructor like 'SMITH, D.' into a full name like
+#        'Smith, David', as course details pages list them.
+def full_name(instructor):
+    (last, _, initial) = instructor.partition(', ')
+    for first in synthetic.FIRST_NAMES:
+        if first[0] == initial[:1]:
+            return '%s, %s' % (last.title(), first)
+    return None
+
+
+# @function synthetic_courses
+# @brief Returns course output whose courses and instructors are taken from
+#        FCE entries, so that most of them have FCEs to join.
+def synthetic_courses(fces, count, seed=0):
+    r = random.Random(seed)
+    entries = [entry for entry in fces if entry.get('Course ID')]
+    courses = {}
+    while len(courses) < count:
+        entry = r.choice(entries)
+        name = full_name(entry.get('Instructor') or '')
+        lecture = {'times': [], 'name': 'Lec',
+                   'instructors': [name] if name else None}
+        courses[normalize_course_id(entry['Course ID'])] = {
+            'name': entry.get('Course Name'), 'lectures': [lecture],
+            'sections': [dict(lecture, name='A', lecture='Lec')]}
+    return {'courses': courses, 'semester': 'Fall 2016'}
+
+
+# @function reference_join
+# @brief join_fces, scanning every FCE entry for each lookup.
+def reference_join(data, fces, recent):
+
+    def summarize(matches):
+        index = FCEIndex(matches, recent)
+        return index.course(matches[0]['Course ID']) if matches else None
+
+    for (number, course) in data['courses'].items():
+        rows = [entry for entry in fces
+                if normalize_course_id(entry.get('Course ID')) == number]
+        course['fces'] = summarize(rows)
+        for key in ('lectures', 'sections'):
+            for meeting in course[key]:
+                meeting['instructor_fces'] = {}
+                for name in meeting['instructors'] or []:
+                    matches = [entry for entry in rows
+                               if normalize_instructor(
+                                   entry.get('Instructor')) ==
+                               normalize_instructor(name)]
+                    if normalize_instructor(name) and matches:
+                        meeting['instructor_fces'][name] = \
+                            summarize(matches)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='fce_join.py')
+    parser.add_argument('--courses', metavar='COUNT', type=int, default=500,
+                        help='number of courses to join FCEs into '
+                             '(default: %(default)s)')
+    parser.add_argument('--scale', type=float, default=1,
+                        help='multiple of a year of FCE rows '
+                             '(default: %(default)s)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        synthetic.write_fce_files(directory, args.scale)
+        start = time.perf_counter()
+        fces = list(iter_fce_folder(directory))
+        parse_seconds = time.perf_counter() - start
+    data = synthetic_courses(fces, args.courses)
+
+    start = time.perf_counter()
+    expected = reference_join(copy.deepcopy(data), fces, 4)
+    scan_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = FCEIndex(fces)
+    index_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = join_fces(copy.deepcopy(data), index)
+    join_seconds = time.perf_counter() - start
+
+    joined = sum(course['fces'] is not None
+                 for course in actual['courses'].values())
+    instructors = sum(len(meeting['instructor_fces'])
+                      for course in actual['courses'].values()
+                      for meeting in course['lectures'])
+    print('%d FCE rows (parsed in %.2fs), %d courses, %d with FCEs, %d '
+          'lecture instructors with FCEs' % (
+              len(fces), parse_seconds, len(data['courses']), joined,
+              instructors))
+    print('  scan:  %8.3fs' % scan_seconds)
+    print('  index: %8.3fs to index, %.3fs to join (%.0fx)' % (
+        index_seconds, join_seconds,
+        scan_seconds / (index_seconds + join_seconds)))
+
+    if actual != expected:
+        print('  MISMATCH: the joins differ')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
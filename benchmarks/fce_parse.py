@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# @file fce_parse.py
+# @brief Micro-benchmark of parse_fces against the original per-cell
+#        implementation, which re-checked every header and ran up to three
+#        uncompiled regexes for every cell.
+#
+#        Exits with status 1 if the two produce different output.
+#
+#        USAGE: fce_parse.py [CSV]...
+# @since 2026-10-17
+
+
+import csv
+import re
+import sys
+import time
+from cmu_course_api.parse_fces import parse_fces
+
+
+# @function reference_parse_fces
+# @brief parse_fces as it was before header rows were compiled into plans.
+def reference_parse_fces(path):
+
+    results = []
+    categories = []
+
+    with open(path, 'r') as f:
+        for line in csv.reader(f):
+
+            if line[0] == 'Semester':
+                categories = line
+                continue
+
+            entry = {}
+            entry['Questions'] = {}
+
+            for cat in range(len(categories)):
+
+                if line[cat] == '':
+                    line[cat] = None
+
+                if categories[cat] == '':
+                    continue
+
+                if categories[cat] == 'Course ID' and line[cat] != None:
+                    if re.search('^[0-9]+$', line[cat]):
+                        fmt = "%05d" % int(line[cat])
+                        entry[categories[cat]] = "%s-%s" % (fmt[:2], fmt[2:])
+                    else:
+                        entry[categories[cat]] = line[cat]
+
+                elif categories[cat][0].isdigit():
+                    if line[cat] == None:
+                        entry['Questions'][categories[cat]] = None
+                    else:
+                        entry['Questions'][categories[cat]] = float(line[cat])
+
+                elif line[cat] == None:
+                    entry['Questions'][categories[cat]] = None
+
+                elif re.search('^[0-9]+$', line[cat]):
+                    entry[categories[cat]] = int(line[cat])
+
+                elif re.search(r'^[0-9]+\.[0-9]+$', line[cat]):
+                    entry[categories[cat]] = float(line[cat])
+
+                else:
+                    entry[categories[cat]] = line[cat]
+
+            results.append(entry)
+
+    return results
+
+
+# @function best_time
+# @brief Returns (result, best wall time of `repeat` runs).
+def best_time(function, path, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return (result, best)
+
+
+def main(paths):
+    failed = False
+    for path in paths:
+        (expected, old_time) = best_time(reference_parse_fces, path)
+        (actual, new_time) = best_time(parse_fces, path)
+        rows = len(expected)
+
+        print('%s (%d rows)' % (path, rows))
+        print('  reference: %10.0f rows/s' % (rows / old_time))
+        print('  compiled:  %10.0f rows/s (%.2fx)' % (rows / new_time,
+                                                     old_time / new_time))
+        if expected != actual or \
+                [list(e) for e in expected] != [list(e) for e in actual]:
+            print('  MISMATCH: outputs differ')
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print('USAGE: fce_parse.py [CSV]...')
+        sys.exit(2)
+    sys.exit(main(sys.argv[1:]))
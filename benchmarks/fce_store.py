@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# @file fce_store.py
+# @brief Benchmark of refreshing FCE output through an FCEStore, against
+#        parsing every CSV again as cmu-fce-api does without --store.
+#
+#        Writes synthetic FCEs (see synthetic.py) for --years years, then
+#        times updating a store and writing the JSON after each kind of change
+#        to the folder: none, a file touched, a file added, a file changed and
+#        a file deleted. After each, the store's JSON is checked against that
+#        of parsing the folder from scratch. Exits with status 1 if they
+#        differ.
+#
+#        USAGE: fce_store.py [--years YEARS] [--workers WORKERS]
+# @since 2026-10-17
+
+
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import synthetic
+from cmu_course_api.fce_store import FCEStore
+from cmu_course_api.formats import write_fce_pack
+from cmu_course_api.parse_fces import dump_fces, iter_fce_folder
+
+
+# @function write_years
+# @brief Writes synthetic FCE CSVs for several years to a folder, one file
+#        per semester.
+def write_years(folder, years):
+    for year in range(years):
+        directory = tempfile.mkdtemp(dir=folder)
+        for path in synthetic.write_fce_files(directory, seed=year * 100):
+            name = '%02d_%s' % (year, os.path.basename(path))
+            os.replace(path, os.path.join(folder, name))
+        os.rmdir(directory)
+
+
+# @function full_json
+# @brief Returns the JSON of parsing a folder from scratch, and the seconds
+#        it took.
+def full_json(folder, workers):
+    start = time.perf_counter()
+    outfile = io.StringIO()
+    dump_fces(iter_fce_folder(folder, workers), outfile)
+    return (outfile.getvalue(), time.perf_counter() - start)
+
+
+# @function store_json
+# @brief Updates a store from a folder and returns its JSON, the seconds it
+#        took, and the changes.
+def store_json(store_dir, folder, workers):
+    start = time.perf_counter()
+    store = FCEStore(store_dir)
+    changes = store.update(folder, workers)
+    outfile = io.StringIO()
+    store.dump(outfile)
+    return (outfile.getvalue(), time.perf_counter() - start, changes)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='fce_store.py')
+    parser.add_argument('--years', type=int, default=4,
+                        help='years of FCE exports (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processes to parse files in '
+                             '(default: %(default)s)')
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        folder = os.path.join(directory, 'fces')
+        store_dir = os.path.join(directory, 'store')
+        os.mkdir(folder)
+        write_years(folder, args.years)
+        files = sorted(os.listdir(folder))
+
+        def add():
+            shutil.copy(os.path.join(folder, files[0]),
+                        os.path.join(folder, 'zz_added.csv'))
+
+        def change():
+            with open(os.path.join(folder, files[1]), 'a') as f:
+                f.write(synthetic.fce_csv(10, seed=999))
+
+        steps = [
+            ('first run', lambda: None),
+            ('unchanged', lambda: None),
+            ('touched', lambda: os.utime(os.path.join(folder, files[2]))),
+            ('added', add),
+            ('changed', change),
+            ('deleted', lambda: os.remove(os.path.join(folder, files[3])))
+        ]
+
+        (expected, full_seconds) = full_json(folder, args.workers)
+        print('%d files, %.1f MB of JSON' % (len(files),
+                                              len(expected) / 1e6))
+        print('  %-10s %8.3fs  (parsing every file)' % ('full', full_seconds))
+        for (name, step) in steps:
+            step()
+            (expected, full_seconds) = full_json(folder, args.workers)
+            (actual, seconds, changes) = store_json(store_dir, folder,
+                                                    args.workers)
+            parsed = len(changes['added']) + len(changes['changed'])
+            status = 'ok' if actual == expected else 'MISMATCH'
+            failed = failed or actual != expected
+            print('  %-10s %8.3fs  %2d parsed, %d removed, %5.0fx  %s' % (
+                name, seconds, parsed, len(changes['removed']),
+                full_seconds / seconds, status))
+
+        store = FCEStore(store_dir)
+        start = time.perf_counter()
+        write_fce_pack(store.iter_fces(), os.path.join(directory, 'f.pack'))
+        print('  pack from the store: %.3fs' % (time.perf_counter() - start))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
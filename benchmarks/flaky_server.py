@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# @file flaky_server.py
+# @brief A local stand-in for CMU's Schedule Of Classes server that injects
+#        latency and failures, for testing retries and adaptive concurrency.
+#
+#        Serves a synthetic Schedule Of Classes page (see synthetic.py) at
+#        /sched_layout_<quarter>.htm, and course details pages at
+#        /courseDetails?COURSE=...&SEMESTER=.... Each request is delayed by a
+#        random time around --latency; a fraction are answered with a 500 or
+#        503, or never answered; requests beyond --capacity in flight are
+#        answered with a 429; and the courses given with --fail always fail.
+#
+#        With --scrape, runs cmu_course_api against the server in the same
+#        process and prints the run's metrics instead of serving forever.
+#
+#        USAGE: flaky_server.py [--port PORT] [--courses COUNT]
+#                               [--latency MS] [--error-rate RATE]
+#                               [--hang-rate RATE] [--capacity N]
+#                               [--fail COURSE]... [--seed SEED]
+#                               [--scrape [-c CONCURRENCY]
+#                                [--max-concurrency MAX]]
+# @since 2026-10-17
+
+
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import synthetic
+from cmu_course_api import parse_descs, parse_schedules
+from cmu_course_api.aggregate import get_course_data
+from cmu_course_api.fetch import DEFAULT_RETRIES
+from cmu_course_api.metrics import MetricsCollector, ObserverGroup, \
+    ProgressPrinter
+
+
+# Constants
+DEFAULT_PORT = 8765
+HANG_SECONDS = 3600
+
+
+# @class FlakyHandler
+# @brief Serves pages after a delay, failing some requests.
+class FlakyHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        url = urllib.parse.urlsplit(self.path)
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            overloaded = server.capacity and \
+                server.in_flight > server.capacity
+            roll = server.random.random()
+            delay = server.random.expovariate(1 / server.latency) \
+                if server.latency else 0
+        try:
+            time.sleep(delay)
+            if overloaded:
+                return self.respond(429, b'slow down', {'Retry-After': '1'})
+            if roll < server.hang_rate:
+                time.sleep(HANG_SECONDS)
+                return
+            if roll < server.hang_rate + server.error_rate / 2:
+                return self.respond(503, b'unavailable')
+            if roll < server.hang_rate + server.error_rate:
+                return self.respond(500, b'internal error')
+
+            if url.path.startswith('/sched_layout_'):
+                return self.respond(200, server.schedule)
+            if url.path == '/courseDetails':
+                course = urllib.parse.parse_qs(url.query).get('COURSE', [''])
+                if course[0] in server.fail:
+                    return self.respond(503, b'unavailable')
+                return self.respond(200, synthetic.detail_page(
+                    course[0], server.seed).encode())
+            self.respond(404, b'not found')
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def respond(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        for item in (headers or {}).items():
+            self.send_header(*item)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# @function make_server
+# @brief Creates (but does not start) a flaky server.
+# @param options: Parsed command line options; see main.
+def make_server(options):
+    server = ThreadingHTTPServer(('127.0.0.1', options.port), FlakyHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.random = random.Random(options.seed)
+    server.requests = 0
+    server.in_flight = 0
+    server.latency = options.latency / 1000
+    server.error_rate = options.error_rate
+    server.hang_rate = options.hang_rate
+    server.capacity = options.capacity
+    server.fail = set(options.fail or [])
+    server.seed = options.seed
+    server.schedule = synthetic.schedule_page(options.courses,
+                                              options.seed).encode()
+    return server
+
+
+# @function scrape
+# @brief Runs get_course_data against a running flaky server.
+# @return: (data, MetricsCollector)
+def scrape(server, options):
+    base = 'http://127.0.0.1:%d' % server.server_address[1]
+    parse_schedules.URL_FMT = base + '/sched_layout_%s.htm'
+    parse_descs.DESC_URL = base + '/courseDetails'
+
+    metrics = MetricsCollector()
+    data = get_course_data('F', options.concurrency,
+                           observer=ObserverGroup(ProgressPrinter(), metrics),
+                           max_concurrency=options.max_concurrency,
+                           retries=options.retries)
+    return (data, metrics)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='flaky_server.py')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help='port to listen on, or 0 for any free port '
+                             '(default: %(default)s)')
+    parser.add_argument('--courses', metavar='COUNT', type=int, default=200,
+                        help='number of courses on the schedule page '
+                             '(default: %(default)s)')
+    parser.add_argument('--latency', metavar='MS', type=float, default=50,
+                        help='mean delay of a response, in milliseconds '
+                             '(default: %(default)s)')
+    parser.add_argument('--error-rate', metavar='RATE', type=float,
+                        default=0.05,
+                        help='fraction of requests answered with a 500 or '
+                             '503 (default: %(default)s)')
+    parser.add_argument('--hang-rate', metavar='RATE', type=float, default=0,
+                        help='fraction of requests never answered '
+                             '(default: %(default)s)')
+    parser.add_argument('--capacity', metavar='N', type=int, default=0,
+                        help='answer requests beyond N in flight with a 429 '
+                             '(default: unlimited)')
+    parser.add_argument('--fail', metavar='COURSE', action='append',
+                        help='course number (e.g. 15122) whose page always '
+                             'fails; may be repeated')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scrape', action='store_true',
+                        help='scrape the server, print metrics and exit')
+    parser.add_argument('-c', '--concurrency', type=int, default=8,
+                        help='with --scrape, initial number of requests in '
+                             'flight (default: %(default)s)')
+    parser.add_argument('--max-concurrency', metavar='MAX', type=int,
+                        help='with --scrape, most requests in flight')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help='with --scrape, retries per page '
+                             '(default: %(default)s)')
+    options = parser.parse_args()
+
+    server = make_server(options)
+    if not options.scrape:
+        print('Serving on http://127.0.0.1:%d/' % server.server_address[1])
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    start = time.perf_counter()
+    (data, metrics) = scrape(server, options)
+    seconds = time.perf_counter() - start
+    print('{} courses, {} errors in {:.2f}s ({} requests served)'.format(
+        len(data['courses']), len(data['errors']), seconds, server.requests))
+    for (number, reason) in sorted(data['errors'].items()):
+        print('  %s: %s' % (number, reason))
+    print(json.dumps(metrics.to_dict(), indent=2))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# @file import_time.py
+# @brief Startup-time budget for the package and the command line tools.
+#
+#        Runs each scenario below in a fresh interpreter with
+#        `python -X importtime`, and adds up the time spent importing modules,
+#        minus that of an interpreter that imports nothing. The best of
+#        --repeat runs is compared with the scenario's budget; a scenario is
+#        also checked not to import modules it has no use for, such as
+#        BeautifulSoup for parsing FCEs. Every module of the package is also
+#        checked to be reachable as an attribute of it, e.g.
+#        cmu_course_api.fce_store, without being imported first.
+#
+#        Exits with status 1 if a scenario goes over its budget or imports a
+#        module it shouldn't, or if a module isn't reachable. On a slow
+#        machine, raise every budget with --budget-scale.
+#
+#        USAGE: import_time.py [--repeat N] [--budget-scale FACTOR]
+#                              [--only SCENARIO]...
+# @since 2026-10-17
+
+
+import argparse
+import os
+import subprocess
+import sys
+
+
+# Constants
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+BIN = os.path.join(ROOT, 'bin')
+PACKAGE = os.path.join(ROOT, 'cmu_course_api')
+SCRAPER_MODULES = ('bs4', 'asyncio', 'urllib.request')
+
+# name -> (arguments to python, budget in milliseconds, modules that must not
+# be imported)
+SCENARIOS = {
+    'package': (['-c', 'import cmu_course_api'], 40,
+                SCRAPER_MODULES + ('ssl', 'concurrent.futures')),
+    'fces': (['-c', 'from cmu_course_api import parse_fces, dump_fces'], 40,
+             SCRAPER_MODULES + ('ssl', 'concurrent.futures')),
+    'cmu-fce-api': ([os.path.join(BIN, 'cmu-fce-api'), '--help'], 80,
+                    SCRAPER_MODULES),
+    'serve': ([os.path.join(BIN, 'cmu-course-api'), 'serve', '--help'], 150,
+              SCRAPER_MODULES),
+    'cmu-course-api': ([os.path.join(BIN, 'cmu-course-api'), '--help'], 300,
+                       ())
+}
+
+
+# @function import_times
+# @brief Runs python -X importtime with the given arguments.
+# @return: Dictionary of module name -> time spent importing it alone, in
+#        milliseconds.
+def import_times(args):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [ROOT] + ([env['PYTHONPATH']] if env.get('PYTHONPATH') else []))
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args,
+                            env=env, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, universal_newlines=True)
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        (own, _, name) = line[len('import time:'):].split('|')
+        if own.strip().isdigit():
+            times[name.strip()] = int(own) / 1000
+    return times
+
+
+# @function unreachable_modules
+# @brief Looks every module of the package up as an attribute of it, each in
+#        a fresh interpreter.
+# @return: List of the modules that couldn't be.
+def unreachable_modules():
+    modules = sorted(name[:-3] for name in os.listdir(PACKAGE)
+                     if name.endswith('.py') and name != '__init__.py')
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    failed = []
+    for module in modules:
+        result = subprocess.run(
+            [sys.executable, '-c',
+             'import cmu_course_api; cmu_course_api.' + module],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if result.returncode != 0:
+            failed.append(module)
+    return failed
+
+
+# @function measure
+# @brief Returns the best total import time of several runs, and the modules
+#        imported.
+def measure(args, repeat):
+    (best, modules) = (None, set())
+    for _ in range(repeat):
+        times = import_times(args)
+        modules |= set(times)
+        total = sum(times.values())
+        best = total if best is None else min(best, total)
+    return (best, modules)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='import_time.py')
+    parser.add_argument('--repeat', metavar='N', type=int, default=5,
+                        help='runs of each scenario (default: %(default)s)')
+    parser.add_argument('--budget-scale', metavar='FACTOR', type=float,
+                        default=1,
+                        help='multiply every budget by FACTOR '
+                             '(default: %(default)s)')
+    parser.add_argument('--only', choices=SCENARIOS, action='append',
+                        help='scenario to run; may be repeated (default: '
+                             'all)')
+    args = parser.parse_args()
+
+    (baseline, _) = measure(['-c', 'pass'], args.repeat)
+    print('interpreter startup imports: %.1f ms' % baseline)
+
+    failed = False
+    for name in args.only or SCENARIOS:
+        (scenario_args, budget, forbidden) = SCENARIOS[name]
+        budget *= args.budget_scale
+        (total, modules) = measure(scenario_args, args.repeat)
+        total = max(total - baseline, 0)
+
+        problems = []
+        if total > budget:
+            problems.append('over budget')
+        unwanted = sorted(module for module in forbidden if module in modules)
+        if unwanted:
+            problems.append('imports ' + ', '.join(unwanted))
+        failed = failed or bool(problems)
+        print('  %-16s %7.1f ms  budget %5.0f ms  %s' % (
+            name, total, budget, '; '.join(problems) or 'ok'))
+
+    unreachable = unreachable_modules()
+    failed = failed or bool(unreachable)
+    print('lazy submodules: %s' % ('not reachable: ' + ', '.join(unreachable)
+                                   if unreachable else 'ok'))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
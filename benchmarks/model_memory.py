@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# @file model_memory.py
+# @brief Memory held by a semester of course data as the dictionaries
+#        get_course_data returns, and as a model.CourseData.
+#
+#        By default the data is a synthetic fall semester of real size (see
+#        synthetic.py), built the way aggregate builds it; --data measures an
+#        output file of cmu-course-api instead. Either way it is loaded from
+#        JSON, as a consumer of the data would.
+#
+#        Exits with status 1 if CourseData.to_dict() doesn't return the
+#        original data.
+#
+#        USAGE: model_memory.py [--courses COUNT] [--data FILE]
+# @since 2026-10-17
+
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+import synthetic
+from cmu_course_api.aggregate import merge_course
+from cmu_course_api.formats import load_course_data
+from cmu_course_api.model import CourseData
+from cmu_course_api.parse_descs import parse_course_desc
+from cmu_course_api.parse_schedules import parse_schedules_page
+
+
+# @function synthetic_data
+# @brief Builds get_course_data's output for a synthetic semester.
+def synthetic_data(courses):
+    page = synthetic.schedule_page(courses).encode()
+    schedules = parse_schedules_page(page)
+    data = {'courses': {}, 'rundate': '2026-10-17', 'semester': 'Fall 2016',
+            'errors': {}}
+    for course in schedules['schedules']:
+        desc = parse_course_desc(synthetic.detail_page(course['num']))
+        number = course['num'][:2] + '-' + course['num'][2:]
+        data['courses'][number] = merge_course(desc, course)
+    return data
+
+
+# @function retained
+# @brief Returns the memory still allocated after running a function, while
+#        its result is alive.
+# @return: (result, bytes)
+def retained(function, *args):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = function(*args)
+        gc.collect()
+        return (result, tracemalloc.get_traced_memory()[0])
+    finally:
+        tracemalloc.stop()
+
+
+def load_model(text):
+    return CourseData.from_dict(json.loads(text))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='model_memory.py')
+    parser.add_argument('--courses', metavar='COUNT', type=int,
+                        default=synthetic.REAL_COURSES,
+                        help='number of synthetic courses (default: '
+                             '%(default)s)')
+    parser.add_argument('--data', metavar='FILE',
+                        help='output file of cmu-course-api to measure '
+                             'instead')
+    args = parser.parse_args()
+
+    if args.data:
+        data = load_course_data(args.data)
+    else:
+        print('Generating %d courses...' % args.courses)
+        data = synthetic_data(args.courses)
+    text = json.dumps(data)
+    del data
+
+    (dicts, dict_bytes) = retained(json.loads, text)
+    start = time.perf_counter()
+    (model, model_bytes) = retained(load_model, text)
+    seconds = time.perf_counter() - start
+
+    print('%d courses, %.1f MB of JSON' % (len(model), len(text) / 1e6))
+    print('  dicts:     %8.1f MB' % (dict_bytes / 1e6))
+    print('  CourseData %8.1f MB (%.0f%% less, %d distinct strings), '
+          'loaded in %.2fs' % (model_bytes / 1e6,
+                               100 - model_bytes / dict_bytes * 100,
+                               len(model.strings), seconds))
+
+    if model.to_dict() != dicts or \
+            json.dumps(model.to_dict()) != json.dumps(dicts):
+        print('  MISMATCH: to_dict() differs from the original data')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
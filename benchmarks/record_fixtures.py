@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# @file record_fixtures.py
+# @brief Downloads a Schedule Of Classes page and a sample of its course
+#        details pages, for run_benchmarks.py to use offline.
+#
+#        FCE exports require logging in, so they can't be downloaded here;
+#        copy CSVs exported from cmu.smartevals.com into DIR/fces instead.
+#
+#        USAGE: record_fixtures.py [--courses COUNT] SEMESTER [DIR]
+# @since 2026-10-17
+
+
+import argparse
+import contextlib
+import io
+import os
+import random
+from cmu_course_api.aggregate import SEMESTER_ABBREV
+from cmu_course_api.cache import urlopen
+from cmu_course_api.parse_descs import get_course_url
+from cmu_course_api.parse_schedules import get_url, parse_schedules_page, \
+    QUARTERS
+
+
+# Constants
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'fixtures')
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='record_fixtures.py')
+    parser.add_argument('semester', metavar='SEMESTER',
+                        choices=sorted(QUARTERS),
+                        help='one of S, M1, M2 or F')
+    parser.add_argument('directory', metavar='DIR', nargs='?',
+                        default=DEFAULT_FIXTURES,
+                        help='directory to save pages in (default: '
+                             '%(default)s)')
+    parser.add_argument('--courses', metavar='COUNT', type=int, default=200,
+                        help='number of course details pages to save, '
+                             'chosen at random (default: %(default)s)')
+    args = parser.parse_args()
+
+    details = os.path.join(args.directory, 'courseDetails')
+    os.makedirs(details, exist_ok=True)
+
+    print('Downloading the Schedule Of Classes...')
+    (page, _) = urlopen(get_url(args.semester))
+    path = os.path.join(args.directory, 'sched_layout_%s.htm' %
+                        QUARTERS[args.semester])
+    with open(path, 'wb') as f:
+        f.write(page)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        schedules = parse_schedules_page(page)
+    semester = schedules['semester'].split(' ')
+    (abbrev, year) = (SEMESTER_ABBREV[semester[0]], semester[-1][2:])
+
+    courses = [course['num'] for course in schedules['schedules']]
+    sample = random.Random(0).sample(courses, min(args.courses,
+                                                  len(courses)))
+    for (i, num) in enumerate(sorted(sample)):
+        print('\r[{}/{}] Downloading {}'.format(i + 1, len(sample), num),
+              end='')
+        (page, _) = urlopen(get_course_url(num, abbrev, year))
+        with open(os.path.join(details, num + '.htm'), 'wb') as f:
+            f.write(page)
+    print()
+    print('Saved to %s' % args.directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+# @file run_benchmarks.py
+# @brief Offline benchmark suite for the parsers.
+#
+#        Runs every subsystem on recorded pages (see record_fixtures.py), if
+#        there are any, and on synthetic data (see synthetic.py) at each
+#        requested multiple of a semester's real size. For every subsystem it
+#        reports throughput, time spent in each stage, and peak memory, and
+#        saves the results as JSON so runs can be compared over time.
+#
+#        Subsystems:
+#            schedules       parse_schedules_page (streaming)
+#            schedules_bs4   parse_schedules_page_bs4 (fix_known_errors)
+#            descriptions    extract_course_desc (fast path)
+#            descriptions_bs4
+#                            parse_course_desc_bs4
+#            fces            iter_fces and dump_fces
+#
+#        USAGE: run_benchmarks.py [--scale SCALE]... [--only SUBSYSTEM]...
+#                                 [--fixtures DIR] [--no-memory]
+#                                 [--output FILE] [--compare OLDFILE]
+# @since 2026-10-17
+
+
+import argparse
+import contextlib
+import csv
+import glob
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import bs4
+import synthetic
+from cmu_course_api.parse_descs import parse_course_desc_bs4, parse_reqs, \
+    parse_full_names, create_reqs_obj, extract_course_desc, clean_reqs, \
+    description_start, DescExtractor
+from cmu_course_api.parse_fces import iter_fces, dump_fces
+from cmu_course_api.parse_schedules import parse_schedules_page, \
+    parse_schedules_page_bs4, iter_rows, add_row_data, new_state, \
+    fix_known_errors, get_table_rows, extract_data_from_row
+
+
+# Constants
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURES = os.path.join(HERE, 'fixtures')
+DEFAULT_RESULTS = os.path.join(HERE, 'results')
+SUBSYSTEMS = ('schedules', 'schedules_bs4', 'descriptions', 'descriptions_bs4',
+              'fces')
+BS4_MAX_SCALE = 10          # schedules_bs4 is only run on larger pages
+                            # if asked for with --only, since a soup of the
+                            # page takes too much memory
+RESULTS_VERSION = 1
+
+
+# @class Stages
+# @brief Accumulates the time spent in each named stage.
+class Stages:
+
+    def __init__(self):
+        self.seconds = {}
+
+    @contextlib.contextmanager
+    def time(self, name):
+        start = time.perf_counter()
+        yield
+        self.seconds[name] = self.seconds.get(name, 0) + \
+            time.perf_counter() - start
+
+
+# @function timed
+# @brief Runs a function with its progress output suppressed.
+# @return: (result, seconds)
+def timed(function, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = function(*args)
+        return (result, time.perf_counter() - start)
+
+
+# @function peak_memory
+# @brief Returns the peak memory allocated by Python while running a function.
+def peak_memory(function, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        try:
+            function(*args)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+
+# Each subsystem below returns a function that runs it end to end, and a
+# function that runs it split into timed stages and returns (number of items,
+# number of bytes of input).
+
+def schedules(pages):
+
+    def total():
+        for page in pages:
+            parse_schedules_page(page)
+
+    def staged(stages):
+        (items, size) = (0, 0)
+        for page in pages:
+            size += len(page)
+            with stages.time('decode'):
+                text = bs4.UnicodeDammit(page, is_html=True).unicode_markup
+            with stages.time('tokenize+repair'):
+                rows = list(iter_rows(text))
+            with stages.time('build'):
+                (data, state) = ([], new_state())
+                for (kind, row) in rows:
+                    if kind != 'semester':
+                        add_row_data(kind, row, data, state)
+            items += len(data)
+        return (items, size)
+
+    return (total, staged)
+
+
+def schedules_bs4(pages):
+
+    def total():
+        for page in pages:
+            parse_schedules_page_bs4(page)
+
+    def staged(stages):
+        (items, size) = (0, 0)
+        for page in pages:
+            size += len(page)
+            with stages.time('soup'):
+                soup = bs4.BeautifulSoup(page, 'html.parser')
+            with stages.time('fix_known_errors'):
+                fix_known_errors(soup)
+            with stages.time('get_table_rows'):
+                trs = get_table_rows(soup)
+            with stages.time('extract'):
+                (data, state) = ([], new_state())
+                for tr in trs:
+                    extract_data_from_row(tr, data, state)
+            items += len(data)
+        return (items, size)
+
+    return (total, staged)
+
+
+def descriptions(make_pages):
+
+    def total():
+        for page in make_pages():
+            extract_course_desc(page)
+
+    def staged(stages):
+        (items, size) = (0, 0)
+        for page in make_pages():
+            size += len(page)
+            with stages.time('decode'):
+                text = bs4.UnicodeDammit(page, is_html=True).unicode_markup
+            with stages.time('description_start'):
+                start = description_start(text)
+            with stages.time('extract'):
+                extractor = DescExtractor(partial=bool(start))
+                extractor.feed(text[start:])
+                extractor.close()
+                (_, prereqs, coreqs, _) = extractor.result()
+            with stages.time('create_reqs_obj'):
+                create_reqs_obj(clean_reqs(prereqs))
+                create_reqs_obj(clean_reqs(coreqs))
+            items += 1
+        return (items, size)
+
+    return (total, staged)
+
+
+def descriptions_bs4(make_pages):
+
+    def total():
+        for page in make_pages():
+            parse_course_desc_bs4(page)
+
+    def staged(stages):
+        (items, size) = (0, 0)
+        for page in make_pages():
+            size += len(page)
+            with stages.time('soup'):
+                soup = bs4.BeautifulSoup(page, 'html.parser')
+            with stages.time('description'):
+                soup.find(id='course-detail-description').p.string
+            with stages.time('parse_reqs'):
+                (prereqs, coreqs) = parse_reqs(soup)
+            with stages.time('parse_full_names'):
+                parse_full_names(soup)
+            with stages.time('create_reqs_obj'):
+                create_reqs_obj(prereqs)
+                create_reqs_obj(coreqs)
+            items += 1
+        return (items, size)
+
+    return (total, staged)
+
+
+def fces(paths):
+
+    def total():
+        for path in paths:
+            dump_fces(iter_fces(path), io.StringIO())
+
+    def staged(stages):
+        (items, size) = (0, 0)
+        for path in paths:
+            size += os.path.getsize(path)
+            with stages.time('csv'):
+                with open(path) as f:
+                    for _ in csv.reader(f):
+                        pass
+            with stages.time('csv+convert'):
+                entries = list(iter_fces(path))
+            with stages.time('dump'):
+                dump_fces(entries, io.StringIO())
+            items += len(entries)
+        return (items, size)
+
+    return (total, staged)
+
+
+# @function run_subsystem
+# @brief Benchmarks one subsystem on one data set.
+# @return: Dictionary of results.
+def run_subsystem(total, staged, memory=True):
+    stages = Stages()
+    with contextlib.redirect_stdout(io.StringIO()):
+        (items, size) = staged(stages)
+    (_, seconds) = timed(total)
+
+    result = {
+        'items': items,
+        'bytes': size,
+        'seconds': seconds,
+        'items_per_second': items / seconds if seconds else None,
+        'mb_per_second': size / seconds / 1e6 if seconds else None,
+        'stages': stages.seconds
+    }
+    if memory:
+        result['peak_bytes'] = peak_memory(total)
+    return result
+
+
+# @function recorded_data
+# @brief Loads recorded fixtures from a directory, if there are any.
+# @return: (schedule pages, function returning details pages or None if
+#        there are none, FCE paths), or None if the directory holds no
+#        fixtures.
+def recorded_data(directory):
+    schedule_paths = sorted(glob.glob(os.path.join(directory,
+                                                   'sched_layout_*.htm')))
+    detail_paths = sorted(glob.glob(os.path.join(directory, 'courseDetails',
+                                                 '*.htm')))
+    fce_paths = sorted(glob.glob(os.path.join(directory, 'fces', '*.csv')))
+    if not (schedule_paths or detail_paths or fce_paths):
+        return None
+
+    pages = [read_bytes(path) for path in schedule_paths]
+
+    def make_details():
+        return (read_bytes(path) for path in detail_paths)
+
+    return (pages, make_details if detail_paths else None, fce_paths)
+
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+# @function run_dataset
+# @brief Benchmarks the requested subsystems on one data set.
+def run_dataset(name, pages, make_details, fce_paths, only, memory):
+    print('%s:' % name)
+    results = {}
+    inputs = {
+        'schedules': (schedules, pages),
+        'schedules_bs4': (schedules_bs4, pages),
+        'descriptions': (descriptions, make_details),
+        'descriptions_bs4': (descriptions_bs4, make_details),
+        'fces': (fces, fce_paths)
+    }
+    for subsystem in only:
+        (factory, data) = inputs[subsystem]
+        if not data:
+            print('  %-14s no data' % subsystem)
+            continue
+        (total, staged) = factory(data)
+        result = run_subsystem(total, staged, memory)
+        results[subsystem] = result
+        print_result(subsystem, result)
+    return results
+
+
+def print_result(subsystem, result):
+    line = '  %-14s %8d items %8.1f MB %9.3fs' % (
+        subsystem, result['items'], result['bytes'] / 1e6, result['seconds'])
+    if result['items_per_second'] is not None:
+        line += ' %10.0f items/s %7.2f MB/s' % (result['items_per_second'],
+                                                result['mb_per_second'])
+    if 'peak_bytes' in result:
+        line += '  peak %.1f MB' % (result['peak_bytes'] / 1e6)
+    print(line)
+    print('      ' + '  '.join('%s %.3fs' % item
+                               for item in result['stages'].items()))
+
+
+# @function compare
+# @brief Prints the change in time of every subsystem and stage since an
+#        earlier results file.
+def compare(old, new):
+    print('Compared to %s (%s):' % (old.get('created'), old.get('commit')))
+    for (dataset, results) in new['datasets'].items():
+        for (subsystem, result) in results.items():
+            before = old.get('datasets', {}).get(dataset, {}).get(subsystem)
+            if before is None:
+                continue
+            print('  %-16s %-14s %s' % (
+                dataset, subsystem, change(before['seconds'],
+                                           result['seconds'])))
+            for (stage, seconds) in result['stages'].items():
+                if stage in before['stages']:
+                    print('      %-20s %s' % (stage, change(
+                        before['stages'][stage], seconds)))
+
+
+def change(before, after):
+    if not before:
+        return '%.3fs -> %.3fs' % (before, after)
+    return '%.3fs -> %.3fs (%+.1f%%)' % (before, after,
+                                         (after - before) / before * 100)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE,
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='run_benchmarks.py')
+    parser.add_argument('--scale', type=float, action='append',
+                        help='multiple of a semester\'s real size to '
+                             'generate synthetic data at; may be repeated '
+                             '(default: 1)')
+    parser.add_argument('--only', choices=SUBSYSTEMS, action='append',
+                        help='subsystem to run; may be repeated (default: '
+                             'all)')
+    parser.add_argument('--fixtures', metavar='DIR', default=DEFAULT_FIXTURES,
+                        help='directory of recorded pages (default: '
+                             '%(default)s)')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='skip the (slower) peak memory measurements')
+    parser.add_argument('--output', metavar='FILE',
+                        help='where to save the results (default: a new '
+                             'file in %s)' % DEFAULT_RESULTS)
+    parser.add_argument('--compare', metavar='OLDFILE',
+                        help='results of an earlier run to compare with')
+    args = parser.parse_args()
+
+    memory = not args.no_memory
+    results = {
+        'version': RESULTS_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'datasets': {}
+    }
+
+    recorded = recorded_data(args.fixtures)
+    if recorded is not None:
+        (pages, make_details, fce_paths) = recorded
+        results['datasets']['recorded'] = run_dataset(
+            'recorded', pages, make_details, fce_paths,
+            args.only or SUBSYSTEMS, memory)
+
+    for scale in args.scale or [1]:
+        name = 'synthetic-%gx' % scale
+        only = args.only or [subsystem for subsystem in SUBSYSTEMS
+                             if subsystem != 'schedules_bs4' or
+                             scale <= BS4_MAX_SCALE]
+        pages = [synthetic.schedule_page(
+            int(synthetic.REAL_COURSES * scale)).encode()]
+        numbers = [num for (_, num) in synthetic.course_numbers(
+            int(synthetic.REAL_DETAIL_PAGES * scale))]
+
+        def make_details():
+            return (synthetic.detail_page(num).encode() for num in numbers)
+
+        with tempfile.TemporaryDirectory() as directory:
+            fce_paths = synthetic.write_fce_files(directory, scale)
+            results['datasets'][name] = run_dataset(
+                name, pages, make_details, fce_paths, only, memory)
+
+    output = args.output
+    if output is None:
+        os.makedirs(DEFAULT_RESULTS, exist_ok=True)
+        output = os.path.join(DEFAULT_RESULTS, datetime.now().strftime(
+            '%Y%m%d-%H%M%S.json'))
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print('Saved results to %s' % output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
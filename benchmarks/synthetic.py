@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# @file synthetic.py
+# @brief Generates synthetic Schedule Of Classes pages, course details pages
+#        and FCE CSVs for benchmarks, at a multiple of their real size.
+#
+#        Schedule pages include the malformations fix_known_errors repairs:
+#        rows lacking a <tr> after a department row, rows with fewer than 10
+#        columns, course titles split over two rows, and rows holding only a
+#        title. Output is deterministic for a given seed.
+#
+#        USAGE: synthetic.py [--scale SCALE] [--seed SEED] DIR
+#
+#        writes DIR/sched_layout_synthetic.htm, DIR/courseDetails/*.htm and
+#        DIR/fces/*.csv.
+# @since 2026-10-17
+
+
+import argparse
+import csv
+import io
+import os
+import random
+
+
+# Approximate size of one real semester
+REAL_COURSES = 3500         # courses on a Schedule Of Classes page
+REAL_DETAIL_PAGES = 3500    # course details pages, one per course
+REAL_FCE_ROWS = 25000       # FCE rows in one year of exports
+FCE_FILES = 4               # files the FCE rows are split into
+COURSES_PER_DEPARTMENT = 30
+
+DEPARTMENTS = ['Architecture', 'Biological Sciences', 'Chemistry',
+               'Computer Science', 'Electrical & Computer Engineering',
+               'English', 'History', 'Mathematical Sciences', 'Philosophy',
+               'Physics', 'Psychology', 'Statistics and Data Science']
+BUILDINGS = ['GHC', 'DH', 'WEH', 'BH', 'PH', 'HH', 'SH', 'POS', 'MM', 'CFA']
+LAST_NAMES = ['Smith', 'Kosbie', 'Andersen', 'Lee', 'Garcia', 'Nguyen',
+              'Chen', 'Patel', 'Okafor', 'Mueller', 'Rossi', 'Kim']
+FIRST_NAMES = ['David', 'Amy', 'Robert', 'Maria', 'Wei', 'Priya', 'Chidi',
+               'Anna', 'Marco', 'Ji-woo']
+WORDS = ['Introduction', 'Principles', 'Advanced', 'Topics', 'Systems',
+         'Theory', 'Design', 'Analysis', 'Methods', 'Computation', 'Data',
+         'Modern', 'Foundations', 'Research', 'Seminar', 'Practicum']
+DAY_PATTERNS = ['MWF', 'TR', 'MW', 'T', 'R', 'F', 'M', 'W', 'MTWRF', 'TBA']
+TIMES = [(start, length) for start in range(8 * 60, 20 * 60, 30)
+         for length in (50, 80, 110, 170)]
+QUESTIONS = ['1: Hrs Per Week 9', '2: Interest in student learning',
+             '3: Explain course requirements', '4: Clear learning goals',
+             '5: Feedback to students', '6: Importance of subject',
+             '7: Explains subject matter', '8: Show respect for students',
+             '9: Overall teaching', '10: Overall course']
+FCE_HEADER = ['Semester', 'Year', 'Instructor', 'Dept', 'Course ID',
+              'Course Name', 'Section', 'Type', 'Responses', 'Enrollment',
+              'Resp. Rate %', ''] + QUESTIONS
+
+
+# @function format_time
+# @brief Formats minutes after midnight like the schedule page ('09:00AM').
+def format_time(minutes):
+    (hours, minutes) = divmod(minutes, 60)
+    suffix = 'AM' if hours < 12 else 'PM'
+    return '%02d:%02d%s' % ((hours - 1) % 12 + 1, minutes, suffix)
+
+
+# @function course_numbers
+# @brief Returns `count` 5 digit course numbers in blocks of
+#        COURSES_PER_DEPARTMENT, as (department, number) pairs. Numbers are
+#        distinct up to 81000 courses, and repeat after that.
+def course_numbers(count):
+    result = []
+    for i in range(count):
+        (block, j) = divmod(i, COURSES_PER_DEPARTMENT)
+        prefix = 10 + block % 90
+        offset = (j + block // 90 * COURSES_PER_DEPARTMENT) % 900
+        result.append((DEPARTMENTS[block % len(DEPARTMENTS)],
+                       '%02d%03d' % (prefix, 100 + offset)))
+    return result
+
+
+def _row(cells, tr=True):
+    return ('<tr>' if tr else '') + ''.join(
+        '<td>%s</td>' % ('' if cell is None else cell) for cell in cells) + \
+        '</tr>\n'
+
+
+def _meeting(r):
+    days = r.choice(DAY_PATTERNS)
+    if days == 'TBA':
+        return ['TBA', '', '', 'TBA']
+    (start, length) = r.choice(TIMES)
+    room = '%s %d' % (r.choice(BUILDINGS), r.randint(100, 5400))
+    if r.random() < 0.05:
+        room = 'TBA'
+    return [days, format_time(start), format_time(start + length), room]
+
+
+def _instructors(r):
+    if r.random() < 0.1:
+        return 'TBA'
+    return ', '.join(r.sample(LAST_NAMES, r.randint(1, 2)))
+
+
+def _title(r):
+    return ' '.join(r.sample(WORDS, r.randint(2, 4)))
+
+
+# @function schedule_page
+# @brief Returns the HTML of a synthetic Schedule Of Classes page.
+# @param courses: Number of courses on the page.
+def schedule_page(courses=REAL_COURSES, seed=0):
+    r = random.Random(seed)
+    out = ['<html><head><title>Schedule Of Classes</title></head><body>\n'
+           '<b>Carnegie Mellon University</b>\n'
+           '<b>Semester: Fall 2016</b>\n'
+           '<table border="1">\n'
+           '<tr><td></td></tr>\n', _row(['Course', 'Title', 'Units',
+                                         'Lec/Sec', 'Days', 'Begin', 'End',
+                                         'Bldg/Room', 'Location',
+                                         'Instructor(s)'])]
+    department = None
+    for (course_department, num) in course_numbers(courses):
+        first = False
+        if course_department != department:
+            department = course_department
+            out.append('<tr><td>%s</td></tr>\n' % department.upper())
+            first = True
+
+        title = _title(r)
+        units = r.choice(['9.0', '10.0', '12.0', '3.0', 'VAR'])
+        location = 'Doha, Qatar' if r.random() < 0.05 else \
+            'Pittsburgh, Pennsylvania'
+
+        # lectures denoted by 'Lec', by letters, or by numbers
+        style = r.random()
+        if style < 0.6:
+            lectures = ['Lec %d' % i if r.random() < 0.8 else 'Lec'
+                        for i in range(1, r.randint(1, 3) + 1)]
+            sections = [[chr(65 + j) for j in range(r.randint(0, 4))]
+                        for _ in lectures]
+        elif style < 0.9:
+            lectures = [chr(65 + j) for j in range(r.randint(1, 4))]
+            sections = [[] for _ in lectures]
+        else:
+            lectures = [str(r.randint(1, 9))]
+            sections = [[]]
+
+        # the title is split into two rows for some courses
+        split = r.random() < 0.02
+        if split:
+            out.append(_row([num, title[:len(title) // 2], units] +
+                            [None] * 7, tr=not first))
+            first = False
+
+        for (i, (lecture, lecture_sections)) in enumerate(zip(lectures,
+                                                              sections)):
+            for (j, name) in enumerate([lecture] + lecture_sections):
+                cells = ['', '', '', name] + _meeting(r) + \
+                    [location, _instructors(r)]
+                if i == 0 and j == 0:
+                    cells[:3] = [num, title, units]
+                    if split:
+                        cells[0] = cells[2] = ''
+                # some rows leave out the instructor column
+                if r.random() < 0.03:
+                    cells = cells[:9]
+                out.append(_row(cells, tr=not first))
+                first = False
+
+                # more meeting times of the same lecture or section
+                for _ in range(r.choice([0, 0, 0, 1])):
+                    out.append(_row(['', '', '', ''] + _meeting(r) +
+                                    [location, '']))
+
+                # a row holding only a title
+                if r.random() < 0.01:
+                    out.append(_row(['', title + ':'] + [None] * 8))
+
+    out.append('</table>\n</body></html>\n')
+    return ''.join(out)
+
+
+# @function detail_page
+# @brief Returns the HTML of a synthetic course details page.
+# @param num: Course number as a 5 character string, no dash.
+def detail_page(num, seed=0):
+    r = random.Random('%s-%s' % (seed, num))
+
+    def course():
+        return '%02d%03d' % (r.randint(10, 99), r.randint(100, 999))
+
+    def requirement():
+        kind = r.random()
+        if kind < 0.3:
+            return 'None'
+        if kind < 0.6:
+            return ' or '.join(course() for _ in range(r.randint(1, 3)))
+        if kind < 0.85:
+            return ' and '.join('(%s)' % ' or '.join(
+                course() for _ in range(r.randint(1, 3)))
+                for _ in range(r.randint(2, 3)))
+        return ' or '.join('(%s)' % ' and '.join(
+            course() for _ in range(2)) for _ in range(r.randint(2, 3)))
+
+    def names():
+        return ''.join('<li>%s, %s</li>' % (r.choice(LAST_NAMES),
+                                            r.choice(FIRST_NAMES))
+                       for _ in range(r.randint(0, 2)))
+
+    navigation = ''.join('<li><a href="/open/SOC/%d">Link %d</a></li>\n' %
+                         (i, i) for i in range(120))
+    rows = ['<tr><td>%s</td><td>10.0</td><td>Lec %d</td>'
+            '<td><ul class="instructor">%s</ul></td></tr>\n' %
+            (num if i == 1 else '', i, names())
+            for i in range(1, r.randint(1, 3) + 1)]
+    rows += ['<tr><td></td><td></td><td>%s</td>'
+             '<td><ul class="instructor">%s</ul></td></tr>\n' %
+             (chr(65 + j), names()) for j in range(r.randint(0, 6))]
+    description = ' '.join(r.choice(WORDS).lower()
+                           for _ in range(r.randint(40, 160)))
+
+    return ('<!DOCTYPE html>\n<html><head><title>Course Details</title>\n'
+            '<link rel="stylesheet" href="/open/SOC/style.css">\n'
+            '<script src="/open/SOC/app.js"></script></head>\n<body>\n'
+            '<nav><ul>\n%s</ul></nav>\n'
+            '<div id="course-detail-description"><p>%s.</p></div>\n'
+            '<dl>\n<div><dt>Prerequisites</dt><dd>%s</dd></div>\n'
+            '<div><dt>Corequisites</dt><dd>%s</dd></div>\n</dl>\n'
+            '<table class="table-striped"><thead><tr><th>Course</th>'
+            '<th>Units</th><th>Section</th><th>Instructor</th></tr></thead>\n'
+            '<tbody>\n%s</tbody></table>\n</body></html>\n' %
+            (navigation, description.capitalize(), requirement(),
+             requirement(), ''.join(rows)))
+
+
+# @function fce_csv
+# @brief Returns the text of a synthetic FCE CSV export.
+# @param rows: Number of data rows.
+def fce_csv(rows=REAL_FCE_ROWS // FCE_FILES, seed=0, year=2015,
+            semester='Spring'):
+    r = random.Random(seed)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(FCE_HEADER)
+    instructors = ['%s, %s.' % (last.upper(), first[0])
+                   for last in LAST_NAMES for first in FIRST_NAMES]
+
+    for i in range(rows):
+        # course IDs are exported either as numbers or as ##-###
+        if r.random() < 0.5:
+            course_id = str(r.randint(1000, 99999))
+        else:
+            course_id = '%02d-%03d' % (r.randint(1, 99), r.randint(0, 999))
+        enrollment = r.randint(1, 300)
+        responses = r.randint(0, enrollment)
+        row = [semester, str(year), r.choice(instructors + ['']),
+               r.choice(['CS', 'MATH', 'ECE', 'HIST', 'PHIL', 'STAT']),
+               course_id, _title(r).upper(), r.choice(['A', 'B', 'A3', '1']),
+               'Lec', str(responses), str(enrollment),
+               '%d%%' % (100 * responses // enrollment), '']
+        row += ['%.2f' % (r.random() * 5) if r.random() > 0.1 else ''
+                for _ in QUESTIONS]
+        writer.writerow(row)
+
+        # exports restate the header, sometimes with fewer questions
+        if r.random() < 0.002:
+            writer.writerow(FCE_HEADER[:-r.randint(1, 5)])
+    return out.getvalue()
+
+
+# @function write_fce_files
+# @brief Writes synthetic FCE CSVs to a directory.
+# @param scale: Multiple of the real number of FCE rows.
+# @return: List of the paths written.
+def write_fce_files(directory, scale=1, seed=0):
+    paths = []
+    rows = int(REAL_FCE_ROWS * scale) // FCE_FILES
+    for i in range(FCE_FILES):
+        (year, semester) = (2012 + i // 2, ['Spring', 'Fall'][i % 2])
+        path = os.path.join(directory, '%d_%s.csv' % (year, semester.lower()))
+        with open(path, 'w', newline='') as f:
+            f.write(fce_csv(rows, seed + i, year, semester))
+        paths.append(path)
+    return paths
+
+
+# @function write_fixtures
+# @brief Writes a full set of synthetic fixtures to a directory.
+# @param scale: Multiple of the real size of each data set.
+# @return: Dictionary with the paths written.
+def write_fixtures(directory, scale=1, seed=0):
+    os.makedirs(os.path.join(directory, 'courseDetails'), exist_ok=True)
+    os.makedirs(os.path.join(directory, 'fces'), exist_ok=True)
+
+    schedule = os.path.join(directory, 'sched_layout_synthetic.htm')
+    with open(schedule, 'w') as f:
+        f.write(schedule_page(int(REAL_COURSES * scale), seed))
+
+    details = []
+    for (_, num) in course_numbers(int(REAL_DETAIL_PAGES * scale)):
+        path = os.path.join(directory, 'courseDetails', num + '.htm')
+        with open(path, 'w') as f:
+            f.write(detail_page(num, seed))
+        details.append(path)
+
+    fces = write_fce_files(os.path.join(directory, 'fces'), scale, seed)
+    return {'schedules': [schedule], 'details': details, 'fces': fces}
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='synthetic.py')
+    parser.add_argument('directory', metavar='DIR',
+                        help='directory to write fixtures to')
+    parser.add_argument('--scale', type=float, default=1,
+                        help='multiple of the real size of each data set '
+                             '(default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    paths = write_fixtures(args.directory, args.scale, args.seed)
+    print('Wrote 1 schedule page, {} details pages and {} FCE files to {}'
+          .format(len(paths['details']), len(paths['fces']), args.directory))
+
+
+if __name__ == '__main__':
+    main()
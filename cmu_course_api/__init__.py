@@ -1,8 +1,76 @@
 # @file __init__.py
 # @brief Package initilization file for cmu_course_api - runs when imported.
+#
+#        The public API is loaded lazily: a module is only imported the first
+#        time one of its names is looked up on the package, so that using
+#        parse_fces doesn't import BeautifulSoup, urllib and asyncio.
 # @author Justin Gallagher (jrgallag@andrew.cmu.edu)
 # @since 2015-11-08
 
 
-from .aggregate import get_course_data
-from .parse_fces import parse_fces
+import importlib
+# imported eagerly, since the module parse_fces would otherwise shadow the
+# function of the same name once imported; it only needs csv and re
+from .parse_fces import parse_fces, iter_fces, dump_fces, parse_fce_folder, \
+    iter_fce_folder
+
+
+# name on the package -> module defining it
+_EXPORTS = {
+    'get_course_data': 'aggregate',
+    'get_course_data_async': 'aggregate',
+    'get_course_data_multi': 'aggregate',
+    'get_course_data_multi_async': 'aggregate',
+    'FCETable': 'fce_columns',
+    'FCEIndex': 'fce_join',
+    'join_fces': 'fce_join',
+    'FCEStore': 'fce_store',
+    'HTTPCache': 'cache',
+    'update_course_data': 'incremental',
+    'update_course_data_async': 'incremental',
+    'PrereqGraph': 'prereq_graph',
+    'CourseIndex': 'course_index',
+    'generate_schedules': 'schedule_builder',
+    'count_schedules': 'schedule_builder',
+    'RoomOccupancy': 'room_occupancy',
+    'CoursePack': 'formats',
+    'FCEPack': 'formats',
+    'load_course_data': 'formats',
+    'write_course_data': 'formats',
+    'write_fce_pack': 'formats',
+    'CourseData': 'model',
+    'Course': 'model',
+    'LecSec': 'model',
+    'Meeting': 'model',
+    'Observer': 'metrics',
+    'ObserverGroup': 'metrics',
+    'ProgressPrinter': 'metrics',
+    'MetricsCollector': 'metrics'
+}
+
+# every module of the package, which can be used as attributes of it without
+# importing them first
+_SUBMODULES = ('aggregate', 'cache', 'checkpoint', 'course_index',
+               'fce_columns', 'fce_join', 'fce_store', 'fetch', 'formats',
+               'incremental', 'metrics', 'model', 'parse_descs',
+               'parse_schedules', 'prereq_graph', 'room_occupancy',
+               'schedule_builder', 'server')
+
+__all__ = ['parse_fces', 'iter_fces', 'dump_fces', 'parse_fce_folder',
+           'iter_fce_folder'] + list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module('.' + name, __name__)
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError('module %r has no attribute %r'
+                             % (__name__, name))
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
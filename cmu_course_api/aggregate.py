@@ -6,17 +6,19 @@
 # @author Justin Gallagher (jrgallag@andrew.cmu.edu)
 # @since 2015-04-07
 
+import asyncio
+import copy
 import json
 import os.path
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
-from cmu_course_api.parse_descs import get_course_desc
-from cmu_course_api.parse_schedules import parse_schedules
-
-# imports used for multithreading
-import threading
-from queue import Queue
 from os import cpu_count
-from queue import Empty
+from cmu_course_api.checkpoint import Journal
+from cmu_course_api.fetch import Fetcher, FetchError, DEFAULT_CONCURRENCY, \
+    DEFAULT_RETRIES
+from cmu_course_api.parse_descs import get_course_url, extract_course_desc, \
+    parse_course_desc_bs4
+from cmu_course_api.parse_schedules import get_url, parse_schedules_page
 
 
 # Constants
@@ -26,88 +28,412 @@ SEMESTER_ABBREV = {
     'Fall': 'F',
     'Summer': 'M'
 }
+DEFAULT_PARSE_WORKERS = cpu_count() or 4
 
 
-# @function aggregate
+# @function merge_course
+# @brief Fills in a course description with the course's schedule.
+# @param desc: Course description as returned by parse_course_desc.
+# @param course: Course as returned in parse_schedules' 'schedules' list.
+# @return The course's entry in the aggregate output.
+def merge_course(desc, course):
+    desc['name'] = course['title']
+
+    try:
+        desc['units'] = float(course['units'])
+    except ValueError:
+        desc['units'] = None
+
+    desc['department'] = course['department']
+    desc['lectures'] = course['lectures']
+    desc['sections'] = course['sections']
+    names_dict = desc.pop('names_dict', {})
+
+    for key in ('lectures', 'sections'):
+        for meeting in desc[key]:
+            if meeting['name'] in names_dict:
+                meeting['instructors'] = names_dict[meeting['name']]
+
+    return desc
+
+
+# @class Batch
+# @brief Work shared by the aggregate_async runs of a multi-semester scrape:
+#        one pool of parser processes, and the description of every course
+#        details URL that one of the runs has claimed. Summer semesters M1
+#        and M2 both look up course details as 'M', so a course offered in
+#        both is only downloaded and parsed once.
+class Batch:
+
+    def __init__(self, parse_workers=DEFAULT_PARSE_WORKERS):
+        self.pool = ProcessPoolExecutor(parse_workers) if parse_workers \
+            else None
+        # URL -> future of (description, None) or (None, failure reason)
+        self.descs = {}
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+# @function aggregate_async
 # @brief Combines the course descriptions and schedules into one object.
-# @param schedules: Course schedules object as returned by parse_descs.
+#
+#        Work is split into a pipeline: fetch workers download course detail
+#        pages and put the raw pages on a bounded queue, from which parse
+#        workers hand them to a pool of parse_workers processes. When the
+#        parsers fall behind the queue fills up and fetching pauses.
+#
+#        Progress, the time spent fetching and parsing each page and the depth
+#        of the parse queue are reported to the fetcher's observer.
+#
+#        A course whose page can't be downloaded (after the fetcher's
+#        retries) or parsed is left out of 'courses' and listed in 'errors'
+#        instead, so one bad page doesn't stop the run.
+#
+#        With a checkpoint, every description is also appended to a journal
+#        as soon as it is parsed, and descriptions already in the journal
+#        from an earlier, interrupted run aren't fetched again.
+#
+#        Runs sharing a Batch share its parser processes, and a page another
+#        run of the batch has fetched (or is fetching) isn't fetched again.
+# @param schedules: Course schedules object as returned by parse_schedules.
+# @param fetcher: Fetcher to download course descriptions with.
+# @param parse_workers: Number of processes to parse pages in. If 0, pages are
+#        parsed in the calling thread.
+# @param checkpoint: Optional path of a journal to resume from and record
+#        progress in (see checkpoint.py).
+# @param batch: Optional Batch shared with other runs.
 # @return An object containing the aggregate of the three datasets.
-def aggregate(schedules):
+async def aggregate_async(schedules, fetcher,
+                          parse_workers=DEFAULT_PARSE_WORKERS,
+                          checkpoint=None, batch=None):
     courses = {}
+    errors = {}
+    observer = fetcher.observer
 
     semester = schedules['semester'].split(' ')[0]
     semester = SEMESTER_ABBREV[semester]
     year = schedules['semester'].split(' ')[-1][2:]
 
-    count = cpu_count()
-    lock = threading.Lock()
-    queue = Queue()
+    journal = None
+    if checkpoint is not None:
+        journal = Journal(checkpoint, schedules['semester'])
 
-    if count is None:
-        count = 4
+    queue = asyncio.Queue()
+    parse_queue = asyncio.Queue(maxsize=2 * max(parse_workers, 1))
+    loop = asyncio.get_running_loop()
+    if batch is not None:
+        (pool, shared) = (batch.pool, batch.descs)
+    else:
+        pool = ProcessPoolExecutor(parse_workers) if parse_workers else None
+        shared = None
+
+    # hands the result for a URL this run claimed to the rest of the batch
+    def settle(url, desc=None, reason=None):
+        if shared is not None and url is not None and \
+                not shared[url].done():
+            shared[url].set_result((copy.deepcopy(desc), reason))
+
+    def finish(course, desc, url=None, journaled=False):
+        settle(url, desc)
+        if journal is not None and not journaled:
+            journal.add(course['num'], desc)
+        number = course['num'][:2] + '-' + course['num'][2:]
+        courses[number] = merge_course(desc, course)
 
     for course in schedules['schedules']:
-        queue.put(course)
+        desc = journal.descs.get(course['num']) if journal else None
+        if desc is not None:
+            finish(course, desc, journaled=True)
+        else:
+            queue.put_nowait(course)
 
+    if courses:
+        observer.message('Resuming with {} course descriptions from {}'
+                         .format(len(courses), checkpoint))
     queue_size = queue.qsize()
     fces_processed = 0
+    progress = 'Getting description for {}...'
+    if batch is not None:
+        progress = schedules['semester'] + ': ' + progress
+
+    def fail(course, reason, url=None):
+        settle(url, reason=reason)
+        number = course['num'][:2] + '-' + course['num'][2:]
+        errors[number] = reason
+        observer.count('courses_failed')
 
-    def run():
+    async def fetch():
+        nonlocal fces_processed
         while True:
             try:
-                course = queue.get(timeout=4)
-            except Empty:
+                course = queue.get_nowait()
+            except asyncio.QueueEmpty:
                 return
 
-            nonlocal queue_size, fces_processed
-            with lock:
-                fces_processed += 1
-                
-            print('\r[{}/{}] Getting description for {}...'.format(
-                fces_processed, queue_size, course['num']), end="")
+            fces_processed += 1
+            observer.progress(fces_processed, queue_size,
+                              progress.format(course['num']))
+
+            url = get_course_url(course['num'], semester, year)
+            if shared is not None:
+                if url in shared:
+                    (desc, reason) = await shared[url]
+                    observer.count('deduplicated')
+                    if desc is None:
+                        fail(course, reason)
+                    else:
+                        finish(course, copy.deepcopy(desc))
+                    continue
+                shared[url] = loop.create_future()
+
+            try:
+                with observer.timer('fetch_description'):
+                    response = await fetcher.fetch(url)
+            except FetchError as e:
+                fail(course, e.reason, url)
+                continue
+
+            # an unchanged page doesn't need to be parsed again
+            if response.not_modified:
+                desc = fetcher.cache.load_parsed(url)
+                if desc is not None:
+                    observer.count('parsed_from_cache')
+                    finish(course, desc, url)
+                    continue
+
+            await parse_queue.put((course, url, response.body))
+            observer.queue_depth('parse', parse_queue.qsize())
+
+    async def run_parser(parser, page):
+        if pool is None:
+            return parser(page)
+        return await loop.run_in_executor(pool, parser, page)
 
-            desc = get_course_desc(course['num'], semester, year)
-            desc['name'] = course['title']
+    async def parse():
+        while True:
+            item = await parse_queue.get()
+            if item is None:
+                return
 
+            (course, url, page) = item
             try:
-                desc['units'] = float(course['units'])
-            except ValueError:
-                desc['units'] = None
-
-            desc['department'] = course['department']
-            desc['lectures'] = course['lectures']
-            desc['sections'] = course['sections']
-            names_dict = desc.pop('names_dict', {})
-
-            for key in ('lectures', 'sections'):
-                for meeting in desc[key]:
-                    if meeting['name'] in names_dict:
-                        meeting['instructors'] = names_dict[meeting['name']]
-
-            number = course['num'][:2] + '-' + course['num'][2:]
-            with lock:
-                courses[number] = desc
-            queue.task_done()
-
-    print("running on " + str(count) + " threads")
-    for _ in range(count):
-        thread = threading.Thread(target=run)
-        thread.setDaemon(True)
-        thread.start()
-
-    queue.join()
-    print("")
+                with observer.timer('parse_description'):
+                    desc = await run_parser(extract_course_desc, page)
+                    if desc is None:
+                        # the page isn't laid out as the fast path expects
+                        observer.count('description_fallbacks')
+                        desc = await run_parser(parse_course_desc_bs4, page)
+            except Exception as e:
+                fail(course, 'failed to parse: %s' % (str(e) or
+                                                      type(e).__name__), url)
+                continue
+            if fetcher.cache is not None:
+                fetcher.cache.store_parsed(url, desc)
+            finish(course, desc, url)
+
+    async def fetch_all():
+        await asyncio.gather(*[fetch()
+                               for _ in range(fetcher.max_concurrency)])
+        for _ in range(max(parse_workers, 1)):
+            await parse_queue.put(None)
+
+    requests = str(fetcher.concurrency)
+    if fetcher.max_concurrency > fetcher.concurrency:
+        requests += " to " + str(fetcher.max_concurrency)
+    observer.message("running with " + requests +
+                     " concurrent requests and " + str(parse_workers) +
+                     " parser processes")
+    tasks = [asyncio.ensure_future(fetch_all())]
+    tasks += [asyncio.ensure_future(parse())
+              for _ in range(max(parse_workers, 1))]
+    try:
+        with observer.timer('aggregate'):
+            await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    finally:
+        if pool is not None and batch is None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if journal is not None:
+            journal.close()
 
+    if errors:
+        observer.message('Failed to get {} course descriptions'.format(
+            len(errors)))
     return {'courses': courses, 'rundate': str(date.today()),
-            'semester': schedules['semester']}
+            'semester': schedules['semester'], 'errors': errors}
+
+
+# @function aggregate
+# @brief Combines the course descriptions and schedules into one object.
+# @param schedules: Course schedules object as returned by parse_schedules.
+# @param concurrency: Number of course descriptions to download at once.
+# @param cache: Optional HTTPCache to revalidate pages against.
+# @param parse_workers: Number of processes to parse pages in.
+# @param observer: Optional Observer to report progress and metrics to.
+# @param max_concurrency: Number of pages that may be downloaded at once
+#        while the server keeps up; defaults to concurrency.
+# @param retries: Number of times to retry a page after a 429 or 5xx
+#        response, a timeout or a connection error.
+# @param checkpoint: Optional path of a journal of finished courses. If a
+#        run dies, running again with the same checkpoint resumes where it
+#        stopped. Remove the journal once the output is saved, e.g. with
+#        write_course_data(..., checkpoint=path).
+# @return An object containing the aggregate of the three datasets.
+def aggregate(schedules, concurrency=DEFAULT_CONCURRENCY, cache=None,
+              parse_workers=DEFAULT_PARSE_WORKERS, observer=None,
+              max_concurrency=None, retries=DEFAULT_RETRIES,
+              checkpoint=None):
+
+    async def run():
+        async with Fetcher(concurrency, cache=cache, observer=observer,
+                           max_concurrency=max_concurrency,
+                           retries=retries) as fetcher:
+            return await aggregate_async(schedules, fetcher, parse_workers,
+                                         checkpoint)
+
+    return asyncio.run(run())
+
+
+# @function get_schedules_async
+# @brief Downloads and parses the Schedule Of Classes for a semester.
+# @param semester: The semester to get data for. Must be one of [S, M1, M2, F].
+# @param fetcher: Fetcher to download the page with.
+# @return Course schedules object as returned by parse_schedules.
+async def get_schedules_async(semester, fetcher):
+    observer = fetcher.observer
+    observer.message('Requesting the HTML page from the network...')
+    with observer.timer('fetch_schedule'):
+        page = await fetcher.get(get_url(semester))
+    observer.message('Done.')
+    with observer.timer('parse_schedule'):
+        return parse_schedules_page(page, observer)
+
+
+# @function get_course_data_async
+# @brief Awaitable version of get_course_data, for use from inside a running
+#        event loop.
+# @param semester: The semester to get data for. Must be one of [S, M1, M2, F].
+# @param concurrency: Number of pages to download at once.
+# @param cache: Optional HTTPCache to revalidate pages against.
+# @param parse_workers: Number of processes to parse pages in.
+# @param observer: Optional Observer to report progress and metrics to.
+# @param max_concurrency: Number of pages that may be downloaded at once
+#        while the server keeps up; defaults to concurrency.
+# @param retries: Number of times to retry a page after a 429 or 5xx
+#        response, a timeout or a connection error.
+# @param checkpoint: Optional path of a journal of finished courses. If a
+#        run dies, running again with the same checkpoint resumes where it
+#        stopped. Remove the journal once the output is saved, e.g. with
+#        write_course_data(..., checkpoint=path).
+# @return Object containing all course-api data - see README.md for more
+#        information.
+async def get_course_data_async(semester, concurrency=DEFAULT_CONCURRENCY,
+                                cache=None,
+                                parse_workers=DEFAULT_PARSE_WORKERS,
+                                observer=None, max_concurrency=None,
+                                retries=DEFAULT_RETRIES, checkpoint=None):
+    async with Fetcher(concurrency, cache=cache, observer=observer,
+                       max_concurrency=max_concurrency,
+                       retries=retries) as fetcher:
+        schedules = await get_schedules_async(semester, fetcher)
+        return await aggregate_async(schedules, fetcher, parse_workers,
+                                     checkpoint)
 
 
 # @function get_course_data
 # @brief Used for retrieving all information from the course-api for a given
 #        semester.
 # @param semester: The semester to get data for. Must be one of [S, M1, M2, F].
+# @param concurrency: Number of pages to download at once.
+# @param cache: Optional HTTPCache to revalidate pages against.
+# @param parse_workers: Number of processes to parse pages in.
+# @param observer: Optional Observer to report progress and metrics to (see
+#        metrics.py). Defaults to a ProgressPrinter; pass an Observer() to
+#        print nothing.
+# @param max_concurrency: Number of pages that may be downloaded at once
+#        while the server keeps up; defaults to concurrency.
+# @param retries: Number of times to retry a page after a 429 or 5xx
+#        response, a timeout or a connection error.
+# @param checkpoint: Optional path of a journal of finished courses. If a
+#        run dies, running again with the same checkpoint resumes where it
+#        stopped. Remove the journal once the output is saved, e.g. with
+#        write_course_data(..., checkpoint=path).
 # @return Object containing all course-api data - see README.md for more
 #        information.
-def get_course_data(semester):
-    schedules = parse_schedules(semester)
-    return aggregate(schedules)
+def get_course_data(semester, concurrency=DEFAULT_CONCURRENCY, cache=None,
+                    parse_workers=DEFAULT_PARSE_WORKERS, observer=None,
+                    max_concurrency=None, retries=DEFAULT_RETRIES,
+                    checkpoint=None):
+    return asyncio.run(get_course_data_async(semester, concurrency, cache,
+                                             parse_workers, observer,
+                                             max_concurrency, retries,
+                                             checkpoint))
+
+
+# @function get_course_data_multi_async
+# @brief Awaitable version of get_course_data_multi.
+async def get_course_data_multi_async(semesters,
+                                      concurrency=DEFAULT_CONCURRENCY,
+                                      cache=None,
+                                      parse_workers=DEFAULT_PARSE_WORKERS,
+                                      observer=None, max_concurrency=None,
+                                      retries=DEFAULT_RETRIES):
+    semesters = list(semesters)
+    for semester in semesters:
+        get_url(semester)
+    if len(set(semesters)) != len(semesters):
+        raise ValueError('semesters %s repeat a semester' % semesters)
+
+    async with Fetcher(concurrency, cache=cache, observer=observer,
+                       max_concurrency=max_concurrency,
+                       retries=retries) as fetcher:
+        schedules = await gather_or_cancel(
+            *[get_schedules_async(semester, fetcher)
+              for semester in semesters])
+        batch = Batch(parse_workers)
+        try:
+            results = await gather_or_cancel(
+                *[aggregate_async(schedule, fetcher, parse_workers,
+                                  batch=batch)
+                  for schedule in schedules])
+        finally:
+            batch.close()
+    return dict(zip(semesters, results))
+
+
+# @function get_course_data_multi
+# @brief Retrieves all information from the course-api for several semesters
+#        at once. Schedule pages are downloaded concurrently, all downloads
+#        share one Fetcher (and so one connection pool and concurrency
+#        limit), and course details pages that several semesters look up
+#        with the same URL, as M1 and M2 do, are only downloaded once.
+# @param semesters: List of semesters, each one of [S, M1, M2, F].
+# @param concurrency, cache, parse_workers, observer, max_concurrency,
+#        retries: As for get_course_data, shared by all semesters.
+# @return Dictionary mapping each semester to the object get_course_data
+#        would return for it.
+def get_course_data_multi(semesters, concurrency=DEFAULT_CONCURRENCY,
+                          cache=None, parse_workers=DEFAULT_PARSE_WORKERS,
+                          observer=None, max_concurrency=None,
+                          retries=DEFAULT_RETRIES):
+    return asyncio.run(get_course_data_multi_async(
+        semesters, concurrency, cache, parse_workers, observer,
+        max_concurrency, retries))
+
+
+# @function gather_or_cancel
+# @brief Like asyncio.gather, but cancels the remaining awaitables as soon as
+#        one of them raises.
+async def gather_or_cancel(*aws):
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
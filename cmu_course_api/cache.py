@@ -0,0 +1,277 @@
+# @file cache.py
+# @brief Persistent on-disk HTTP cache for schedule and course detail pages.
+#
+#        Bodies are stored zlib-compressed, one file per URL, next to a small
+#        JSON metadata file holding the validators (ETag/Last-Modified) the
+#        server sent. Cached pages are revalidated with If-None-Match and
+#        If-Modified-Since, so an unchanged page costs a 304. The result of
+#        parsing a page can be stored alongside it, so an unchanged page does
+#        not need to be parsed again either. Parsed results are stored with
+#        PARSE_VERSION, and results stored by another version are ignored,
+#        so that a change to the parser or its output takes effect on pages
+#        that haven't changed.
+#
+#        When the total size of the cache exceeds its limit, the least
+#        recently used entries are evicted.
+# @since 2026-10-17
+
+
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.request
+import zlib
+
+
+# Constants
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+BODY_EXT = '.body'
+META_EXT = '.json'
+PARSED_EXT = '.parsed'
+# version of parsed results; bump it whenever parse_course_desc's output
+# changes
+PARSE_VERSION = 2
+
+
+# @class CacheEntry
+# @brief Metadata about a cached page.
+class CacheEntry:
+
+    def __init__(self, url, etag=None, last_modified=None, stored=None,
+                 size=0):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored = stored
+        self.size = size
+
+    def to_dict(self):
+        return {'url': self.url, 'etag': self.etag,
+                'last_modified': self.last_modified, 'stored': self.stored,
+                'size': self.size}
+
+
+# @class HTTPCache
+# @brief A directory of cached pages, keyed by URL.
+class HTTPCache:
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.total_size = sum(os.path.getsize(path) for path in self._files())
+
+    # @function conditional_headers
+    # @brief Returns the request headers needed to revalidate an entry.
+    # @param entry: CacheEntry as returned by lookup, or None.
+    # @return: dict of headers, empty if the entry cannot be revalidated.
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    # @function lookup
+    # @brief Returns the CacheEntry for a URL, or None if it is not cached.
+    def lookup(self, url):
+        try:
+            with open(self._path(url, META_EXT)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self._path(url, BODY_EXT)):
+            return None
+        return CacheEntry(**meta)
+
+    # @function load
+    # @brief Returns the cached body of a URL, or None if it is not cached.
+    def load(self, url):
+        path = self._path(url, BODY_EXT)
+        try:
+            with open(path, 'rb') as f:
+                body = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+        # The body's mtime doubles as its last access time for eviction.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return body
+
+    # @function store
+    # @brief Stores a freshly downloaded page, replacing any previous entry
+    #        and its parsed result.
+    # @param url: URL of the page.
+    # @param body: The page's body as bytes.
+    # @param headers: dict of response headers, with lowercase names.
+    # @return: The new CacheEntry.
+    def store(self, url, body, headers):
+        data = zlib.compress(body)
+        entry = CacheEntry(url, headers.get('etag'),
+                           headers.get('last-modified'), time.time(),
+                           len(data))
+
+        self._remove(url, PARSED_EXT)
+        self._write(url, BODY_EXT, data)
+        self._write(url, META_EXT, json.dumps(entry.to_dict()).encode())
+        self._evict()
+        return entry
+
+    # @function refresh
+    # @brief Records that a cached page was revalidated by a 304 response.
+    # @param url: URL of the page.
+    # @param headers: dict of response headers, with lowercase names.
+    # @return: The updated CacheEntry, or None if the page is not cached.
+    def refresh(self, url, headers):
+        entry = self.lookup(url)
+        if entry is None:
+            return None
+        entry.etag = headers.get('etag', entry.etag)
+        entry.last_modified = headers.get('last-modified',
+                                          entry.last_modified)
+        entry.stored = time.time()
+        self._write(url, META_EXT, json.dumps(entry.to_dict()).encode())
+        return entry
+
+    # @function load_parsed
+    # @brief Returns the parsed result stored for a URL, or None if there is
+    #        none, or it was stored by another version of the parser.
+    # @param version: Version the result must have been stored with.
+    def load_parsed(self, url, version=PARSE_VERSION):
+        try:
+            with open(self._path(url, PARSED_EXT), 'rb') as f:
+                record = json.loads(zlib.decompress(f.read()).decode())
+        except (OSError, ValueError, zlib.error):
+            return None
+        if not isinstance(record, dict) or \
+                record.get('version') != version or 'value' not in record:
+            return None
+        return record['value']
+
+    # @function store_parsed
+    # @brief Stores the parsed result of the currently cached page of a URL.
+    # @param value: Any JSON-serializable object.
+    # @param version: Version of the parser that produced it.
+    def store_parsed(self, url, value, version=PARSE_VERSION):
+        if self.lookup(url) is None:
+            return
+        record = {'version': version, 'value': value}
+        self._write(url, PARSED_EXT,
+                    zlib.compress(json.dumps(record).encode()))
+        self._evict()
+
+    # @function clear
+    # @brief Removes every entry from the cache.
+    def clear(self):
+        with self._lock:
+            for path in self._files():
+                os.remove(path)
+            self.total_size = 0
+
+    def _key(self, url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _path(self, url, ext):
+        key = self._key(url)
+        return os.path.join(self.directory, key[:2], key + ext)
+
+    def _files(self):
+        for dirpath, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if filename.endswith((BODY_EXT, META_EXT, PARSED_EXT)):
+                    yield os.path.join(dirpath, filename)
+
+    def _write(self, url, ext, data):
+        path = self._path(url, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = '%s.%d.%d.tmp' % (path, os.getpid(), threading.get_ident())
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        with self._lock:
+            try:
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+            os.replace(tmp, path)
+            self.total_size += len(data) - old_size
+
+    def _remove(self, url, ext):
+        path = self._path(url, ext)
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                return
+            self.total_size -= size
+
+    def _evict(self):
+        with self._lock:
+            if self.total_size <= self.max_size:
+                return
+
+            # Group files by entry, ordered by the last access of the body
+            entries = {}
+            for path in self._files():
+                key = os.path.basename(path).split('.')[0]
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                (atime, size, paths) = entries.get(key, (0, 0, []))
+                if path.endswith(BODY_EXT):
+                    atime = stat.st_mtime
+                entries[key] = (atime, size + stat.st_size, paths + [path])
+
+            # Evict down to 90% of the limit so we don't rescan every store
+            target = self.max_size * 0.9
+            for (_, size, paths) in sorted(entries.values()):
+                if self.total_size <= target:
+                    break
+                for path in paths:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                self.total_size -= size
+
+
+# @function urlopen
+# @brief Downloads a page, going through an HTTPCache if one is given.
+# @param url: URL of the page to get.
+# @param cache: An HTTPCache, or None.
+# @return: (body, not_modified) where not_modified is True if the cached copy
+#        was revalidated by the server.
+def urlopen(url, cache=None):
+    entry = cache.lookup(url) if cache is not None else None
+    request = urllib.request.Request(
+        url, headers=HTTPCache.conditional_headers(entry))
+
+    try:
+        response = urllib.request.urlopen(request)
+    except urllib.request.HTTPError as e:
+        if e.code == 304 and entry is not None:
+            body = cache.load(url)
+            if body is not None:
+                headers = {k.lower(): v for (k, v) in e.headers.items()}
+                cache.refresh(url, headers)
+                return (body, True)
+            # the entry vanished since lookup, so ask for the whole page
+            response = urllib.request.urlopen(url)
+        else:
+            raise
+
+    body = response.read()
+    if cache is not None:
+        headers = {k.lower(): v for (k, v) in response.headers.items()}
+        cache.store(url, body, headers)
+    return (body, False)
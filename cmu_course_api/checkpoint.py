@@ -0,0 +1,132 @@
+# @file checkpoint.py
+# @brief Append-only journal of finished course descriptions, so a run that
+#        dies part way through can be resumed instead of started over.
+#
+#        The journal is a JSON lines file. The first line names the semester
+#        it belongs to, and each following line holds one course:
+#
+#            {"version": 1, "semester": "Fall 2016"}
+#            {"num": "15122", "desc": {...}}
+#
+#        Descriptions are stored as parse_course_desc returned them, before
+#        they are merged with the schedule, so a resumed run merges them with
+#        the schedule it just downloaded. Each line is written with a single
+#        write and flushed, so a process killed mid-write leaves at most one
+#        partial line at the end, which is dropped the next time the journal
+#        is opened.
+#
+#        Once the output has been written, the journal is no longer needed;
+#        write_course_data(data, path, checkpoint=journal) replaces the output
+#        file atomically and then removes the journal.
+# @since 2026-10-17
+
+
+import json
+import os
+import threading
+
+
+# Constants
+JOURNAL_VERSION = 1
+
+
+# @class Journal
+# @brief An open checkpoint journal for one semester.
+#
+#        Usage:
+#            with Journal(path, schedules['semester']) as journal:
+#                desc = journal.descs.get(num)
+#                ...
+#                journal.add(num, desc)
+class Journal:
+
+    # @param path: Path of the journal; created if it doesn't exist.
+    # @param semester: Semester being scraped, e.g. 'Fall 2016'. A journal
+    #        of another semester is discarded.
+    def __init__(self, path, semester):
+        self.path = path
+        self.semester = semester
+        self.descs = {}
+        self._lock = threading.Lock()
+
+        good = self._read()
+        if good is None:
+            self._file = open(path, 'wb')
+            self._write({'version': JOURNAL_VERSION, 'semester': semester})
+        else:
+            self._file = open(path, 'r+b')
+            # drop anything after the last complete line
+            self._file.truncate(good)
+            self._file.seek(good)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # @function add
+    # @brief Records a finished course description.
+    # @param num: Course number as a 5 character string, no dash.
+    # @param desc: Course description as returned by parse_course_desc.
+    def add(self, num, desc):
+        self.descs[num] = desc
+        self._write({'num': num, 'desc': desc})
+
+    # @function close
+    # @brief Flushes the journal to disk and closes it.
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def _write(self, value):
+        line = (json.dumps(value) + '\n').encode()
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    # @function _read
+    # @brief Loads the descriptions of an existing journal.
+    # @return: Offset of the end of its last complete line, or None if there
+    #        is no usable journal for this semester.
+    def _read(self):
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return None
+
+        with f:
+            header = _parse_line(f.readline())
+            if header is None or header.get('version') != JOURNAL_VERSION \
+                    or header.get('semester') != self.semester:
+                return None
+            good = f.tell()
+            for line in f:
+                entry = _parse_line(line)
+                if entry is None or 'num' not in entry:
+                    break
+                self.descs[entry['num']] = entry['desc']
+                good += len(line)
+        return good
+
+
+def _parse_line(line):
+    if not line.endswith(b'\n'):
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+# @function remove_journal
+# @brief Deletes a journal, if it exists.
+def remove_journal(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
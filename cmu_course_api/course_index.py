@@ -0,0 +1,293 @@
+# @file course_index.py
+# @brief In-memory query index over the output of get_course_data.
+#
+#        Every meeting time of every lecture and section gets an integer ID,
+#        and each index maps a key (department, instructor, building, room,
+#        day) to the bitset of meeting IDs it matches. Meeting times are
+#        normalized to minutes after midnight, with prefix bitsets over the
+#        sorted distinct begin and end times, so a time filter is a binary
+#        search and a bitwise operation. Queries combine filters with
+#        bitwise AND, and return the original course, lecture/section and
+#        time objects rather than copies.
+#
+#        Usage:
+#            index = CourseIndex(data)
+#            query = index.query().department('Computer Science') \
+#                .day(2).starts_after('03:00PM')
+#            for (number, course) in query.courses():
+#                ...
+# @since 2026-10-17
+
+
+from bisect import bisect_left, bisect_right
+from cmu_course_api.prereq_graph import iter_bits
+
+
+# Constants
+DAYS = 'UMTWRFS'
+
+
+# @function parse_time
+# @brief Converts a schedule time to minutes after midnight.
+# @param text: Time as a string like '09:00AM', or already as minutes.
+# @return: Minutes after midnight as an int, or None if text is None.
+def parse_time(text):
+    if text is None or isinstance(text, int):
+        return text
+    (hours, minutes) = text[:-2].split(':')
+    hours = int(hours) % 12
+    if text[-2:].upper() == 'PM':
+        hours += 12
+    return hours * 60 + int(minutes)
+
+
+# @function parse_day
+# @brief Converts a day to its number, 0 (Sunday) to 6 (Saturday).
+# @param day: Day number, or letter as used on the schedule page ('M', 'R').
+def parse_day(day):
+    if isinstance(day, int):
+        return day
+    if len(day) != 1 or day.upper() not in DAYS:
+        raise ValueError('invalid day %r' % day)
+    return DAYS.index(day.upper())
+
+
+# @function normalize
+# @brief Normalizes a name for case-insensitive lookups.
+def normalize(name):
+    return ' '.join(name.lower().split())
+
+
+# @class CourseIndex
+# @brief Indexes of the lectures, sections and meeting times of a semester.
+class CourseIndex:
+
+    def __init__(self, data):
+        self.data = data
+        self.courses = data.get('courses', data)
+
+        # meeting ID -> (course number, lecture/section, time)
+        self.meetings = []
+        self.all = 0
+        self.lectures = 0
+
+        self.departments = {}
+        self.prefixes = {}
+        self.instructors = {}
+        self.buildings = {}
+        self.rooms = {}
+        self.days = {}
+        self.by_course = {}
+
+        begins = {}
+        ends = {}
+
+        for (number, course) in self.courses.items():
+            course_mask = 0
+            for key in ('lectures', 'sections'):
+                for lecsec in course.get(key) or []:
+                    lecsec_mask = 0
+                    for time in lecsec.get('times') or []:
+                        i = len(self.meetings)
+                        bit = 1 << i
+                        self.meetings.append((number, lecsec, time))
+                        lecsec_mask |= bit
+                        if key == 'lectures':
+                            self.lectures |= bit
+
+                        for day in time.get('days') or []:
+                            self._add(self.days, day, bit)
+                        building = time.get('building')
+                        if building:
+                            self._add(self.buildings, normalize(building),
+                                      bit)
+                            self._add(self.rooms,
+                                      (normalize(building),
+                                       normalize(time.get('room') or '')),
+                                      bit)
+                        begin = parse_time(time.get('begin'))
+                        end = parse_time(time.get('end'))
+                        if begin is not None and end is not None:
+                            begins[begin] = begins.get(begin, 0) | bit
+                            ends[end] = ends.get(end, 0) | bit
+
+                    for name in lecsec.get('instructors') or []:
+                        if name == 'Instructor TBA':
+                            continue
+                        self._add(self.instructors, normalize(name),
+                                  lecsec_mask)
+                        last = normalize(name.split(',')[0])
+                        if last != normalize(name):
+                            self._add(self.instructors, last, lecsec_mask)
+                    course_mask |= lecsec_mask
+
+            self.by_course[number] = course_mask
+            self.all |= course_mask
+            if course.get('department'):
+                self._add(self.departments, normalize(course['department']),
+                          course_mask)
+            self._add(self.prefixes, number.split('-')[0], course_mask)
+
+        # prefix bitsets: _begin_before[k] holds meetings beginning before
+        # _begin_times[k], and _end_by[k] those ending by _end_times[k]
+        (self._begin_times, self._begin_before) = self._prefixes(begins,
+                                                                 False)
+        (self._end_times, self._end_by) = self._prefixes(ends, True)
+        self.timed = self._begin_before[-1]
+
+    @staticmethod
+    def _add(index, key, mask):
+        index[key] = index.get(key, 0) | mask
+
+    @staticmethod
+    def _prefixes(groups, inclusive):
+        times = sorted(groups)
+        masks = [0]
+        for time in times:
+            masks.append(masks[-1] | groups[time])
+        if inclusive:
+            return (times, masks[1:] or [0])
+        return (times, masks)
+
+    # @function query
+    # @brief Returns a Query matching every meeting.
+    def query(self):
+        return Query(self, self.all)
+
+    def begins_before(self, minutes):
+        return self._begin_before[bisect_left(self._begin_times, minutes)]
+
+    def ends_by(self, minutes):
+        k = bisect_right(self._end_times, minutes)
+        return self._end_by[k - 1] if k else 0
+
+
+# @class Query
+# @brief A set of meetings in a CourseIndex, narrowed down by filters.
+#
+#        Every filter returns a new Query; Queries can also be combined with
+#        & (both), | (either) and - (the first but not the second).
+class Query:
+
+    def __init__(self, index, mask):
+        self.index = index
+        self.mask = mask
+
+    def _narrow(self, mask):
+        return Query(self.index, self.mask & mask)
+
+    def __and__(self, other):
+        return Query(self.index, self.mask & other.mask)
+
+    def __or__(self, other):
+        return Query(self.index, self.mask | other.mask)
+
+    def __sub__(self, other):
+        return Query(self.index, self.mask & ~other.mask)
+
+    def __len__(self):
+        return bin(self.mask).count('1')
+
+    def __bool__(self):
+        return self.mask != 0
+
+    # @function department
+    # @brief Meetings of courses in a department, given by name
+    #        ('Computer Science') or course number prefix ('15').
+    def department(self, department):
+        if department.isdigit():
+            return self._narrow(self.index.prefixes.get(department, 0))
+        return self._narrow(self.index.departments.get(normalize(department),
+                                                       0))
+
+    # @function course
+    # @brief Meetings of the given course numbers.
+    def course(self, *numbers):
+        mask = 0
+        for number in numbers:
+            mask |= self.index.by_course.get(number, 0)
+        return self._narrow(mask)
+
+    # @function instructor
+    # @brief Meetings of lectures and sections taught by an instructor, given
+    #        by full name ('Kosbie, David') or last name ('Kosbie').
+    def instructor(self, name):
+        return self._narrow(self.index.instructors.get(normalize(name), 0))
+
+    # @function building
+    # @brief Meetings in a building, optionally in a specific room.
+    def building(self, building, room=None):
+        if room is None:
+            return self._narrow(self.index.buildings.get(normalize(building),
+                                                         0))
+        key = (normalize(building), normalize(room))
+        return self._narrow(self.index.rooms.get(key, 0))
+
+    # @function day
+    # @brief Meetings on any of the given days, as numbers (0 is Sunday) or
+    #        schedule page letters ('M', 'T', 'W', 'R', ...).
+    def day(self, *days):
+        mask = 0
+        for day in days:
+            mask |= self.index.days.get(parse_day(day), 0)
+        return self._narrow(mask)
+
+    # @function lectures
+    # @brief Meetings of lectures only.
+    def lectures(self):
+        return self._narrow(self.index.lectures)
+
+    # @function sections
+    # @brief Meetings of sections only.
+    def sections(self):
+        return self._narrow(self.index.all & ~self.index.lectures)
+
+    # @function starts_after
+    # @brief Meetings beginning at or after a time ('03:00PM' or minutes).
+    def starts_after(self, time):
+        index = self.index
+        return self._narrow(index.timed &
+                            ~index.begins_before(parse_time(time)))
+
+    # @function starts_before
+    # @brief Meetings beginning strictly before a time.
+    def starts_before(self, time):
+        return self._narrow(self.index.begins_before(parse_time(time)))
+
+    # @function ends_before
+    # @brief Meetings ending at or before a time.
+    def ends_before(self, time):
+        return self._narrow(self.index.ends_by(parse_time(time)))
+
+    # @function within
+    # @brief Meetings entirely within a window of time.
+    def within(self, start, end):
+        return self.starts_after(start).ends_before(end)
+
+    # @function overlaps
+    # @brief Meetings that overlap a window of time.
+    def overlaps(self, start, end):
+        index = self.index
+        return self._narrow(index.begins_before(parse_time(end)) &
+                            ~index.ends_by(parse_time(start)))
+
+    # @function meetings
+    # @brief Yields (course number, lecture/section, time) for every match.
+    def meetings(self):
+        meetings = self.index.meetings
+        for i in iter_bits(self.mask):
+            yield meetings[i]
+
+    # @function course_numbers
+    # @brief Returns the sorted course numbers with at least one match.
+    def course_numbers(self):
+        numbers = set(number for (number, _, _) in self.meetings())
+        return sorted(numbers)
+
+    # @function courses
+    # @brief Yields (course number, course) for every course with at least
+    #        one match, in course number order.
+    def courses(self):
+        courses = self.index.courses
+        for number in self.course_numbers():
+            yield (number, courses[number])
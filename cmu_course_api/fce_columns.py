@@ -0,0 +1,314 @@
+# @file fce_columns.py
+# @brief Columnar, NumPy-backed representation of FCE data.
+#
+#        Every general column (Semester, Year, Instructor, Course ID, ...) is
+#        dictionary-encoded: a list of distinct values plus an integer code
+#        per row, with -1 for a missing value. Columns holding only numbers
+#        are also kept as float arrays. Question scores form a 2-D float
+#        array with one row per entry and one column per question, with NaN
+#        for missing scores.
+#
+#        Requires numpy, which can be installed along with this package with
+#        `pip3 install cmu-course-api[numpy]`.
+# @since 2026-10-17
+
+
+import json
+from array import array
+from cmu_course_api.parse_fces import question_order
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Constants
+STATS = ('count', 'mean', 'median', 'std')
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError('FCETable requires numpy; install it with '
+                          '`pip3 install cmu-course-api[numpy]`')
+
+
+# @function is_question
+# @brief Returns whether an FCE column name is a question.
+#
+#        parse_fces files empty general columns under 'Questions' too, so
+#        only names starting with a number count as questions here.
+def is_question(name):
+    return name[:1].isdigit()
+
+
+# @class FCETableBuilder
+# @brief Accumulates FCE entries one at a time into an FCETable.
+class FCETableBuilder:
+
+    def __init__(self):
+        _require_numpy()
+        self.rows = 0
+        self._codes = {}        # field -> array of codes
+        self._values = {}       # field -> list of distinct values
+        self._lookup = {}       # field -> {value: code}
+        self._numeric = {}      # field -> whether all values are numbers
+        self._questions = {}    # question -> array of scores
+
+    # @function append
+    # @brief Adds an FCE entry, as returned by iter_fces.
+    def append(self, entry):
+        row = self.rows
+        seen_fields = 0
+
+        for (name, value) in entry.items():
+            if name == 'Questions':
+                continue
+            codes = self._codes.get(name)
+            if codes is None:
+                codes = self._codes[name] = array('i', [-1] * row)
+                self._values[name] = []
+                self._lookup[name] = {}
+                self._numeric[name] = True
+            if value is None:
+                codes.append(-1)
+            else:
+                lookup = self._lookup[name]
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(lookup)
+                    self._values[name].append(value)
+                    if isinstance(value, bool) or \
+                            not isinstance(value, (int, float)):
+                        self._numeric[name] = False
+                codes.append(code)
+            seen_fields += 1
+
+        # fields missing from this entry, including those stored under
+        # 'Questions' because they were empty
+        if seen_fields < len(self._codes):
+            for codes in self._codes.values():
+                if len(codes) == row:
+                    codes.append(-1)
+
+        scores = entry.get('Questions') or {}
+        for (name, value) in scores.items():
+            if not is_question(name):
+                continue
+            column = self._questions.get(name)
+            if column is None:
+                column = self._questions[name] = array('d',
+                                                       [float('nan')] * row)
+            column.append(float('nan') if value is None else value)
+        for column in self._questions.values():
+            if len(column) == row:
+                column.append(float('nan'))
+
+        self.rows += 1
+
+    # @function build
+    # @brief Returns an FCETable of every entry appended so far.
+    def build(self):
+        fields = {}
+        for (name, codes) in self._codes.items():
+            fields[name] = (numpy.frombuffer(codes, dtype=numpy.int32).copy(),
+                            list(self._values[name]))
+
+        questions = sorted(self._questions, key=question_order)
+        scores = numpy.empty((self.rows, len(questions)))
+        for (i, name) in enumerate(questions):
+            scores[:, i] = numpy.frombuffer(self._questions[name])
+
+        numeric = [name for name in fields if self._numeric[name]]
+        return FCETable(fields, numeric, questions, scores)
+
+
+# @class FCETable
+# @brief Columnar FCE data with vectorized group-by statistics.
+#
+#        Usage:
+#            table = FCETable.from_fces(cmu_course_api.iter_fces(path))
+#            stats = table.group_stats('Instructor')
+#            stats.mean[stats.index('FINGER, S.')]
+class FCETable:
+
+    def __init__(self, fields, numeric, questions, scores):
+        _require_numpy()
+        self.fields = fields
+        self.numeric = numeric
+        self.questions = questions
+        self.scores = scores
+
+    def __len__(self):
+        return self.scores.shape[0]
+
+    # @function from_fces
+    # @brief Builds a table from an iterable of FCE entries.
+    # @param fces: Iterable of entries, as returned by iter_fces.
+    @classmethod
+    def from_fces(cls, fces):
+        builder = FCETableBuilder()
+        for entry in fces:
+            builder.append(entry)
+        return builder.build()
+
+    # @function codes
+    # @brief Returns the integer codes of a general column (-1 if missing).
+    def codes(self, field):
+        return self.fields[field][0]
+
+    # @function values
+    # @brief Returns the distinct values of a general column, indexed by code.
+    def values(self, field):
+        return self.fields[field][1]
+
+    # @function column
+    # @brief Returns a float array of a question or numeric general column,
+    #        with NaN for missing values.
+    def column(self, name):
+        if name in self.fields:
+            if name not in self.numeric:
+                raise ValueError('column %s is not numeric' % name)
+            (codes, values) = self.fields[name]
+            lookup = numpy.array(list(values) + [numpy.nan], dtype=float)
+            return lookup[codes]
+        return self.scores[:, self.questions.index(name)]
+
+    # @function group_stats
+    # @brief Computes per-group statistics of question scores.
+    # @param by: Name of a general column, or a tuple of names, to group by.
+    # @param columns: Names of questions or numeric general columns to
+    #        summarize; defaults to every question.
+    # @return: A GroupStats. Rows with a missing value in any `by` column are
+    #        left out.
+    def group_stats(self, by, columns=None):
+        if isinstance(by, str):
+            by = (by,)
+        if columns is None:
+            columns = list(self.questions)
+            data = self.scores
+        else:
+            data = numpy.column_stack([self.column(c) for c in columns]) \
+                if columns else numpy.empty((len(self), 0))
+
+        # combine the codes of every `by` column into one group code
+        codes = numpy.column_stack([self.codes(name) for name in by])
+        keep = (codes >= 0).all(axis=1)
+        (keys, groups) = numpy.unique(codes[keep], axis=0,
+                                      return_inverse=True)
+        groups = groups.reshape(-1)
+        data = data[keep]
+        ngroups = len(keys)
+
+        labels = [tuple(self.values(name)[code]
+                        for (name, code) in zip(by, key)) for key in keys]
+        if len(by) == 1:
+            labels = [label[0] for label in labels]
+
+        shape = (ngroups, len(columns))
+        count = numpy.zeros(shape)
+        mean = numpy.full(shape, numpy.nan)
+        std = numpy.full(shape, numpy.nan)
+        median = numpy.full(shape, numpy.nan)
+
+        for j in range(len(columns)):
+            values = data[:, j]
+            valid = ~numpy.isnan(values)
+            filled = numpy.where(valid, values, 0.0)
+
+            n = numpy.bincount(groups, weights=valid, minlength=ngroups)
+            total = numpy.bincount(groups, weights=filled, minlength=ngroups)
+            squares = numpy.bincount(groups, weights=filled * filled,
+                                     minlength=ngroups)
+            with numpy.errstate(invalid='ignore', divide='ignore'):
+                mu = total / n
+                variance = numpy.maximum(squares / n - mu * mu, 0.0)
+            count[:, j] = n
+            mean[:, j] = mu
+            std[:, j] = numpy.sqrt(variance)
+
+            # medians: sort valid scores by (group, value) and take the
+            # middle of each group's run
+            order = numpy.lexsort((values[valid], groups[valid]))
+            ordered = values[valid][order]
+            starts = numpy.concatenate(([0], numpy.cumsum(n)[:-1])) \
+                .astype(int)
+            sizes = n.astype(int)
+            present = sizes > 0
+            low = starts + (sizes - 1) // 2
+            high = starts + sizes // 2
+            median[present, j] = (ordered[low[present]] +
+                                  ordered[high[present]]) / 2
+
+        return GroupStats(by, labels, list(columns), count, mean, median,
+                          std)
+
+    # @function save
+    # @brief Writes the table to a compressed .npz file.
+    def save(self, path):
+        arrays = {'scores': self.scores}
+        meta = {'questions': self.questions, 'numeric': self.numeric,
+                'fields': []}
+        for (i, (name, (codes, values))) in enumerate(self.fields.items()):
+            arrays['codes_%d' % i] = codes
+            meta['fields'].append({'name': name, 'values': values})
+        arrays['meta'] = numpy.frombuffer(json.dumps(meta).encode(),
+                                          dtype=numpy.uint8)
+        with open(path, 'wb') as f:
+            numpy.savez_compressed(f, **arrays)
+
+    # @function load
+    # @brief Reads a table written by save.
+    @classmethod
+    def load(cls, path):
+        _require_numpy()
+        with numpy.load(path) as archive:
+            meta = json.loads(archive['meta'].tobytes().decode())
+            fields = {}
+            for (i, field) in enumerate(meta['fields']):
+                fields[field['name']] = (archive['codes_%d' % i],
+                                         field['values'])
+            return cls(fields, meta['numeric'], meta['questions'],
+                       archive['scores'])
+
+
+# @class GroupStats
+# @brief Per-group statistics computed by FCETable.group_stats.
+#
+#        count, mean, median and std (population standard deviation) are
+#        arrays with one row per group (in the order of `groups`) and one
+#        column per entry of `columns`.
+class GroupStats:
+
+    def __init__(self, by, groups, columns, count, mean, median, std):
+        self.by = by
+        self.groups = groups
+        self.columns = columns
+        self.count = count
+        self.mean = mean
+        self.median = median
+        self.std = std
+        self._index = {group: i for (i, group) in enumerate(groups)}
+
+    # @function index
+    # @brief Returns the row of a group's statistics.
+    def index(self, group):
+        return self._index[group]
+
+    # @function get
+    # @brief Returns {column: {stat: value}} for one group, with None for
+    #        statistics that have no data.
+    def get(self, group):
+        i = self._index[group]
+        result = {}
+        for (j, column) in enumerate(self.columns):
+            result[column] = {}
+            for stat in STATS:
+                value = float(getattr(self, stat)[i, j])
+                result[column][stat] = None if value != value else value
+        return result
+
+    # @function to_dict
+    # @brief Returns {group: {column: {stat: value}}} for every group.
+    def to_dict(self):
+        return {group: self.get(group) for group in self.groups}
@@ -0,0 +1,212 @@
+# @file fce_join.py
+# @brief Joins FCE results into the output of get_course_data.
+#
+#        FCEIndex reads FCE entries (as returned by iter_fces) once, and
+#        keeps running totals for each course and for each instructor of a
+#        course, per semester, in dictionaries keyed by normalized course ID
+#        and instructor. join_fces then looks every course and instructor up
+#        in them, instead of scanning the FCE rows for each course.
+#
+#        Summaries cover the most recent semesters a course or instructor
+#        has FCEs for:
+#
+#            {
+#                "semesters": ["Fall 2015", "Spring 2015"],  # newest first
+#                "sections": 3,      # FCE rows counted
+#                "responses": 142,   # sum of their Responses
+#                "questions": {      # means weighted by Responses
+#                    "9: Overall teaching": 4.31,
+#                    ...
+#                }
+#            }
+#
+#        Usage:
+#            index = FCEIndex(iter_fce_folder('fces'))
+#            join_fces(data, index)
+#            data['courses']['15-122']['fces']
+#            data['courses']['15-122']['lectures'][0]['instructor_fces']
+# @since 2026-10-17
+
+
+import re
+from cmu_course_api.parse_fces import question_order
+
+
+# Constants
+DEFAULT_RECENT = 4          # semesters a summary covers
+SEASONS = {'Spring': 0, 'Summer': 1, 'Fall': 2}
+NO_INSTRUCTOR = ('', 'Instructor TBA')
+
+
+# @function normalize_course_id
+# @brief Converts a course ID of either output to the form '15-122'.
+# @param value: Course ID, e.g. '15-122', '15122' or 15122.
+# @return: The normalized ID, or None if it isn't a course number.
+def normalize_course_id(value):
+    if value is None:
+        return None
+    digits = re.sub(r'[\s-]', '', str(value))
+    if not digits.isdigit() or len(digits) > 5:
+        return None
+    digits = digits.zfill(5)
+    return digits[:2] + '-' + digits[2:]
+
+
+# @function normalize_instructor
+# @brief Converts an instructor's name to a key shared by both outputs: last
+#        name and first initial, upper case.
+#
+#        FCEs name instructors like 'KOSBIE, D.', and course details pages
+#        like 'Kosbie, David'; both become 'KOSBIE, D'.
+# @return: The key, or None for a missing instructor.
+def normalize_instructor(name):
+    if name is None or name.strip() in NO_INSTRUCTOR:
+        return None
+    (last, _, first) = name.partition(',')
+    last = ' '.join(last.split()).upper()
+    first = first.strip()[:1].upper()
+    return '%s, %s' % (last, first) if first else last
+
+
+# @function term_order
+# @brief Sort key of a (semester, year) pair, oldest first.
+def term_order(term):
+    (semester, year) = term
+    return (year if isinstance(year, int) else -1,
+            SEASONS.get(str(semester).split(' ')[0], -1))
+
+
+# @class FCEIndex
+# @brief FCE summaries by course and by instructor of a course.
+class FCEIndex:
+
+    # @param fces: Iterable of FCE entries, as returned by iter_fces; it is
+    #        only iterated once.
+    # @param recent: Number of most recent semesters to summarize.
+    def __init__(self, fces=(), recent=DEFAULT_RECENT):
+        self.recent = recent
+        self.rows = 0
+        self._courses = {}          # course ID -> {term: totals}
+        self._instructors = {}      # (course ID, instructor) -> {term: totals}
+        self._summaries = {}        # key of either -> summary
+        for entry in fces:
+            self.add(entry)
+
+    # @function add
+    # @brief Adds an FCE entry, as returned by iter_fces.
+    def add(self, entry):
+        course = normalize_course_id(entry.get('Course ID'))
+        if course is None:
+            return
+        self.rows += 1
+        self._summaries.clear()
+
+        term = (entry.get('Semester'), entry.get('Year'))
+        responses = entry.get('Responses')
+        if isinstance(responses, bool) or not isinstance(responses, int):
+            responses = 0
+        scores = [(name, value * responses) for (name, value)
+                  in (entry.get('Questions') or {}).items()
+                  if value is not None and name[:1].isdigit()] \
+            if responses else []
+
+        keys = [(self._courses, course)]
+        instructor = normalize_instructor(entry.get('Instructor'))
+        if instructor is not None:
+            keys.append((self._instructors, (course, instructor)))
+
+        for (table, key) in keys:
+            terms = table.setdefault(key, {})
+            totals = terms.get(term)
+            if totals is None:
+                # [rows, responses, {question: [weighted sum, weight]}]
+                totals = terms[term] = [0, 0, {}]
+            totals[0] += 1
+            totals[1] += responses
+            for (name, weighted) in scores:
+                sums = totals[2].setdefault(name, [0.0, 0])
+                sums[0] += weighted
+                sums[1] += responses
+
+    # @function course
+    # @brief Returns the summary of a course's FCEs, or None if it has none.
+    # @param number: Course number, e.g. '15-122'.
+    def course(self, number):
+        return self._summary(self._courses, normalize_course_id(number))
+
+    # @function instructor
+    # @brief Returns the summary of an instructor's FCEs for a course, or None
+    #        if there are none.
+    # @param number: Course number, e.g. '15-122'.
+    # @param name: Instructor, e.g. 'Kosbie, David'.
+    def instructor(self, number, name):
+        return self._summary(self._instructors,
+                             (normalize_course_id(number),
+                              normalize_instructor(name)))
+
+    def _summary(self, table, key):
+        if key in self._summaries:
+            return self._summaries[key]
+        terms = table.get(key)
+        summary = None if terms is None else self._summarize(terms)
+        self._summaries[key] = summary
+        return summary
+
+    def _summarize(self, terms):
+        recent = sorted(terms, key=term_order, reverse=True)[:self.recent]
+        (rows, responses, sums) = (0, 0, {})
+        for term in recent:
+            totals = terms[term]
+            rows += totals[0]
+            responses += totals[1]
+            for (name, (total, weight)) in totals[2].items():
+                question = sums.setdefault(name, [0.0, 0])
+                question[0] += total
+                question[1] += weight
+
+        return {
+            'semesters': [' '.join(str(part) for part in term
+                                   if part is not None)
+                          for term in recent],
+            'sections': rows,
+            'responses': responses,
+            'questions': {name: round(sums[name][0] / sums[name][1], 2)
+                          for name in sorted(sums, key=question_order)}
+        }
+
+
+# @function strip_fces
+# @brief Returns a course of the output without the fields join_fces adds.
+#        The course itself is left as it is.
+def strip_fces(course):
+    course = {key: value for (key, value) in course.items() if key != 'fces'}
+    for key in ('lectures', 'sections'):
+        if course.get(key):
+            course[key] = [{name: value for (name, value) in meeting.items()
+                            if name != 'instructor_fces'}
+                           for meeting in course[key]]
+    return course
+
+
+# @function join_fces
+# @brief Attaches FCE summaries to the output of get_course_data, in place.
+#
+#        Every course gets an 'fces' key with the course's summary, and every
+#        lecture and section an 'instructor_fces' key mapping each of its
+#        instructors to their summary for the course. Courses and instructors
+#        without FCEs get None and are left out, respectively.
+# @param data: Output of get_course_data.
+# @param index: FCEIndex of the FCEs to join.
+# @return: data.
+def join_fces(data, index):
+    for (number, course) in data['courses'].items():
+        course['fces'] = index.course(number)
+        for key in ('lectures', 'sections'):
+            for meeting in course.get(key) or []:
+                summaries = {}
+                for name in meeting.get('instructors') or []:
+                    summary = index.instructor(number, name)
+                    if summary is not None:
+                        summaries[name] = summary
+                meeting['instructor_fces'] = summaries
+    return data
@@ -0,0 +1,281 @@
+# @file fce_store.py
+# @brief Persistent store of parsed FCE data, updated incrementally from a
+#        folder of FCE CSVs.
+#
+#        Past semesters' exports never change, so a store keeps the parsed
+#        rows of every CSV it has seen, and a manifest of the files they came
+#        from:
+#
+#            DIR/manifest.json
+#                {"version": 1, "files": {
+#                    "2015_fall.csv": {"size": 123456,
+#                                      "mtime": 1471234567000000000,
+#                                      "sha256": "9f86d0...", "rows": 6250},
+#                    ...},
+#                 "outputs": {"/abs/fces.pack": {"format": "pack",
+#                                                "digest": "2c26b4...",
+#                                                "size": ..., "mtime": ...}}}
+#            DIR/segments/9f86d0....json
+#                the file's entries, as dump_fces writes them
+#
+#        update() only parses files that are new, or whose size or mtime
+#        changed and whose contents no longer match their hash, and drops
+#        the segments of files that were deleted. Segments of other files are
+#        left as they are. The manifest is replaced atomically once every new
+#        segment has been written, so an interrupted update leaves the store
+#        as it was.
+#
+#        Since segments hold entries as dump_fces writes them, dump() writes
+#        the JSON of the whole store by concatenating them, without parsing
+#        them again; iter_fces() loads them for the other formats. Outputs
+#        written from the store can be recorded with mark_written(), after
+#        which is_current() tells whether they still hold the store's data,
+#        so that nothing needs to be written when no file changed.
+#
+#        Usage:
+#            store = FCEStore('fce-store')
+#            changes = store.update('fces', workers=4)
+#            with open('fces.json', 'w') as outfile:
+#                store.dump(outfile)
+# @since 2026-10-17
+
+
+import hashlib
+import io
+import json
+import os
+from collections import deque
+from itertools import islice
+from cmu_course_api.formats import replacing
+from cmu_course_api.parse_fces import dump_fces, iter_fces, list_fce_files
+
+
+# Constants
+STORE_VERSION = 1
+MANIFEST = 'manifest.json'
+SEGMENTS = 'segments'
+HASH_CHUNK = 1024 * 1024
+
+
+# @function file_hash
+# @brief Returns the SHA-256 hex digest of a file's contents.
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# @function parse_segment
+# @brief Parses a CSV into the text of its segment.
+# @return: (text, rows)
+def parse_segment(path):
+    text = io.StringIO()
+    rows = dump_fces(iter_fces(path), text)
+    return (text.getvalue(), rows)
+
+
+# @class FCEStore
+# @brief A directory of parsed FCE CSVs and their manifest.
+class FCEStore:
+
+    # @param directory: Directory of the store; created if it doesn't exist.
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = {}
+        self.outputs = {}
+        os.makedirs(os.path.join(directory, SEGMENTS), exist_ok=True)
+        self._read()
+
+    def __len__(self):
+        return sum(info['rows'] for info in self.files.values())
+
+    # @function update
+    # @brief Brings the store up to date with a folder of FCE CSVs.
+    # @param folder: Folder containing FCE CSV files at its top level.
+    # @param workers: Number of processes to parse files in.
+    # @param progress: Optional function called as progress(path, files_done,
+    #        files_total, rows_done) before each file is parsed.
+    # @return: Dictionary with the names of the files that were 'added',
+    #        'changed' and 'removed', and the number 'unchanged'.
+    def update(self, folder, workers=1, progress=None):
+        changes = {'added': [], 'changed': [], 'removed': [], 'unchanged': 0}
+        files = {}
+        parse = []
+        dirty = False
+
+        for path in list_fce_files(folder):
+            name = os.path.basename(path)
+            stat = os.stat(path)
+            info = {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+            old = self.files.get(name)
+            if old is not None and \
+                    os.path.exists(self._segment(old['sha256'])):
+                if old['size'] == info['size'] and \
+                        old['mtime'] == info['mtime']:
+                    files[name] = old
+                    changes['unchanged'] += 1
+                    continue
+                info['sha256'] = file_hash(path)
+                if info['sha256'] == old['sha256']:
+                    # touched, but not changed
+                    files[name] = dict(old, mtime=info['mtime'])
+                    changes['unchanged'] += 1
+                    dirty = True
+                    continue
+            else:
+                info['sha256'] = file_hash(path)
+            changes['added' if old is None else 'changed'].append(name)
+            files[name] = info
+            parse.append(path)
+
+        changes['removed'] = sorted(set(self.files) - set(files))
+        if not parse and not changes['removed'] and not dirty:
+            return changes
+
+        for (path, text, count) in self._parse(parse, workers, progress):
+            info = files[os.path.basename(path)]
+            with replacing(self._segment(info['sha256'])) as tmp:
+                with open(tmp, 'w') as f:
+                    f.write(text)
+            info['rows'] = count
+
+        self.files = dict(sorted(files.items()))
+        self._write()
+        self._sweep()
+        return changes
+
+    # @function digest
+    # @brief Returns a hash of the store's contents: its files' names and
+    #        hashes, in order.
+    def digest(self):
+        digest = hashlib.sha256()
+        for (name, info) in self.files.items():
+            digest.update(('%s\0%s\0' % (name, info['sha256'])).encode())
+        return digest.hexdigest()
+
+    # @function is_current
+    # @brief Tells whether an output recorded with mark_written still holds
+    #        the store's data in the given format, and hasn't been modified
+    #        since.
+    def is_current(self, path, format):
+        output = self.outputs.get(os.path.abspath(path))
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        return output == {'format': format, 'digest': self.digest(),
+                          'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+    # @function mark_written
+    # @brief Records that an output was just written from the store in the
+    #        given format.
+    def mark_written(self, path, format):
+        stat = os.stat(path)
+        self.outputs[os.path.abspath(path)] = {
+            'format': format, 'digest': self.digest(),
+            'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+        self._write()
+
+    # @function iter_fces
+    # @brief Returns a generator of every entry in the store, sorted by file
+    #        name and then by row, like iter_fce_folder.
+    def iter_fces(self):
+        for info in self.files.values():
+            yield from json.loads(self._read_segment(info))
+
+    # @function dump
+    # @brief Writes every entry in the store to a file as a JSON list, the
+    #        same as dump_fces(self.iter_fces(), outfile), one segment at a
+    #        time.
+    # @return: The number of entries written.
+    def dump(self, outfile):
+        count = 0
+        outfile.write('[')
+        for info in self.files.values():
+            if not info['rows']:
+                continue
+            if count:
+                outfile.write(', ')
+            outfile.write(self._read_segment(info)[1:-1])
+            count += info['rows']
+        outfile.write(']')
+        return count
+
+    # @function _parse
+    # @brief Parses files into segments, in a pool of processes if there is
+    #        more than one worker and file, like iter_fce_folder. At most
+    #        `workers` segments are held at once, besides the one yielded.
+    # @return: Generator of (path, text, rows), in the order of paths.
+    def _parse(self, paths, workers, progress):
+        rows = 0
+        if workers <= 1 or len(paths) <= 1:
+            for (i, path) in enumerate(paths):
+                if progress:
+                    progress(path, i, len(paths), rows)
+                (text, count) = parse_segment(path)
+                rows += count
+                yield (path, text, count)
+            return
+
+        # imported here, since it takes longer to import than the rest of the
+        # store put together
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(min(workers, len(paths))) as pool:
+            pending = deque()
+            remaining = iter(paths)
+            for path in islice(remaining, workers):
+                pending.append((path, pool.submit(parse_segment, path)))
+
+            done = 0
+            while pending:
+                (path, future) = pending.popleft()
+                for next_path in islice(remaining, 1):
+                    pending.append((next_path,
+                                    pool.submit(parse_segment, next_path)))
+                if progress:
+                    progress(path, done, len(paths), rows)
+                (text, count) = future.result()
+                rows += count
+                done += 1
+                yield (path, text, count)
+
+    def _segment(self, sha256):
+        return os.path.join(self.directory, SEGMENTS, sha256 + '.json')
+
+    def _read_segment(self, info):
+        with open(self._segment(info['sha256'])) as f:
+            return f.read()
+
+    # @function _read
+    # @brief Loads the manifest. A missing or unreadable manifest, or one of
+    #        another version, leaves the store empty.
+    def _read(self):
+        try:
+            with open(os.path.join(self.directory, MANIFEST)) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if isinstance(manifest, dict) and \
+                manifest.get('version') == STORE_VERSION:
+            self.files = manifest.get('files') or {}
+            self.outputs = manifest.get('outputs') or {}
+
+    # @function _write
+    # @brief Replaces the manifest.
+    def _write(self):
+        with replacing(os.path.join(self.directory, MANIFEST)) as tmp:
+            with open(tmp, 'w') as f:
+                json.dump({'version': STORE_VERSION, 'files': self.files,
+                           'outputs': self.outputs}, f)
+
+    # @function _sweep
+    # @brief Removes segments the manifest doesn't refer to: those of deleted
+    #        and changed files, and any left by an interrupted update.
+    def _sweep(self):
+        used = {info['sha256'] + '.json' for info in self.files.values()}
+        folder = os.path.join(self.directory, SEGMENTS)
+        for name in os.listdir(folder):
+            if name not in used:
+                os.remove(os.path.join(folder, name))
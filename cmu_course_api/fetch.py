@@ -0,0 +1,456 @@
+# @file fetch.py
+# @brief Asyncio-based HTTP fetch engine used to download schedule and
+#        course detail pages.
+#
+#        Each host gets a bounded pool of persistent HTTP/1.1 connections, so
+#        the thousands of courseDetails requests made during a run share a
+#        handful of TCP/TLS sessions instead of paying a handshake apiece.
+#        Only the small subset of HTTP that CMU's servers actually use is
+#        implemented: GET requests, Content-Length or chunked bodies, gzip
+#        content encoding and redirects.
+#
+#        If the Fetcher is given an HTTPCache, pages are revalidated against
+#        the cache instead of downloaded again. Requests, retries and failures
+#        are reported to the Fetcher's Observer (see metrics.py).
+#
+#        Responses with status 429 or 5xx, timeouts and connection errors are
+#        retried after a jittered exponential backoff, and are taken as signs
+#        that the server is overloaded: the number of requests in flight is
+#        adjusted AIMD-style, halved on congestion and grown by one per
+#        window of successful requests, up to max_concurrency.
+# @since 2026-10-17
+
+
+import asyncio
+import gzip
+import random
+import ssl
+import time
+import urllib.parse
+import zlib
+from cmu_course_api.cache import HTTPCache
+from cmu_course_api.metrics import ProgressPrinter
+
+
+# Constants
+DEFAULT_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 30
+MAX_REDIRECTS = 5
+USER_AGENT = 'cmu-course-api (+https://github.com/ScottyLabs/course-api)'
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+RETRY_CODES = (429, 500, 502, 503, 504)
+DEFAULT_RETRIES = 4
+BACKOFF_BASE = 0.5          # seconds; the n-th retry waits up to base * 2^n
+BACKOFF_MAX = 30
+DECREASE_FACTOR = 0.5
+
+
+# @class FetchError
+# @brief Raised when a page cannot be retrieved.
+class FetchError(Exception):
+
+    def __init__(self, url, message, status=None, retryable=False):
+        super().__init__('%s: %s' % (url, message))
+        self.url = url
+        self.reason = message
+        self.status = status
+        self.retryable = retryable
+
+
+# @class Response
+# @brief A completed HTTP response. size is the number of bytes of body that
+#        were received, before decompression.
+class Response:
+
+    def __init__(self, url, status, headers, body, not_modified=False,
+                 size=None):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.not_modified = not_modified
+        self.size = len(body) if size is None else size
+
+
+# @class _Connection
+# @brief A single keep-alive connection to a host.
+class _Connection:
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+
+# @class ConnectionPool
+# @brief Bounded pool of idle keep-alive connections, keyed by
+#        (scheme, host, port).
+class ConnectionPool:
+
+    def __init__(self, max_per_host=DEFAULT_CONCURRENCY,
+                 timeout=DEFAULT_TIMEOUT):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._idle = {}
+        self._ssl = ssl.create_default_context()
+
+    # @function acquire
+    # @brief Returns (connection, reused) for the given origin, reusing an
+    #        idle connection when one is available.
+    async def acquire(self, key):
+        idle = self._idle.get(key)
+        while idle:
+            conn = idle.pop()
+            if not conn.reader.at_eof():
+                return (conn, True)
+            conn.close()
+
+        (scheme, host, port) = key
+        context = self._ssl if scheme == 'https' else None
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=context),
+            self.timeout)
+        return (_Connection(reader, writer), False)
+
+    # @function release
+    # @brief Returns a connection to the pool, closing it if the pool for its
+    #        origin is already full.
+    def release(self, key, conn):
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.max_per_host:
+            idle.append(conn)
+        else:
+            conn.close()
+
+    # @function close
+    # @brief Closes every idle connection.
+    async def close(self):
+        for idle in self._idle.values():
+            for conn in idle:
+                conn.close()
+                try:
+                    await conn.writer.wait_closed()
+                except (OSError, ssl.SSLError):
+                    pass
+        self._idle = {}
+
+
+# @class AdaptiveLimit
+# @brief Limits the number of requests in flight, adjusting the limit with
+#        additive increase and multiplicative decrease.
+#
+#        Every successful request raises the limit by 1 / limit, so it grows
+#        by one per window of `limit` requests, up to maximum. Congestion
+#        multiplies it by DECREASE_FACTOR, at most once per window: requests
+#        that were already in flight when the limit was cut don't cut it
+#        again.
+class AdaptiveLimit:
+
+    def __init__(self, initial, maximum=None, minimum=1):
+        self.maximum = max(initial, maximum or initial)
+        self.minimum = minimum
+        self.limit = float(initial)
+        self.in_flight = 0
+        self._decreased = 0
+        self._started = 0
+        self._condition = asyncio.Condition()
+
+    # @function acquire
+    # @brief Waits for a free slot.
+    # @return: A ticket to pass to release.
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            self._started += 1
+            return self._started
+
+    # @function release
+    # @brief Frees a slot and adjusts the limit.
+    # @param ticket: Returned by acquire.
+    # @param congested: Whether the request was a sign of congestion.
+    async def release(self, ticket, congested=False):
+        async with self._condition:
+            self.in_flight -= 1
+            if congested:
+                if ticket > self._decreased:
+                    self.limit = max(self.minimum,
+                                     self.limit * DECREASE_FACTOR)
+                    self._decreased = self._started
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+# @function backoff
+# @brief Returns how long to wait before a retry, with full jitter: a random
+#        time up to BACKOFF_BASE * 2^attempt, capped at BACKOFF_MAX.
+# @param attempt: Number of retries so far.
+def backoff(attempt):
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+# @function retry_after
+# @brief Parses a Retry-After header given in seconds.
+# @return: Seconds to wait, or None.
+def retry_after(headers):
+    value = headers.get('retry-after', '')
+    return min(float(value), BACKOFF_MAX) if value.isdigit() else None
+
+
+# @class Fetcher
+# @brief Issues GET requests over connections from a shared ConnectionPool,
+#        retrying failed ones. At most `concurrency` requests are in flight
+#        at first; the limit falls when the server is overloaded and grows
+#        back while it keeps up, up to max_concurrency (by default
+#        concurrency).
+#
+#        Usage:
+#            async with Fetcher(concurrency=16) as fetcher:
+#                body = await fetcher.get(url)
+#
+#        The observer also receives the progress of anything using the
+#        Fetcher, such as aggregate_async; it defaults to a ProgressPrinter.
+class Fetcher:
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY,
+                 timeout=DEFAULT_TIMEOUT, cache=None, observer=None,
+                 max_concurrency=None, retries=DEFAULT_RETRIES):
+        self.concurrency = concurrency
+        self.max_concurrency = max(concurrency, max_concurrency or 0)
+        self.timeout = timeout
+        self.cache = cache
+        self.retries = retries
+        self.observer = observer if observer is not None else \
+            ProgressPrinter()
+        self.pool = ConnectionPool(self.max_concurrency, timeout)
+        self.limit = AdaptiveLimit(concurrency, self.max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self.pool.close()
+
+    # @function get
+    # @brief Downloads a page.
+    # @param url: URL of the page to get.
+    # @return: The body of the page as bytes.
+    async def get(self, url):
+        return (await self.fetch(url)).body
+
+    # @function fetch
+    # @brief Downloads a page, revalidating it against the cache if there is
+    #        one.
+    # @param url: URL of the page to get.
+    # @return: A Response with status 200. Its not_modified attribute is True
+    #        if the body came from the cache after a 304.
+    async def fetch(self, url):
+        try:
+            return await self._fetch(url)
+        except FetchError as e:
+            self.observer.failure(url, e.reason)
+            raise
+
+    async def _fetch(self, url):
+        cache = self.cache
+        entry = cache.lookup(url) if cache is not None else None
+        response = await self.request(url,
+                                      HTTPCache.conditional_headers(entry))
+
+        if response.status == 304 and entry is not None:
+            body = cache.load(url)
+            if body is not None:
+                cache.refresh(url, response.headers)
+                response.status = 200
+                response.body = body
+                response.not_modified = True
+                return response
+            # the entry vanished since lookup, so ask for the whole page
+            response = await self.request(url)
+
+        if response.status != 200:
+            raise FetchError(url, 'HTTP %d' % response.status,
+                             response.status)
+        if cache is not None:
+            cache.store(url, response.body, response.headers)
+        return response
+
+    # @function request
+    # @brief Performs a GET request, following redirects, and retrying
+    #        after a backoff on 429 and 5xx responses, timeouts and
+    #        connection errors.
+    # @param url: URL to request.
+    # @param headers: Optional dict of extra request headers.
+    # @return: A Response. If every attempt got a 429 or 5xx response, the
+    #        last one is returned.
+    # @raise FetchError: If the last attempt timed out or failed to connect.
+    async def request(self, url, headers=None):
+        attempt = 0
+        while True:
+            ticket = await self.limit.acquire()
+            (response, error) = (None, None)
+            try:
+                response = await self._request_redirects(url, headers or {})
+            except FetchError as e:
+                if not e.retryable:
+                    await self.limit.release(ticket)
+                    raise
+                error = e
+            except BaseException:
+                await self.limit.release(ticket)
+                raise
+
+            congested = error is not None or response.status in RETRY_CODES
+            await self.limit.release(ticket, congested)
+            self.observer.concurrency(self.limit.limit)
+            if not congested:
+                return response
+            if attempt >= self.retries:
+                if error is not None:
+                    raise error
+                return response
+
+            reason = error.reason if error is not None else \
+                'HTTP %d' % response.status
+            self.observer.retry(url, reason)
+            delay = backoff(attempt)
+            if response is not None:
+                delay = max(delay, retry_after(response.headers) or 0)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _request_redirects(self, url, headers):
+        for _ in range(MAX_REDIRECTS + 1):
+            response = await self._request_once(url, headers)
+            location = response.headers.get('location')
+            if response.status not in REDIRECT_CODES or not location:
+                return response
+            url = urllib.parse.urljoin(url, location)
+        raise FetchError(url, 'too many redirects')
+
+    async def _request_once(self, url, headers):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise FetchError(url, 'unsupported URL')
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        key = (parts.scheme, parts.hostname, port)
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+
+        lines = ['GET %s HTTP/1.1' % target,
+                 'Host: %s' % parts.netloc,
+                 'User-Agent: %s' % USER_AGENT,
+                 'Accept-Encoding: gzip',
+                 'Connection: keep-alive']
+        lines += ['%s: %s' % item for item in headers.items()]
+        request = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+        # A reused connection may have been closed by the server while it sat
+        # idle, so a failure on one is retried once on a fresh connection.
+        while True:
+            start = time.perf_counter()
+            try:
+                conn, reused = await self.pool.acquire(key)
+            except (OSError, ssl.SSLError) as e:
+                raise FetchError(url, str(e) or type(e).__name__,
+                                 retryable=True)
+            except asyncio.TimeoutError:
+                raise FetchError(url, 'timed out connecting', retryable=True)
+            try:
+                response, keep_alive = await asyncio.wait_for(
+                    self._exchange(conn, request), self.timeout)
+            except (EOFError, zlib.error, gzip.BadGzipFile) as e:
+                # a truncated or corrupt compressed body
+                conn.close()
+                raise FetchError(url, 'bad compressed body: %s' % (
+                    str(e) or type(e).__name__), retryable=True)
+            except (OSError, asyncio.IncompleteReadError, ValueError,
+                    ssl.SSLError) as e:
+                conn.close()
+                if reused:
+                    self.observer.retry(url, 'stale connection')
+                    continue
+                raise FetchError(url, str(e) or type(e).__name__,
+                                 retryable=True)
+            except asyncio.TimeoutError:
+                conn.close()
+                raise FetchError(url, 'timed out', retryable=True)
+            except BaseException:
+                conn.close()
+                raise
+
+            if keep_alive:
+                self.pool.release(key, conn)
+            else:
+                conn.close()
+            response.url = url
+            self.observer.request(url, response.status,
+                                  time.perf_counter() - start, response.size)
+            return response
+
+    async def _exchange(self, conn, request):
+        conn.writer.write(request)
+        await conn.writer.drain()
+        reader = conn.reader
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b'', None)
+        (version, status) = status_line.decode('latin-1').split(None, 2)[:2]
+        status = int(status)
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n'):
+                break
+            if not line:
+                raise asyncio.IncompleteReadError(b'', None)
+            (name, _, value) = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = (version == 'HTTP/1.1' and connection != 'close') or \
+            connection == 'keep-alive'
+
+        if status in (204, 304) or 100 <= status < 200:
+            body = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = await self._read_chunked(reader)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            body = await reader.read()
+            keep_alive = False
+
+        size = len(body)
+        encoding = headers.get('content-encoding', '').lower()
+        if encoding == 'gzip':
+            body = gzip.decompress(body)
+        elif encoding == 'deflate':
+            body = zlib.decompress(body)
+
+        return (Response(None, status, headers, body, size=size), keep_alive)
+
+    async def _read_chunked(self, reader):
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b';', 1)[0].strip(), 16)
+            if size == 0:
+                # skip any trailers
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                return b''.join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
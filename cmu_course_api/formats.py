@@ -0,0 +1,326 @@
+# @file formats.py
+# @brief Output formats besides plain JSON: gzipped JSON, and an indexed
+#        binary container ("pack") whose records can be read one at a time.
+#
+#        A pack file is laid out as:
+#
+#            MAGIC
+#            record 0, record 1, ...     each a zlib-compressed JSON value
+#            index header                JSON: kind, meta, keys, ...
+#            offset table                count + 1 little-endian uint64s
+#            footer                      FOOTER struct, then MAGIC
+#
+#        The index is written after the records, so a pack can be written in
+#        one pass without knowing the number of records up front. Course packs
+#        have one record per course, keyed by course number; FCE packs have one
+#        record per block of BLOCK_SIZE rows. Loaders mmap the file, read the
+#        index, and only decompress the records that are asked for.
+# @since 2026-10-17
+
+
+import contextlib
+import gzip
+import json
+import mmap
+import os
+import struct
+import zlib
+from cmu_course_api.checkpoint import remove_journal
+
+
+# Constants
+MAGIC = b'CMUPACK\x01'
+FOOTER = struct.Struct('<QQQ')      # index offset, header length, count
+OFFSET = struct.Struct('<Q')
+BLOCK_SIZE = 1024                   # FCE rows per record
+FORMATS = ('json', 'json.gz', 'pack')
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+# @function guess_format
+# @brief Guesses an output format from a file name: 'json.gz' for *.gz,
+#        'pack' for *.pack, and 'json' otherwise.
+def guess_format(path):
+    if path.endswith('.gz'):
+        return 'json.gz'
+    if path.endswith('.pack'):
+        return 'pack'
+    return 'json'
+
+
+# @function open_text
+# @brief Opens a JSON file for writing, gzipped if format is 'json.gz'.
+#        Everything written is compressed as it is written.
+def open_text(path, format='json'):
+    if format == 'json.gz':
+        return gzip.open(path, 'wt', encoding='utf-8')
+    return open(path, 'w')
+
+
+# @function detect_format
+# @brief Detects the format of an existing file from its first bytes.
+def detect_format(path):
+    with open(path, 'rb') as f:
+        start = f.read(len(MAGIC))
+    if start == MAGIC:
+        return 'pack'
+    if start[:2] == GZIP_MAGIC:
+        return 'json.gz'
+    return 'json'
+
+
+# @function replacing
+# @brief Context manager yielding a temporary path to write a file to, which
+#        is renamed over path if the body finishes, so that readers of path
+#        (and cmu-course-api serve) only ever see a complete file.
+@contextlib.contextmanager
+def replacing(path):
+    tmp = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# @function write_course_data
+# @brief Writes an object returned by get_course_data in a given format,
+#        replacing path atomically.
+# @param checkpoint: Optional journal the data was checkpointed in, which is
+#        removed once the data has been written.
+def write_course_data(data, path, format='json', checkpoint=None):
+    with replacing(path) as tmp:
+        if format == 'pack':
+            write_course_pack(data, tmp)
+        else:
+            with open_text(tmp, format) as outfile:
+                json.dump(data, outfile)
+    if checkpoint is not None:
+        remove_journal(checkpoint)
+
+
+# @function load_course_data
+# @brief Reads a file written by write_course_data (or by json.dump), in any
+#        format, back into the object get_course_data returns.
+def load_course_data(path):
+    format = detect_format(path)
+    if format == 'pack':
+        with CoursePack(path) as pack:
+            return pack.load()
+    opener = gzip.open if format == 'json.gz' else open
+    with opener(path, 'rt', encoding='utf-8') as infile:
+        return json.load(infile)
+
+
+# @class PackWriter
+# @brief Writes records to a pack file one at a time.
+#
+#        Usage:
+#            with PackWriter(path, 'courses') as writer:
+#                writer.add(record)
+#                writer.meta['semester'] = ...
+class PackWriter:
+
+    def __init__(self, path, kind, level=6):
+        self.path = path
+        self.kind = kind
+        self.level = level
+        self.meta = {}
+        self.keys = []
+        self.offsets = []
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+    # @function add
+    # @brief Appends a record.
+    # @param value: Any JSON-serializable value.
+    # @param key: Key to find the record by, for keyed packs.
+    def add(self, value, key=None):
+        self.offsets.append(self._file.tell())
+        if key is not None:
+            self.keys.append(key)
+        raw = json.dumps(value).encode()
+        self._file.write(zlib.compress(raw, self.level))
+
+    # @function close
+    # @brief Writes the index and footer, and closes the file.
+    def close(self):
+        f = self._file
+        self.offsets.append(f.tell())
+        header = json.dumps({'kind': self.kind, 'meta': self.meta,
+                             'keys': self.keys}).encode()
+        index = f.tell()
+        f.write(header)
+        for offset in self.offsets:
+            f.write(OFFSET.pack(offset))
+        f.write(FOOTER.pack(index, len(header), len(self.offsets) - 1))
+        f.write(MAGIC)
+        f.close()
+
+
+# @function write_course_pack
+# @brief Writes an object returned by get_course_data to a pack file, one
+#        record per course.
+def write_course_pack(data, path):
+    with PackWriter(path, 'courses') as writer:
+        writer.meta = {key: value for (key, value) in data.items()
+                       if key != 'courses'}
+        for (number, course) in data['courses'].items():
+            writer.add(course, number)
+
+
+# @function write_fce_pack
+# @brief Writes FCE entries to a pack file, in blocks of block_size rows.
+#        Only one block is held in memory at once.
+# @param fces: Iterable of FCE entries, such as returned by iter_fces.
+# @return: The number of entries written.
+def write_fce_pack(fces, path, block_size=BLOCK_SIZE):
+    count = 0
+    with PackWriter(path, 'fces') as writer:
+        block = []
+        for entry in fces:
+            block.append(entry)
+            if len(block) == block_size:
+                writer.add(block)
+                block = []
+            count += 1
+        if block:
+            writer.add(block)
+        writer.meta = {'rows': count, 'block_size': block_size}
+    return count
+
+
+# @class PackFile
+# @brief A memory-mapped pack file. Opening one reads only its index.
+class PackFile:
+
+    kind = None
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        tail = len(self._map) - len(MAGIC)
+        if self._map[:len(MAGIC)] != MAGIC or self._map[tail:] != MAGIC:
+            self._map.close()
+            raise ValueError('%s is not a pack file' % path)
+        (index, length, self.count) = FOOTER.unpack_from(
+            self._map, tail - FOOTER.size)
+        header = json.loads(self._map[index:index + length])
+        if self.kind is not None and header['kind'] != self.kind:
+            self._map.close()
+            raise ValueError('%s holds %s, not %s' % (path, header['kind'],
+                                                      self.kind))
+        self.meta = header['meta']
+        self.keys = header['keys']
+        self._table = index + length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self._map.close()
+
+    # @function record
+    # @brief Decompresses and decodes the i-th record.
+    def record(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError('record %d out of range' % i)
+        position = self._table + i * OFFSET.size
+        (start,) = OFFSET.unpack_from(self._map, position)
+        (end,) = OFFSET.unpack_from(self._map, position + OFFSET.size)
+        return json.loads(zlib.decompress(self._map[start:end]))
+
+
+# @class CoursePack
+# @brief Lazily loaded course pack, usable as a read-only mapping from course
+#        number to course.
+#
+#        Usage:
+#            with CoursePack('f16.pack') as pack:
+#                course = pack['15-122']
+class CoursePack(PackFile):
+
+    kind = 'courses'
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._ids = {key: i for (i, key) in enumerate(self.keys)}
+
+    def __getitem__(self, number):
+        return self.record(self._ids[number])
+
+    def __contains__(self, number):
+        return number in self._ids
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def get(self, number, default=None):
+        i = self._ids.get(number)
+        return default if i is None else self.record(i)
+
+    def items(self):
+        for (i, number) in enumerate(self.keys):
+            yield (number, self.record(i))
+
+    # @function load
+    # @brief Decodes every course, returning the object get_course_data
+    #        returned.
+    def load(self):
+        return dict(self.meta, courses=dict(self.items()))
+
+
+# @class FCEPack
+# @brief Lazily loaded FCE pack, usable as a read-only sequence of entries.
+#        The most recently used block of rows is kept decoded.
+class FCEPack(PackFile):
+
+    kind = 'fces'
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.rows = self.meta['rows']
+        self.block_size = self.meta['block_size']
+        self._block = (None, None)
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.rows))]
+        if i < 0:
+            i += self.rows
+        if not 0 <= i < self.rows:
+            raise IndexError('row %d out of range' % i)
+        (k, offset) = divmod(i, self.block_size)
+        return self.block(k)[offset]
+
+    def __iter__(self):
+        for k in range(self.count):
+            yield from self.record(k)
+
+    # @function block
+    # @brief Returns the k-th block of rows.
+    def block(self, k):
+        if self._block[0] != k:
+            self._block = (k, self.record(k))
+        return self._block[1]
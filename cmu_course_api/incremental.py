@@ -0,0 +1,291 @@
+# @file incremental.py
+# @brief Incremental re-scrapes that reuse the output of a previous run.
+#
+#        The Schedule Of Classes is a single page, while course descriptions
+#        take one request per course. An incremental run downloads the
+#        schedule, compares every course against the previous output, and
+#        only downloads descriptions for courses that are new, whose schedule
+#        row changed, or whose description is older than a TTL. Everything
+#        else is carried over from the previous run, without the FCE
+#        summaries join_fces may have added to it.
+#
+#        Carried over descriptions keep the date they were downloaded on in
+#        the output's 'fetched' object, so that their age keeps growing over
+#        a chain of incremental runs, instead of starting over at each run's
+#        rundate.
+#
+#        A course whose description needs to be downloaded again, but can't
+#        be, keeps its previous entry (with the new schedule row, if that
+#        changed) and its previous 'fetched' date, and is listed in 'errors'.
+# @since 2026-10-17
+
+
+import asyncio
+import copy
+import time
+from datetime import datetime
+from cmu_course_api.aggregate import aggregate_async, get_schedules_async, \
+    merge_course, SEMESTER_ABBREV, DEFAULT_PARSE_WORKERS
+from cmu_course_api.fce_join import strip_fces
+from cmu_course_api.fetch import Fetcher, DEFAULT_CONCURRENCY, \
+    DEFAULT_RETRIES
+from cmu_course_api.parse_descs import get_course_url
+
+
+# @function course_number
+# @brief Converts a schedule page course number to the output format.
+# @param num: Course number as a 5 character string, no dash.
+# @return: Course number with a dash, e.g. '15-122'.
+def course_number(num):
+    return num[:2] + '-' + num[2:]
+
+
+# @function same_instructors
+# @brief Checks whether the instructors listed on the schedule page match
+#        those of a previous run's meeting.
+#
+#        The schedule page lists last names only ('Simmons, Wright'), while
+#        the output replaces them with full names from the course details
+#        page ('Simmons, Robert'), so only last names are compared.
+# @param listed: Instructors as parsed from the schedule page, or None.
+# @param previous: Instructors of the meeting in the previous output.
+# @return: True if the instructors are the same.
+def same_instructors(listed, previous):
+    if listed == previous:
+        return True
+    if not previous or previous == ['Instructor TBA']:
+        return not listed
+    if not listed:
+        return False
+    return listed == [name.split(',')[0] for name in previous]
+
+
+# @function same_meetings
+# @brief Checks whether lectures or sections from the schedule page match
+#        those of a previous run.
+# @param listed: List of meetings as parsed from the schedule page.
+# @param previous: List of meetings from the previous output.
+# @return: True if the meetings are the same.
+def same_meetings(listed, previous):
+    if len(listed) != len(previous):
+        return False
+    for (meeting, old) in zip(listed, previous):
+        if meeting['name'] != old.get('name') or \
+                meeting['times'] != old.get('times') or \
+                not same_instructors(meeting['instructors'],
+                                     old.get('instructors')):
+            return False
+    return True
+
+
+# @function schedule_changed
+# @brief Checks whether a course's schedule page row differs from the
+#        previous output.
+# @param course: Course as returned in parse_schedules' 'schedules' list.
+# @param previous: The course's entry in the previous output.
+# @return: True if the title, units, lectures or sections changed.
+def schedule_changed(course, previous):
+    try:
+        units = float(course['units'])
+    except ValueError:
+        units = None
+
+    return course['title'] != previous.get('name') or \
+        units != previous.get('units') or \
+        course['department'] != previous.get('department') or \
+        not same_meetings(course['lectures'],
+                          previous.get('lectures', [])) or \
+        not same_meetings(course['sections'], previous.get('sections', []))
+
+
+# @function remerge_course
+# @brief Merges a previous output's entry for a course with its current
+#        schedule row, for when its description can't be downloaded again.
+#
+#        Instructors keep their full names from the previous entry where the
+#        schedule still lists the same ones.
+# @param old: The course's entry in the previous output.
+# @param course: Course as returned in parse_schedules' 'schedules' list.
+# @return: The course's entry, as merge_course returns it.
+def remerge_course(old, course):
+    desc = copy.deepcopy(old)
+    course = copy.deepcopy(course)
+    names_dict = {}
+    for key in ('lectures', 'sections'):
+        listed = {meeting['name']: meeting for meeting in course[key]}
+        for meeting in old.get(key, []):
+            new = listed.get(meeting.get('name'))
+            if new is not None and meeting.get('instructors') and \
+                    same_instructors(new['instructors'],
+                                     meeting['instructors']):
+                names_dict[new['name']] = meeting['instructors']
+    desc['names_dict'] = names_dict
+    return merge_course(desc, course)
+
+
+# @function fetched_dates
+# @brief Returns the dates course descriptions of an output were downloaded
+#        on.
+# @param data: Output of get_course_data or update_course_data.
+# @return: Dictionary of course number -> date as 'YYYY-MM-DD'. Courses
+#        downloaded by the run itself are on its rundate.
+def fetched_dates(data):
+    fetched = data.get('fetched') or {}
+    return {number: fetched.get(number, data.get('rundate'))
+            for number in data.get('courses', {})}
+
+
+# @function plan_update
+# @brief Decides which course descriptions need to be downloaded again.
+# @param schedules: Course schedules object as returned by parse_schedules.
+# @param previous: Output of a previous run, as returned by get_course_data.
+# @param ttl: Maximum age in seconds of a carried over description, or None
+#        to carry descriptions over regardless of age.
+# @param cache: Optional HTTPCache. When given, the age of a description is
+#        the time its page was last downloaded or revalidated; otherwise it is
+#        the date it was downloaded on, as recorded in the previous output.
+# @param now: Current time as a UNIX timestamp, defaults to time.time().
+# @return: (stale, carried, changes), where stale is the list of schedule
+#        courses to fetch, carried maps course numbers to previous entries to
+#        reuse, and changes is the change list described in README.md.
+def plan_update(schedules, previous, ttl=None, cache=None, now=None):
+    if now is None:
+        now = time.time()
+
+    old_courses = previous.get('courses', {})
+    if previous.get('semester') != schedules['semester']:
+        old_courses = {}
+
+    rundate = previous.get('rundate')
+    fetched_on = fetched_dates(previous)
+
+    semester = schedules['semester'].split(' ')
+    (abbrev, year) = (SEMESTER_ABBREV[semester[0]], semester[-1][2:])
+
+    changes = {
+        'semester': schedules['semester'],
+        'since': rundate,
+        'added': [],
+        'changed': [],
+        'expired': [],
+        'removed': [],
+        'unchanged': []
+    }
+    stale = []
+    carried = {}
+
+    for course in schedules['schedules']:
+        number = course_number(course['num'])
+        old = old_courses.get(number)
+
+        if old is None:
+            changes['added'].append(number)
+            stale.append(course)
+            continue
+
+        if schedule_changed(course, old):
+            changes['changed'].append(number)
+            stale.append(course)
+            continue
+
+        if ttl is not None:
+            fetched = fetched_on.get(number)
+            if fetched is not None:
+                fetched = datetime.strptime(fetched, '%Y-%m-%d').timestamp()
+            if cache is not None:
+                url = get_course_url(course['num'], abbrev, year)
+                entry = cache.lookup(url)
+                fetched = entry.stored if entry is not None else None
+            if fetched is None or now - fetched > ttl:
+                changes['expired'].append(number)
+                stale.append(course)
+                continue
+
+        changes['unchanged'].append(number)
+        # FCE fields only appear when this run joins them
+        carried[number] = strip_fces(old)
+
+    listed = set(course_number(course['num'])
+                 for course in schedules['schedules'])
+    changes['removed'] = sorted(set(old_courses) - listed)
+
+    for key in ('added', 'changed', 'expired', 'unchanged'):
+        changes[key].sort()
+
+    return (stale, carried, changes)
+
+
+# @function update_course_data_async
+# @brief Awaitable version of update_course_data.
+async def update_course_data_async(semester, previous, ttl=None,
+                                   concurrency=DEFAULT_CONCURRENCY,
+                                   cache=None,
+                                   parse_workers=DEFAULT_PARSE_WORKERS,
+                                   observer=None, max_concurrency=None,
+                                   retries=DEFAULT_RETRIES, checkpoint=None):
+    async with Fetcher(concurrency, cache=cache, observer=observer,
+                       max_concurrency=max_concurrency,
+                       retries=retries) as fetcher:
+        schedules = await get_schedules_async(semester, fetcher)
+        (stale, carried, changes) = plan_update(schedules, previous, ttl,
+                                                cache)
+        fetcher.observer.message(
+            '{} of {} course descriptions need to be fetched'.format(
+                len(stale), len(schedules['schedules'])))
+
+        data = await aggregate_async(dict(schedules, schedules=stale),
+                                     fetcher, parse_workers, checkpoint)
+
+        # a course that couldn't be downloaded again keeps what the previous
+        # run had, rather than disappearing from the output
+        kept = {}
+        expired = set(changes['expired'])
+        for course in stale:
+            number = course_number(course['num'])
+            if number not in data['errors'] or number in changes['added']:
+                continue
+            old = strip_fces(previous['courses'][number])
+            kept[number] = old if number in expired \
+                else remerge_course(old, course)
+
+        data['courses'].update(carried)
+        data['courses'].update(kept)
+        data['courses'] = dict(sorted(data['courses'].items()))
+        fetched_on = fetched_dates(previous)
+        data['fetched'] = {number: fetched_on[number]
+                           for number in sorted(set(carried) | set(kept))
+                           if fetched_on[number] != data['rundate']}
+        return (data, changes)
+
+
+# @function update_course_data
+# @brief Retrieves all information from the course-api for a given semester,
+#        reusing course descriptions from a previous run where possible.
+# @param semester: The semester to get data for. Must be one of [S, M1, M2, F].
+# @param previous: Output of a previous run, as returned by get_course_data.
+# @param ttl: Maximum age in seconds of a carried over description, or None.
+# @param concurrency: Number of pages to download at once.
+# @param cache: Optional HTTPCache to revalidate pages against.
+# @param parse_workers: Number of processes to parse pages in.
+# @param observer: Optional Observer to report progress and metrics to.
+# @param max_concurrency: Number of pages that may be downloaded at once
+#        while the server keeps up; defaults to concurrency.
+# @param retries: Number of times to retry a page after a 429 or 5xx
+#        response, a timeout or a connection error.
+# @param checkpoint: Optional path of a journal of finished courses. If a
+#        run dies, running again with the same checkpoint resumes where it
+#        stopped. Remove the journal once the output is saved, e.g. with
+#        write_course_data(..., checkpoint=path).
+# @return (data, changes) where data is the same object get_course_data
+#        returns, and changes lists the courses that were added, changed,
+#        expired, removed or left unchanged.
+def update_course_data(semester, previous, ttl=None,
+                       concurrency=DEFAULT_CONCURRENCY, cache=None,
+                       parse_workers=DEFAULT_PARSE_WORKERS, observer=None,
+                       max_concurrency=None, retries=DEFAULT_RETRIES,
+                       checkpoint=None):
+    return asyncio.run(update_course_data_async(semester, previous, ttl,
+                                                concurrency, cache,
+                                                parse_workers, observer,
+                                                max_concurrency, retries,
+                                                checkpoint))
@@ -0,0 +1,352 @@
+# @file metrics.py
+# @brief Instrumentation hooks for the scrape pipeline.
+#
+#        The fetcher, the schedule parser and the aggregation pipeline report
+#        what they do to an Observer: status messages and progress, the time
+#        spent in each stage, every HTTP request, retries, failures, queue
+#        depths and the Fetcher's concurrency limit. Observer itself ignores
+#        everything; ProgressPrinter prints the progress output
+#        cmu-course-api has always printed, and MetricsCollector keeps totals
+#        and histograms that can be saved as JSON or in the Prometheus text
+#        format.
+#
+#        Usage:
+#            metrics = MetricsCollector()
+#            get_course_data('F', observer=ObserverGroup(ProgressPrinter(),
+#                                                        metrics))
+#            metrics.save('metrics.prom')
+#
+#        Stages reported by a run:
+#            fetch_schedule        download of the Schedule Of Classes
+#            parse_schedule        parse_schedules_page, made up of
+#              parse_rows            streaming parser (repairs rows as it
+#                                    goes), or for parse_schedules_page_bs4:
+#              soup, fix_known_errors, get_table_rows, parse_rows
+#            fetch_description     download of one course details page
+#            parse_description     parse of one course details page
+#            aggregate             fetching and parsing every description
+#            index_fces            with --fces, parsing and indexing FCEs
+#            join_fces             with --fces, joining them into the output
+# @since 2026-10-17
+
+
+import contextlib
+import json
+import time
+
+
+# Constants
+# upper bounds, in seconds, of the HTTP request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_FORMATS = ('json', 'prometheus')
+PROMETHEUS_PREFIX = 'cmu_course_api'
+
+
+# @class Observer
+# @brief Receives events from a scrape. Every hook does nothing; subclasses
+#        override the ones they need.
+class Observer:
+
+    # @function message
+    # @brief A status message, such as 'Parsing rows...'.
+    def message(self, text):
+        pass
+
+    # @function progress
+    # @brief Progress through a list of items.
+    # @param done: Number of items started so far, including this one.
+    # @param total: Number of items.
+    # @param text: Description of the current item.
+    def progress(self, done, total, text):
+        pass
+
+    # @function stage
+    # @brief Time spent in one run of a stage.
+    def stage(self, name, seconds):
+        pass
+
+    # @function request
+    # @brief A completed HTTP request.
+    # @param size: Number of bytes of body received, before decompression.
+    def request(self, url, status, seconds, size):
+        pass
+
+    # @function retry
+    # @brief A request that is about to be retried.
+    def retry(self, url, reason):
+        pass
+
+    # @function failure
+    # @brief A request that failed for good.
+    def failure(self, url, reason):
+        pass
+
+    # @function queue_depth
+    # @brief The number of items waiting on a queue.
+    def queue_depth(self, name, depth):
+        pass
+
+    # @function count
+    # @brief Adds to a named counter, e.g. 'parsed_from_cache'.
+    def count(self, name, value=1):
+        pass
+
+    # @function concurrency
+    # @brief The number of requests allowed in flight, after an adjustment.
+    def concurrency(self, limit):
+        pass
+
+    # @function timer
+    # @brief Context manager reporting the time spent in its body as a stage.
+    @contextlib.contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage(name, time.perf_counter() - start)
+
+
+# @class ObserverGroup
+# @brief Passes every event on to several observers.
+class ObserverGroup(Observer):
+
+    def __init__(self, *observers):
+        self.observers = observers
+
+    def message(self, text):
+        for observer in self.observers:
+            observer.message(text)
+
+    def progress(self, done, total, text):
+        for observer in self.observers:
+            observer.progress(done, total, text)
+
+    def stage(self, name, seconds):
+        for observer in self.observers:
+            observer.stage(name, seconds)
+
+    def request(self, url, status, seconds, size):
+        for observer in self.observers:
+            observer.request(url, status, seconds, size)
+
+    def retry(self, url, reason):
+        for observer in self.observers:
+            observer.retry(url, reason)
+
+    def failure(self, url, reason):
+        for observer in self.observers:
+            observer.failure(url, reason)
+
+    def queue_depth(self, name, depth):
+        for observer in self.observers:
+            observer.queue_depth(name, depth)
+
+    def count(self, name, value=1):
+        for observer in self.observers:
+            observer.count(name, value)
+
+    def concurrency(self, limit):
+        for observer in self.observers:
+            observer.concurrency(limit)
+
+
+# @class ProgressPrinter
+# @brief Prints status messages, and progress on a single line that is
+#        rewritten in place.
+class ProgressPrinter(Observer):
+
+    def __init__(self):
+        self._line_open = False
+
+    def message(self, text):
+        self._end_line()
+        print(text)
+
+    def progress(self, done, total, text):
+        print('\r[{}/{}] {}'.format(done, total, text), end='')
+        self._line_open = True
+        if done >= total:
+            self._end_line()
+
+    def _end_line(self):
+        if self._line_open:
+            print('')
+            self._line_open = False
+
+
+# @class MetricsCollector
+# @brief Keeps totals of the events of a run.
+class MetricsCollector(Observer):
+
+    def __init__(self):
+        self.stages = {}
+        self.requests = 0
+        self.request_seconds = 0.0
+        self.bytes = 0
+        self.statuses = {}
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.retries = {}
+        self.failures = {}
+        self.queues = {}
+        self.counters = {}
+        self.limits = None
+
+    def stage(self, name, seconds):
+        stats = self.stages.get(name)
+        if stats is None:
+            self.stages[name] = {'count': 1, 'seconds': seconds,
+                                 'min': seconds, 'max': seconds}
+            return
+        stats['count'] += 1
+        stats['seconds'] += seconds
+        stats['min'] = min(stats['min'], seconds)
+        stats['max'] = max(stats['max'], seconds)
+
+    def request(self, url, status, seconds, size):
+        self.requests += 1
+        self.request_seconds += seconds
+        self.bytes += size
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        for (i, bound) in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def retry(self, url, reason):
+        self.retries[reason] = self.retries.get(reason, 0) + 1
+
+    def failure(self, url, reason):
+        self.failures[reason] = self.failures.get(reason, 0) + 1
+
+    def queue_depth(self, name, depth):
+        stats = self.queues.get(name)
+        if stats is None:
+            stats = self.queues[name] = {'samples': 0, 'total': 0, 'max': 0,
+                                         'last': 0}
+        stats['samples'] += 1
+        stats['total'] += depth
+        stats['max'] = max(stats['max'], depth)
+        stats['last'] = depth
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def concurrency(self, limit):
+        if self.limits is None:
+            self.limits = {'min': limit, 'max': limit, 'last': limit}
+            return
+        self.limits['min'] = min(self.limits['min'], limit)
+        self.limits['max'] = max(self.limits['max'], limit)
+        self.limits['last'] = limit
+
+    # @function cumulative_buckets
+    # @brief Returns the latency histogram as (upper bound, number of
+    #        requests at most that long) pairs, ending with ('+Inf', total).
+    def cumulative_buckets(self):
+        (result, running) = ([], 0)
+        for (bound, count) in zip(LATENCY_BUCKETS + ('+Inf',), self.buckets):
+            running += count
+            result.append((bound, running))
+        return result
+
+    # @function to_dict
+    # @brief Returns the metrics as a JSON-serializable dictionary.
+    def to_dict(self):
+        return {
+            'stages': self.stages,
+            'requests': {
+                'count': self.requests,
+                'seconds': self.request_seconds,
+                'bytes': self.bytes,
+                'status': {str(status): count for (status, count)
+                           in sorted(self.statuses.items())},
+                'latency_buckets': {str(bound): count for (bound, count)
+                                    in self.cumulative_buckets()}
+            },
+            'retries': self.retries,
+            'failures': self.failures,
+            'queues': {name: {'max': stats['max'], 'last': stats['last'],
+                              'mean': stats['total'] / stats['samples']}
+                       for (name, stats) in self.queues.items()},
+            'counters': self.counters,
+            'concurrency': self.limits
+        }
+
+    # @function to_prometheus
+    # @brief Returns the metrics in the Prometheus text exposition format.
+    def to_prometheus(self):
+        lines = []
+
+        def metric(name, kind, help, samples):
+            name = '%s_%s' % (PROMETHEUS_PREFIX, name)
+            lines.append('# HELP %s %s' % (name, help))
+            lines.append('# TYPE %s %s' % (name, kind))
+            for (suffix, labels, value) in samples:
+                label_text = ','.join('%s="%s"' % (key, escape_label(value))
+                                      for (key, value) in labels)
+                lines.append('%s%s%s %s' % (
+                    name, suffix, '{%s}' % label_text if labels else '',
+                    value))
+
+        metric('stage_seconds', 'summary',
+               'Time spent in each stage of the scrape.',
+               [sample for (name, stats) in self.stages.items()
+                for sample in (('_sum', [('stage', name)], stats['seconds']),
+                               ('_count', [('stage', name)], stats['count']))])
+        metric('request_duration_seconds', 'histogram',
+               'Latency of HTTP requests.',
+               [('_bucket', [('le', bound)], count)
+                for (bound, count) in self.cumulative_buckets()] +
+               [('_sum', [], self.request_seconds),
+                ('_count', [], self.requests)])
+        metric('responses_total', 'counter',
+               'HTTP responses by status code.',
+               [('', [('status', status)], count)
+                for (status, count) in sorted(self.statuses.items())])
+        metric('response_bytes_total', 'counter',
+               'Bytes of response bodies received.',
+               [('', [], self.bytes)])
+        metric('retries_total', 'counter', 'Requests retried, by reason.',
+               [('', [('reason', reason)], count)
+                for (reason, count) in self.retries.items()])
+        metric('failures_total', 'counter', 'Requests that failed, by reason.',
+               [('', [('reason', reason)], count)
+                for (reason, count) in self.failures.items()])
+        metric('queue_depth_max', 'gauge', 'Largest depth of each queue.',
+               [('', [('queue', name)], stats['max'])
+                for (name, stats) in self.queues.items()])
+        metric('concurrency_limit', 'gauge',
+               'Requests allowed in flight at the end of the run, and the '
+               'lowest and highest limits during it.',
+               [('', [('value', key)], self.limits[key])
+                for key in ('last', 'min', 'max')
+                if self.limits is not None])
+        metric('events_total', 'counter', 'Other events, by name.',
+               [('', [('event', name)], count)
+                for (name, count) in self.counters.items()])
+        return '\n'.join(lines) + '\n'
+
+    # @function save
+    # @brief Writes the metrics to a file.
+    # @param format: 'json' or 'prometheus'; by default Prometheus for files
+    #        ending in .prom, and JSON otherwise.
+    def save(self, path, format=None):
+        if format is None:
+            format = 'prometheus' if path.endswith('.prom') else 'json'
+        if format not in METRICS_FORMATS:
+            raise ValueError('unknown metrics format %r' % format)
+        with open(path, 'w') as f:
+            if format == 'prometheus':
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), f, indent=2)
+
+
+# @function escape_label
+# @brief Escapes a Prometheus label value.
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
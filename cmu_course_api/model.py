@@ -0,0 +1,288 @@
+# @file model.py
+# @brief Compact, typed alternative to the dictionaries get_course_data
+#        returns, for keeping whole semesters in memory.
+#
+#        Courses, lectures/sections and meeting times are objects with
+#        __slots__ instead of dicts, and lists become tuples. Repeated
+#        strings (locations, buildings, rooms, departments, instructors)
+#        are shared through one table per CourseData, meeting days are
+#        stored as a bitmask (bit d set for day d, Sunday being 0), and
+#        begin/end times as minutes after midnight. Values that don't fit
+#        these encodings, and keys the model doesn't know about, are kept as
+#        they are, so to_dict() always returns exactly what was given to
+#        from_dict().
+#
+#        Usage:
+#            data = CourseData.from_dict(get_course_data('F'))
+#            course = data['15-122']
+#            course.lectures[0].times[0].begin     # 540, i.e. 09:00AM
+#            data.to_dict()                        # the original object
+# @since 2026-10-17
+
+
+from cmu_course_api.formats import load_course_data
+
+
+# @class _Missing
+# @brief Type of MISSING, which marks a key absent from the original dict.
+class _Missing:
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'MISSING'
+
+
+MISSING = _Missing()
+
+
+# @function encode_days
+# @brief Encodes a list of days as a bitmask, if it is sorted and has no
+#        repeats.
+# @return: The bitmask, or the list as a tuple if it can't be encoded.
+def encode_days(days):
+    if days is None or days is MISSING:
+        return days
+    mask = 0
+    for day in days:
+        mask |= 1 << day
+    if decode_days(mask) != list(days):
+        return tuple(days)
+    return mask
+
+
+# @function decode_days
+# @brief Inverse of encode_days.
+def decode_days(days):
+    if isinstance(days, tuple):
+        return list(days)
+    if not isinstance(days, int):
+        return days
+    return [day for day in range(7) if days >> day & 1]
+
+
+# @function encode_time
+# @brief Encodes a time like '03:30PM' as minutes after midnight.
+# @return: The number of minutes, or the time unchanged if it isn't in that
+#        exact format.
+def encode_time(text):
+    if not isinstance(text, str) or len(text) != 7 or \
+            text[2] != ':' or text[5:] not in ('AM', 'PM'):
+        return text
+    try:
+        (hours, minutes) = (int(text[:2]), int(text[3:5]))
+    except ValueError:
+        return text
+    value = (hours % 12 + (12 if text[5:] == 'PM' else 0)) * 60 + minutes
+    return value if decode_time(value) == text else text
+
+
+# @function decode_time
+# @brief Inverse of encode_time.
+def decode_time(value):
+    if not isinstance(value, int):
+        return value
+    (hours, minutes) = divmod(value, 60)
+    return '%02d:%02d%s' % (hours % 12 or 12, minutes,
+                            'AM' if hours < 12 else 'PM')
+
+
+def _intern(strings, value):
+    if isinstance(value, str):
+        return strings.setdefault(value, value)
+    return value
+
+
+def _extra(d, known):
+    extra = {key: value for (key, value) in d.items() if key not in known}
+    return extra or None
+
+
+def _put(result, key, value):
+    if value is not MISSING:
+        result[key] = value
+
+
+# @class Meeting
+# @brief One meeting time of a lecture or section.
+class Meeting:
+
+    __slots__ = ('days', 'begin', 'end', 'building', 'room', 'location')
+
+    def __init__(self, days, begin, end, building, room, location):
+        self.days = days
+        self.begin = begin
+        self.end = end
+        self.building = building
+        self.room = room
+        self.location = location
+
+    @classmethod
+    def from_dict(cls, d, strings):
+        return cls(encode_days(d.get('days', MISSING)),
+                   encode_time(d.get('begin', MISSING)),
+                   encode_time(d.get('end', MISSING)),
+                   _intern(strings, d.get('building', MISSING)),
+                   _intern(strings, d.get('room', MISSING)),
+                   _intern(strings, d.get('location', MISSING)))
+
+    def to_dict(self):
+        result = {}
+        _put(result, 'days', decode_days(self.days))
+        _put(result, 'begin', decode_time(self.begin))
+        _put(result, 'end', decode_time(self.end))
+        _put(result, 'building', self.building)
+        _put(result, 'room', self.room)
+        _put(result, 'location', self.location)
+        return result
+
+
+# @class LecSec
+# @brief A lecture or section. lecture is the name of a section's lecture,
+#        and MISSING for lectures.
+class LecSec:
+
+    __slots__ = ('times', 'name', 'instructors', 'lecture', 'extra')
+    KEYS = frozenset(__slots__[:-1])
+
+    def __init__(self, times, name, instructors, lecture=MISSING,
+                 extra=None):
+        self.times = times
+        self.name = name
+        self.instructors = instructors
+        self.lecture = lecture
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, d, strings):
+        times = d.get('times', MISSING)
+        if isinstance(times, list):
+            times = tuple(Meeting.from_dict(time, strings) for time in times)
+        instructors = d.get('instructors', MISSING)
+        if isinstance(instructors, list):
+            instructors = tuple(_intern(strings, name)
+                                for name in instructors)
+        return cls(times, _intern(strings, d.get('name', MISSING)),
+                   instructors, _intern(strings, d.get('lecture', MISSING)),
+                   _extra(d, cls.KEYS))
+
+    def to_dict(self):
+        result = {}
+        if isinstance(self.times, tuple):
+            result['times'] = [time.to_dict() for time in self.times]
+        else:
+            _put(result, 'times', self.times)
+        _put(result, 'name', self.name)
+        if isinstance(self.instructors, tuple):
+            result['instructors'] = list(self.instructors)
+        else:
+            _put(result, 'instructors', self.instructors)
+        _put(result, 'lecture', self.lecture)
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+
+# @class Course
+# @brief One course of get_course_data's output.
+class Course:
+
+    __slots__ = ('number', 'desc', 'prereqs', 'prereqs_obj', 'coreqs',
+                 'coreqs_obj', 'name', 'units', 'department', 'lectures',
+                 'sections', 'extra')
+    KEYS = frozenset(__slots__[1:-1])
+
+    def __init__(self, number, **fields):
+        self.number = number
+        for key in self.__slots__[1:]:
+            setattr(self, key, fields.get(key, MISSING))
+        if self.extra is MISSING:
+            self.extra = None
+
+    # @function from_dict
+    # @param number: Course number, e.g. '15-122'.
+    # @param d: The course's entry in get_course_data's output.
+    # @param strings: Dictionary of strings to share, usually
+    #        CourseData.strings.
+    @classmethod
+    def from_dict(cls, number, d, strings):
+        fields = {key: d[key] for key in cls.KEYS if key in d}
+        for key in ('lectures', 'sections'):
+            if isinstance(fields.get(key), list):
+                fields[key] = tuple(LecSec.from_dict(meeting, strings)
+                                    for meeting in fields[key])
+        if 'department' in fields:
+            fields['department'] = _intern(strings, fields['department'])
+        fields['extra'] = _extra(d, cls.KEYS)
+        return cls(number, **fields)
+
+    def to_dict(self):
+        result = {}
+        for key in self.__slots__[1:-1]:
+            value = getattr(self, key)
+            if isinstance(value, tuple):
+                value = [meeting.to_dict() for meeting in value]
+            _put(result, key, value)
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+
+# @class CourseData
+# @brief The whole output of get_course_data, as Course objects. Usable as a
+#        read-only mapping from course number to Course.
+class CourseData:
+
+    __slots__ = ('courses', 'meta', 'strings')
+
+    def __init__(self, courses, meta, strings):
+        self.courses = courses
+        self.meta = meta
+        self.strings = strings
+
+    # @function from_dict
+    # @brief Converts an object returned by get_course_data.
+    @classmethod
+    def from_dict(cls, data):
+        strings = {}
+        courses = {number: Course.from_dict(number, course, strings)
+                   for (number, course) in data.get('courses', {}).items()}
+        meta = {key: value for (key, value) in data.items()
+                if key != 'courses'}
+        return cls(courses, meta, strings)
+
+    # @function load
+    # @brief Loads an output file of cmu-course-api, in any format.
+    @classmethod
+    def load(cls, path):
+        return cls.from_dict(load_course_data(path))
+
+    # @function to_dict
+    # @brief Converts back to the object get_course_data returned.
+    def to_dict(self):
+        result = {'courses': {number: course.to_dict()
+                              for (number, course) in self.courses.items()}}
+        result.update(self.meta)
+        return result
+
+    @property
+    def semester(self):
+        return self.meta.get('semester')
+
+    def __getitem__(self, number):
+        return self.courses[number]
+
+    def __contains__(self, number):
+        return number in self.courses
+
+    def __iter__(self):
+        return iter(self.courses)
+
+    def __len__(self):
+        return len(self.courses)
+
+    def get(self, number, default=None):
+        return self.courses.get(number, default)
+
+    def items(self):
+        return self.courses.items()
@@ -5,14 +5,27 @@
 # @since 2014-12-13
 
 
+import html.parser
 import urllib.request
 import urllib.parse
 import re
 import bs4
+from cmu_course_api.cache import urlopen
 
 
 # String constants
 DESC_URL = "https://enr-apps.as.cmu.edu/open/SOC/SOCServlet/courseDetails"
+DESC_ID = 'course-detail-description'
+REQS_LABELS = ('Prerequisites', 'Corequisites')
+
+# Markup before the course description that DescExtractor can skip: raw text
+# elements and comments are removed, and if anything in UNSKIPPABLE is left
+# over, the page has to be parsed from the top
+SKIPPABLE_RE = re.compile(r'<(?:script\b.*?</script\s*|style\b.*?</style\s*|'
+                          r'!--.*?--)>', re.DOTALL | re.IGNORECASE)
+UNSKIPPABLE_RE = re.compile(r'<(?:!--|!\[|script|style|pre|textarea|xmp|'
+                            r'plaintext)', re.IGNORECASE)
+UNSKIPPABLE = REQS_LABELS + ('table-striped', 'instructor')
 
 
 # @function: create_reqs_obj
@@ -74,41 +87,46 @@ def create_reqs_obj(reqs):
     return {'invert': invert, 'reqs_list': reqs_list}
 
 
-# @function parse_reqs
-# @brief Parses out the prerequisites and corequisites of a course from the
-#        HTML of the search app.
-# @param soup BeautifulSoup of the page's HTML.
-# @return (prereqs, coreqs)
-def parse_reqs(soup):
+# @function clean_reqs
+# @brief Normalizes the text of a Prerequisites or Corequisites field.
+# @param reqs: The field's text, e.g. '15122 and (21127,15151)'.
+# @return The requisites, e.g. '15-122 and (21-127 or 15-151)', or None if
+#         there are none.
+def clean_reqs(reqs):
 
     # Regex replacement function
     def correct_course(num):
         num = num.group(0)
         return num[:2] + '-' + num[2:]
 
-    # Find text
-    prereqs = soup.find(string='Prerequisites').parent.parent.dd.string
-    coreqs = soup.find(string='Corequisites').parent.parent.dd.string
-
     # Remove extra whitespace
-    prereqs = ' '.join(prereqs.split())
-    coreqs = ' '.join(coreqs.split())
+    reqs = ' '.join(reqs.split())
 
     # Add dashes to course numbers
-    prereqs = re.sub(r'(\d{5})', correct_course, str(prereqs))
-    coreqs = re.sub(r'(\d{5})', correct_course, str(coreqs))
+    reqs = re.sub(r'(\d{5})', correct_course, str(reqs))
 
     # Replace commas with "or" (seems to be an error in their system)
-    prereqs = re.sub(',', 'or', str(prereqs))
-    coreqs = re.sub(',', 'or', str(coreqs))
+    reqs = re.sub(',', 'or', str(reqs))
 
     # Return null if no pre/corequisites
-    if prereqs == 'None':
-        prereqs = None
-    if coreqs == 'None':
-        coreqs = None
+    if reqs == 'None':
+        reqs = None
+
+    return reqs
+
+
+# @function parse_reqs
+# @brief Parses out the prerequisites and corequisites of a course from the
+#        HTML of the search app.
+# @param soup BeautifulSoup of the page's HTML.
+# @return (prereqs, coreqs)
+def parse_reqs(soup):
 
-    return (prereqs, coreqs)
+    # Find text
+    prereqs = soup.find(string='Prerequisites').parent.parent.dd.string
+    coreqs = soup.find(string='Corequisites').parent.parent.dd.string
+
+    return (clean_reqs(prereqs), clean_reqs(coreqs))
 
 
 # @function parse_full_names
@@ -158,46 +176,391 @@ def parse_full_names(soup):
     return dict_of_names
 
 
+# @class LayoutError
+# @brief Raised by DescExtractor when a page isn't laid out the way it
+#        expects; the page is then parsed with BeautifulSoup instead.
+class LayoutError(Exception):
+    pass
+
+
+# @class _Element
+# @brief An open element, as tracked by DescExtractor.
+class _Element:
+
+    __slots__ = ('tag', 'strings', 'tds', 'lis', 'has_dd')
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.strings = None     # strings inside it, if they are needed
+        self.tds = None         # <td> children of a <tr>
+        self.lis = None         # <li>s inside a ul.instructor
+        self.has_dd = False     # whether a <dd> was opened inside it
+
+
+# @class DescExtractor
+# @brief Single-pass extractor of the fields parse_course_desc_bs4 reads from
+#        a course details page, without building a tree of the page.
+#
+#        Only the strings of the elements those fields come from are kept:
+#        the <p> of #course-detail-description, the <dd> following each of
+#        the Prerequisites and Corequisites labels, the <th>s of the first
+#        table-striped, and the <td>s and <li>s around each ul.instructor.
+#        Strings are delimited and whitespace is collapsed the way
+#        BeautifulSoup does it, so the result is the same. Anything that
+#        would make BeautifulSoup see the page differently, such as markup
+#        inside the description, raises LayoutError.
+#
+#        With partial=True, the extractor is fed the page from the start tag
+#        of #course-detail-description on (see description_start), and also
+#        raises LayoutError if that turns out not to have been safe.
+class DescExtractor(html.parser.HTMLParser):
+
+    VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img',
+                     'input', 'link', 'meta', 'param', 'source', 'track',
+                     'wbr'}
+    PRESERVE_WHITESPACE = {'pre', 'textarea'}
+    HIDDEN_TEXT = {'script', 'style', 'template'}
+    ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+    def __init__(self, partial=False):
+        super().__init__(convert_charrefs=True)
+        self.partial = partial
+        self.desc = None
+        self.reqs = {}          # label -> string of its <dd>
+        self.headers = []       # <th>s of the first table-striped
+        self.instructors = []   # (ul.instructor, its grandparent <tr>)
+        self._stack = []
+        self._run = []          # pieces of the current string
+        self._collecting = []   # open elements whose strings are kept
+        self._preserve = 0      # number of open <pre>s and <textarea>s
+        self._text_only = None  # open element that may only hold a string
+        self._desc_root = None
+        self._desc_p = None
+        self._table = None
+        self._pending = {}      # label -> element whose next <dd> holds it
+        self._dd_labels = {}    # <dd> element -> label
+        self._uls = []          # open ul.instructors
+
+    def handle_starttag(self, tag, attrs):
+        self._event()
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or '').split()
+        element = _Element(tag)
+        stack = self._stack
+
+        if tag in self.HIDDEN_TEXT and self._collecting:
+            raise LayoutError('<%s> inside a field' % tag)
+
+        if self._desc_root is None:
+            if attrs.get('id') == DESC_ID:
+                self._desc_root = element
+            elif self.partial:
+                raise LayoutError('fed from the wrong place')
+        elif tag == 'p' and self._desc_p is None and \
+                self._desc_root in stack:
+            self._desc_p = element
+            self._collect(element, text_only=True)
+
+        if tag == 'dd':
+            for parent in stack:
+                parent.has_dd = True
+            for (label, owner) in list(self._pending.items()):
+                if owner in stack:
+                    if element in self._dd_labels:
+                        raise LayoutError('labels share a <dd>')
+                    self._dd_labels[element] = label
+                    self._collect(element, text_only=True)
+                    del self._pending[label]
+
+        elif tag == 'table':
+            if self._table is None and 'table-striped' in classes:
+                self._table = element
+        elif tag == 'th':
+            if len(stack) >= 2 and stack[-1].tag == 'tr' and \
+                    stack[-2].tag == 'thead' and self._table in stack:
+                self.headers.append(element)
+                self._collect(element)
+        elif tag == 'td':
+            if stack and stack[-1].tag == 'tr':
+                if stack[-1].tds is None:
+                    stack[-1].tds = []
+                stack[-1].tds.append(element)
+                self._collect(element)
+        elif tag == 'ul':
+            if 'instructor' in classes:
+                if len(stack) < 2 or stack[-2].tag != 'tr':
+                    raise LayoutError('ul.instructor outside of a table row')
+                element.lis = []
+                self.instructors.append((element, stack[-2]))
+                self._uls.append(element)
+        elif tag == 'li':
+            for ul in self._uls:
+                ul.lis.append(element)
+            if self._uls:
+                self._collect(element)
+
+        if tag in self.VOID_ELEMENTS:
+            self._close(element)
+            return
+        if tag in self.PRESERVE_WHITESPACE:
+            self._preserve += 1
+        stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in self.VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self._text_only is not None and self._text_only.tag == tag:
+            # the end of a text-only element is not markup inside it
+            (element, self._text_only) = (self._text_only, None)
+            self._event()
+            self._text_only = element
+        else:
+            self._event()
+
+        if tag in self.VOID_ELEMENTS:
+            return
+        stack = self._stack
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i].tag == tag:
+                while len(stack) > i:
+                    self._close(stack.pop())
+                return
+        # this may close an element opened before the part fed, and with it
+        # the open elements
+        if self.partial and stack:
+            raise LayoutError('</%s> of an element before the part fed' % tag)
+
+    def handle_data(self, text):
+        self._run.append(text)
+
+    def handle_comment(self, text):
+        self._event()
+        if text in REQS_LABELS:
+            raise LayoutError('a label in a comment')
+
+    def handle_decl(self, decl):
+        self._event()
+
+    def handle_pi(self, data):
+        self._event()
+
+    def unknown_decl(self, data):
+        self._event()
+
+    def close(self):
+        super().close()
+        self._event()
+        while self._stack:
+            self._close(self._stack.pop())
+
+    # @function result
+    # @brief Returns the fields of the page, once it has all been fed.
+    # @return: (desc, prereqs, coreqs, names_dict), as parse_course_desc_bs4
+    #        finds them.
+    def result(self):
+        if self._desc_p is None:
+            raise LayoutError('no course description')
+        if any(label not in self.reqs for label in REQS_LABELS):
+            raise LayoutError('no Prerequisites or Corequisites')
+
+        # the column of the first table-striped headed 'Section', or else
+        # its last column
+        column = 2
+        if self.headers:
+            texts = [''.join(th.strings) for th in self.headers]
+            column = texts.index('Section') if 'Section' in texts \
+                else len(texts) - 1
+
+        names_dict = {}
+        for (ul, tr) in self.instructors:
+            if tr.tds is None or len(tr.tds) <= column:
+                raise LayoutError('no Section column')
+            section = ''.join(tr.tds[column].strings).strip()
+            names = [''.join(li.strings) for li in ul.lis]
+            if section:
+                names_dict[section] = names or ['Instructor TBA']
+        if 'Lec 1' in names_dict:
+            names_dict['Lec'] = names_dict['Lec 1']
+
+        return (self.desc, self.reqs['Prerequisites'],
+                self.reqs['Corequisites'], names_dict)
+
+    def _collect(self, element, text_only=False):
+        if self._text_only is not None:
+            raise LayoutError('markup inside <%s>' % self._text_only.tag)
+        element.strings = []
+        self._collecting.append(element)
+        if text_only:
+            self._text_only = element
+
+    # @function _event
+    # @brief Ends the current string, as any event other than text does.
+    def _event(self):
+        if self._text_only is not None:
+            raise LayoutError('markup inside <%s>' % self._text_only.tag)
+        if not self._run:
+            return
+        text = ''.join(self._run)
+        self._run = []
+        if not self._preserve and not text.strip(self.ASCII_SPACES):
+            text = '\n' if '\n' in text else ' '
+
+        for element in self._collecting:
+            element.strings.append(text)
+
+        # a label's <dd> is the first one inside its parent's parent
+        if text in REQS_LABELS and text not in self.reqs and \
+                text not in self._pending:
+            if len(self._stack) < 2 or self._stack[-2].has_dd:
+                raise LayoutError('unexpected %s label' % text)
+            self._pending[text] = self._stack[-2]
+
+    def _close(self, element):
+        if element.tag in self.PRESERVE_WHITESPACE:
+            self._preserve -= 1
+        if element.strings is not None:
+            self._collecting.remove(element)
+        if element is self._text_only:
+            self._text_only = None
+        if element.lis is not None:
+            self._uls.remove(element)
+
+        if element is self._desc_p:
+            self.desc = element.strings[0] if element.strings else None
+        elif element is self._desc_root and self._desc_p is None:
+            raise LayoutError('no <p> in the course description')
+        elif element in self._dd_labels:
+            if not element.strings:
+                raise LayoutError('empty requisites')
+            self.reqs[self._dd_labels[element]] = element.strings[0]
+        if element in self._pending.values():
+            raise LayoutError('no <dd> after a label')
+
+
 # @function get_page
 # @brief Gets a webpage as an object
 # @param url: URL of the page to get.
+# @param cache: Optional HTTPCache to revalidate the page against.
 # @return: The page as a BeautifulSoup html object, or None if an error
 #        occurred.
-def get_page(url):
+def get_page(url, cache=None):
     try:
-        response = urllib.request.urlopen(url)
+        (body, _) = urlopen(url, cache)
     except (urllib.request.URLError, ValueError):
         return None
 
-    return bs4.BeautifulSoup(response.read(), 'html.parser')
+    return bs4.BeautifulSoup(body, 'html.parser')
 
 
-# @function get_course_desc
-# @brief Returns the description, coreqs and prereqs for a course.
+# @function get_course_url
+# @brief Returns the URL of the course details page for a course.
 # @param num: Course number as a 5 character string, no dash
 # @param semester: Semester to lookup (S, F, or M for spring, fall or summer)
 # @param year: Two digit year (for example, 2016 is 16)
-# @return {
-#   'desc': Course description,
-#   'prereqs': Course prerequisites,
-#   'prereqs_obj': Prerequisites as an object,
-#   'coreqs': Course corequisites,
-#   'coreqs_obj': Corequisites as an object
-# }
-def get_course_desc(num, semester, year):
-
-    # Generate target URL
+# @return: The URL as a string.
+def get_course_url(num, semester, year):
     params = {
         'COURSE': num,
         'SEMESTER': semester + year
     }
-    url = DESC_URL + '?' + urllib.parse.urlencode(params)
+    return DESC_URL + '?' + urllib.parse.urlencode(params)
+
+
+# @function description_start
+# @brief Finds where DescExtractor can start parsing a page: at the start tag
+#        of #course-detail-description, if nothing before it can matter.
+# @param page: The page as a str.
+# @return: The offset to start parsing at, or 0.
+def description_start(page):
+    index = page.find(DESC_ID)
+    start = page.rfind('<', 0, index)
+    if index < 0 or start < 0 or '>' in page[start:index]:
+        return 0
+    prefix = SKIPPABLE_RE.sub('', page[:start])
+    if UNSKIPPABLE_RE.search(prefix) or \
+            any(text in prefix for text in UNSKIPPABLE):
+        return 0
+    return start
+
+
+# @function extract_course_desc
+# @brief Parses a course details page with DescExtractor, which is several
+#        times faster than building a BeautifulSoup of it.
+# @param page: The page as raw HTML (bytes or str).
+# @return The course description object, as returned by parse_course_desc,
+#         or None if the page isn't laid out as expected.
+def extract_course_desc(page):
+    if isinstance(page, bytes):
+        page = bs4.UnicodeDammit(page, is_html=True).unicode_markup
+
+    # skip to the description if possible, and otherwise parse the page
+    # from the top
+    fields = None
+    start = description_start(page)
+    if start:
+        fields = _extract(DescExtractor(partial=True), page[start:])
+    if fields is None:
+        fields = _extract(DescExtractor(), page)
+    if fields is None:
+        return None
+    (desc, prereqs, coreqs, names_dict) = fields
 
-    # Retrieve page
-    soup = get_page(url)
+    prereqs = clean_reqs(prereqs)
+    coreqs = clean_reqs(coreqs)
+
+    return {
+        'desc': desc,
+        'prereqs': prereqs,
+        'prereqs_obj': create_reqs_obj(prereqs),
+        'coreqs': coreqs,
+        'coreqs_obj': create_reqs_obj(coreqs),
+        'names_dict': names_dict
+    }
+
+
+def _extract(extractor, page):
+    try:
+        extractor.feed(page)
+        extractor.close()
+        return extractor.result()
+    except LayoutError:
+        return None
+
+
+# @function parse_course_desc
+# @brief Parses the description, coreqs and prereqs out of a course details
+#        page, with extract_course_desc if it can, or else
+#        parse_course_desc_bs4.
+# @param page: The page, either as raw HTML or as a BeautifulSoup object.
+# @return The course description object, as returned by get_course_desc.
+def parse_course_desc(page):
+    if not isinstance(page, bs4.BeautifulSoup):
+        desc = extract_course_desc(page)
+        if desc is not None:
+            return desc
+    return parse_course_desc_bs4(page)
+
+
+# @function parse_course_desc_bs4
+# @brief Parses a course details page from a BeautifulSoup of the whole page.
+#        Slower than extract_course_desc, but doesn't depend on the layout of
+#        the page beyond the elements it reads.
+# @param page: The page, either as raw HTML or as a BeautifulSoup object.
+# @return The course description object, as returned by get_course_desc.
+def parse_course_desc_bs4(page):
+    if isinstance(page, bs4.BeautifulSoup):
+        soup = page
+    else:
+        soup = bs4.BeautifulSoup(page, 'html.parser')
 
     # Parse data
-    desc = soup.find(id='course-detail-description').p.string
+    desc = soup.find(id=DESC_ID).p.string
+    if desc is not None:
+        # a NavigableString would drag the whole tree along when pickled
+        desc = str(desc)
     (prereqs, coreqs) = parse_reqs(soup)
     names_dict = parse_full_names(soup)
 
@@ -212,3 +575,27 @@ def get_course_desc(num, semester, year):
         'coreqs_obj': coreqs_obj,
         'names_dict': names_dict
     }
+
+
+# @function get_course_desc
+# @brief Returns the description, coreqs and prereqs for a course.
+# @param num: Course number as a 5 character string, no dash
+# @param semester: Semester to lookup (S, F, or M for spring, fall or summer)
+# @param year: Two digit year (for example, 2016 is 16)
+# @param cache: Optional HTTPCache to revalidate the page against.
+# @return {
+#   'desc': Course description,
+#   'prereqs': Course prerequisites,
+#   'prereqs_obj': Prerequisites as an object,
+#   'coreqs': Course corequisites,
+#   'coreqs_obj': Corequisites as an object
+# }, or None if the page couldn't be downloaded.
+def get_course_desc(num, semester, year, cache=None):
+
+    # Retrieve page
+    try:
+        (body, _) = urlopen(get_course_url(num, semester, year), cache)
+    except (urllib.request.URLError, ValueError):
+        return None
+
+    return parse_course_desc(body)
@@ -10,69 +10,221 @@
 
 
 import csv
+import json
+import os
 import re
+from collections import deque
+from itertools import islice
 
 
-# @function parse_fces
-# @brief Parses FCE data from a CSV file to JSON.
+# Patterns used to pick the type of general columns
+INT_PATTERN = re.compile('^[0-9]+$')
+FLOAT_PATTERN = re.compile(r'^[0-9]+\.[0-9]+$')
+
+
+# @function course_id_converter
+# @brief Returns a converter for the 'Course ID' column, which ensures course
+#        IDs have the proper format (##-###).
+def course_id_converter(name):
+    is_int = INT_PATTERN.search
+
+    def convert(value, entry, questions):
+        if value == '':
+            questions[name] = None
+        elif is_int(value):
+            fmt = "%05d" % int(value)
+            entry[name] = "%s-%s" % (fmt[:2], fmt[2:])
+        else:
+            entry[name] = value
+    return convert
+
+
+# @function question_converter
+# @brief Returns a converter for a question column (one whose name starts
+#        with a number), which files the score as a float under 'Questions'.
+def question_converter(name):
+
+    def convert(value, entry, questions):
+        questions[name] = None if value == '' else float(value)
+    return convert
+
+
+# @function general_converter
+# @brief Returns a converter for a general column, which stores the value as
+#        an int, float or string depending on what it looks like.
+#
+#        Empty general columns are filed under 'Questions' as None. This has
+#        always been the case, and is kept so the output doesn't change.
+def general_converter(name):
+    is_int = INT_PATTERN.search
+    is_float = FLOAT_PATTERN.search
+
+    def convert(value, entry, questions):
+        if value == '':
+            questions[name] = None
+        elif is_int(value):
+            entry[name] = int(value)
+        elif is_float(value):
+            entry[name] = float(value)
+        else:
+            entry[name] = value
+    return convert
+
+
+# @function compile_plan
+# @brief Compiles a header row into a conversion plan for the rows under it.
+# @param categories: The header row, as a list of column names.
+# @return: Tuple of (column index, converter) for every used column. Unused
+#        columns (with an empty name) are left out.
+def compile_plan(categories):
+    plan = []
+    for (i, name) in enumerate(categories):
+        if name == '':
+            continue
+        elif name == 'Course ID':
+            plan.append((i, course_id_converter(name)))
+        elif name[0].isdigit():
+            plan.append((i, question_converter(name)))
+        else:
+            plan.append((i, general_converter(name)))
+    return tuple(plan)
+
+
+# @function question_order
+# @brief Sort key of question names, by question number, so that
+#        '10: Overall course' sorts after '9: Overall teaching'. Names without
+#        a number sort last.
+def question_order(name):
+    number = name.split(':', 1)[0]
+    return (int(number) if number.isdigit() else float('inf'), name)
+
+
+# @function iter_fces
+# @brief Parses FCE data from a CSV file, one row at a time.
+#
+#        The column layout only changes at a 'Semester' header row, so each
+#        header is compiled once into a plan of per-column converters, which
+#        is then applied to every row under it.
 # @param path: File location of CSV to parse from.
-# @return: FCE data as JSON.
-def parse_fces(path):
+# @return: Generator of FCE entries, in the same format as parse_fces.
+def iter_fces(path):
 
-    results = []
-    categories = []
+    plan = ()
+    width = 0
 
     # Iterate through lines of CSV
     with open(path, 'r') as f:
         for line in csv.reader(f):
 
-            # If this row specifies new column tags, update our categories
+            # If this row specifies new column tags, update our plan
             if line[0] == 'Semester':
-                categories = line
+                plan = compile_plan(line)
+                width = len(line)
                 continue
 
-            entry = {}
-            entry['Questions'] = {}
-
-            for cat in range(len(categories)):
+            # Rows must have a value for every column of the header
+            if len(line) < width:
+                raise IndexError('row has %d columns, expected %d' %
+                                 (len(line), width))
 
-                # Set null if no data supplied
-                if line[cat] == '':
-                    line[cat] = None
+            questions = {}
+            entry = {'Questions': questions}
+            for (i, convert) in plan:
+                convert(line[i], entry, questions)
 
-                # Skip unused columns
-                if categories[cat] == '':
-                    continue
+            yield entry
 
-                # Ensure course IDs have the proper format (##-###)
-                if categories[cat] == 'Course ID' and line[cat] != None:
-                    if re.search('^[0-9]+$', line[cat]):
-                        fmt = "%05d" % int(line[cat])
-                        entry[categories[cat]] = "%s-%s" % (fmt[:2], fmt[2:])
-                    else:
-                        entry[categories[cat]] = line[cat]
 
-                # If a category starts with a number, file it as a question
-                elif categories[cat][0].isdigit():
-                    if line[cat] == None:
-                        entry['Questions'][categories[cat]] = None
-                    else:
-                        entry['Questions'][categories[cat]] = float(line[cat])
-
-                # General categories
-                elif line[cat] == None:
-                    entry['Questions'][categories[cat]] = None
-
-                elif re.search('^[0-9]+$', line[cat]):
-                    entry[categories[cat]] = int(line[cat])
+# @function parse_fces
+# @brief Parses FCE data from a CSV file to JSON.
+# @param path: File location of CSV to parse from.
+# @return: FCE data as JSON.
+def parse_fces(path):
+    return list(iter_fces(path))
 
-                elif re.search('^[0-9]+\.[0-9]+$', line[cat]):
-                    entry[categories[cat]] = float(line[cat])
 
-                else:
-                    entry[categories[cat]] = line[cat]
+# @function list_fce_files
+# @brief Lists the files at the top level of a folder, sorted by name.
+# @param folder: Folder containing FCE CSV files.
+# @return: List of paths.
+def list_fce_files(folder):
+    return [os.path.join(folder, f) for f in sorted(os.listdir(folder))
+            if os.path.isfile(os.path.join(folder, f))]
 
-            results.append(entry)
 
-    # Return as JSON
-    return results
+# @function iter_fce_folder
+# @brief Parses every FCE CSV file in a folder, one row at a time.
+#
+#        With more than one worker, files are parsed in parallel in a pool of
+#        processes. Entries are still yielded in a stable order, sorted by
+#        filename and then by row, so the output is the same as a serial run.
+#        At most `workers` files are parsed ahead of the one being yielded.
+# @param folder: Folder containing FCE CSV files at its top level.
+# @param workers: Number of processes to parse files in.
+# @param progress: Optional function called as progress(path, files_done,
+#        files_total, rows_done) before each file's entries are yielded.
+# @return: Generator of FCE entries.
+def iter_fce_folder(folder, workers=1, progress=None):
+    files = list_fce_files(folder)
+    rows = 0
+
+    if workers <= 1 or len(files) <= 1:
+        for (i, path) in enumerate(files):
+            if progress:
+                progress(path, i, len(files), rows)
+            for entry in iter_fces(path):
+                rows += 1
+                yield entry
+        return
+
+    # imported here, since it takes longer to import than the rest of the
+    # FCE parser put together
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        remaining = iter(files)
+
+        for path in islice(remaining, workers):
+            pending.append((path, pool.submit(parse_fces, path)))
+
+        done = 0
+        while pending:
+            (path, future) = pending.popleft()
+            for next_path in islice(remaining, 1):
+                pending.append((next_path, pool.submit(parse_fces,
+                                                       next_path)))
+            if progress:
+                progress(path, done, len(files), rows)
+            entries = future.result()
+            rows += len(entries)
+            done += 1
+            yield from entries
+
+
+# @function parse_fce_folder
+# @brief Parses every FCE CSV file in a folder.
+# @param folder: Folder containing FCE CSV files at its top level.
+# @param workers: Number of processes to parse files in.
+# @return: FCE data as JSON, sorted by filename and then by row.
+def parse_fce_folder(folder, workers=1):
+    return list(iter_fce_folder(folder, workers))
+
+
+# @function dump_fces
+# @brief Writes FCE entries to a file as a JSON list, one entry at a time.
+#
+#        The output is byte-for-byte what json.dump(list(fces), outfile)
+#        would write, but only one entry is held in memory at once.
+# @param fces: Iterable of FCE entries, such as returned by iter_fces.
+# @param outfile: File object to write to.
+# @return: The number of entries written.
+def dump_fces(fces, outfile):
+    count = 0
+    outfile.write('[')
+    for entry in fces:
+        if count:
+            outfile.write(', ')
+        outfile.write(json.dumps(entry))
+        count += 1
+    outfile.write(']')
+    return count
@@ -37,9 +37,11 @@ meant for only certain majors, like advanced physics courses, have only one
 lettered lecture and comprise much of this category of courses.
 '''
 
-import urllib.request
 import bs4
+import html.parser
 import sys
+from cmu_course_api.cache import urlopen
+from cmu_course_api.metrics import ProgressPrinter
 
 QUARTERS = {
     'S': 'spring',
@@ -50,28 +52,38 @@ QUARTERS = {
 
 URL_FMT = 'http://enr-apps.as.cmu.edu/assets/SOC/sched_layout_%s.htm'
 
-def get_page(quarter):
+def get_url(quarter):
+    '''
+    return the URL of the Schedule Of Classes page for quarter
+
+    quarter: one of ['S', 'M1', 'M2', 'F']
+    '''
+    if quarter not in QUARTERS:
+        raise ValueError('quarter %s is invalid, it must be one of %s' %
+                         (quarter, set(QUARTERS.keys())))
+    return URL_FMT % QUARTERS[quarter]
+
+
+def get_page(quarter, cache=None):
     '''
     return a BeautifulSoup that represents the HTML page specified by quarter
 
     quarter: one of ['S', 'M1', 'M2', 'F']
+    cache: optional HTTPCache to revalidate the page against
 
     if get_page fails, None will be returned
     '''
 
     # set the URL based on the requested quarter
-    if quarter not in QUARTERS:
-        raise ValueError('quarter %s is invalid, it must be one of %s' %
-                         (quarter, set(QUARTERS.keys())))
-    url = URL_FMT % QUARTERS[quarter]
+    url = get_url(quarter)
 
     # obtain and return data
     try:
-        response = urllib.request.urlopen(url)
+        (body, _) = urlopen(url, cache)
     except:
         return None
 
-    return bs4.BeautifulSoup(response.read(), 'html.parser')
+    return bs4.BeautifulSoup(body, 'html.parser')
 
 
 def get_table_rows(page):
@@ -291,6 +303,15 @@ def extract_data_from_row(tr, data, curr_state):
     '''
     extract the data from tr and put it in data. update curr_state accordingly
     '''
+    # parse the row into a dictionary
+    (kind, row_data) = parse_row(process_row(tr))
+    add_row_data(kind, row_data, data, curr_state)
+
+
+def add_row_data(kind, row_data, data, curr_state):
+    '''
+    put a row parsed by parse_row in data. update curr_state accordingly
+    '''
     # helper functions
     def is_lecture(letter, is_first_line):
         '''
@@ -304,8 +325,6 @@ def extract_data_from_row(tr, data, curr_state):
         else:
             return 'lec' in letter
 
-    # parse the row into a dictionary
-    (kind, row_data) = parse_row(process_row(tr))
     # determine whether to store the dictionary, and update curr_state
     if kind == 'department':
         curr_state['curr_department'] = row_data
@@ -342,7 +361,8 @@ def extract_data_from_row(tr, data, curr_state):
                 # add in lecture
                 curr_state['curr_course']['lectures'].append(row_data)
             else:
-                # add in section
+                # add in section, remembering the lecture it belongs to
+                row_data['lecture'] = curr_state['curr_lecture']['name']
                 curr_state['curr_course']['sections'].append(row_data)
 
     elif kind == 'meeting':
@@ -352,44 +372,318 @@ def extract_data_from_row(tr, data, curr_state):
         raise Exception('Unexpected kind: %s', kind)
 
 
-def parse_schedules(quarter):
+def new_state():
+    '''
+    return the initial state for add_row_data
+    '''
+    return {
+        'curr_course': None,        # where the course should go
+        'curr_lec_sec': None,       # where meeting times should go
+        'curr_lecture': None,       # where lectures should go
+        'curr_department': None,    # where the department should go
+        'is_letter_lecture': False  # whether lectures are denoted by letters
+    }
+
+
+class ScheduleTokenizer(html.parser.HTMLParser):
+    '''
+    single-pass tokenizer for the Schedule Of Classes page
+
+    Rather than building a tree of the whole page, this collects the cells of
+    one table row at a time and hands each row (as the list of strings
+    process_row would return for it) to on_row. Rows that lack a starting
+    <tr> tag are recognized the way fix_known_errors recognizes them: as the
+    run of <td>s directly following a department row.
+
+    Within a row a small tree is kept, so that a cell's string matches the
+    .string of the corresponding bs4 Tag.
+    '''
+
+    VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img',
+                     'input', 'link', 'meta', 'param', 'source', 'track',
+                     'wbr'}
+    OUTER_ELEMENTS = {'table', 'tbody', 'thead', 'tfoot', 'body', 'html'}
+
+    def __init__(self, on_row):
+        super().__init__(convert_charrefs=True)
+        self.on_row = on_row
+        self.semester = None
+        self._b_count = 0           # number of <b> tags seen so far
+        self._b_depth = 0           # nesting depth inside the second <b>
+        self._b_text = []
+        self._tr_count = 0          # number of <tr> tags seen so far
+        self._stack = []            # open elements of the current row
+        self._bundle_ok = False     # whether <td>s may form a tr-less row
+
+    # nodes are [tag, children]; text children are plain strs
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'b':
+            self._b_count += 1
+            if self._b_count == 2 or self._b_depth:
+                self._b_depth += 1
+
+        if self._stack and self._stack[0][0] == 'bundle' and \
+                len(self._stack) == 1 and tag != 'td':
+            self._end_row()
+
+        if tag == 'tr':
+            if self._stack:
+                self._end_row()
+            self._tr_count += 1
+            self._stack.append(['tr', []])
+        elif not self._stack:
+            if tag != 'td':
+                self._bundle_ok = False
+                return
+            root = ['bundle' if self._bundle_ok else 'discard', []]
+            self._stack.append(root)
+            self._open(tag)
+        else:
+            self._open(tag)
+
+        if tag in self.VOID_ELEMENTS and len(self._stack) > 1 and \
+                self._stack[-1][0] == tag:
+            self._close()
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in self.VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag == 'b' and self._b_depth:
+            self._b_depth -= 1
+            if not self._b_depth:
+                self.semester = ''.join(self._b_text)
+
+        if not self._stack:
+            return
+        if tag == 'tr' and self._stack[0][0] == 'tr':
+            self._end_row()
+            return
+
+        tags = [node[0] for node in self._stack[1:]]
+        if tag in tags:
+            # close everything up to and including the matching tag
+            depth = len(tags) - tags[::-1].index(tag)
+            while len(self._stack) > depth:
+                self._close()
+            if self._stack[0][0] == 'discard' and len(self._stack) == 1:
+                self._stack = []
+        elif tag in self.OUTER_ELEMENTS:
+            self._end_row()
+
+    def handle_data(self, text):
+        if self._b_depth:
+            self._b_text.append(text)
+
+        if not self._stack:
+            # only newlines may separate a department row from its cells
+            if text != '\n':
+                self._bundle_ok = False
+            return
+
+        if self._stack[0][0] == 'bundle' and len(self._stack) == 1:
+            if text != '\n':
+                self._end_row()
+                self._bundle_ok = False
+            return
+
+        children = self._stack[-1][1]
+        if children and isinstance(children[-1], str):
+            children[-1] += text
+        else:
+            children.append(text)
+
+    def close(self):
+        super().close()
+        if self._stack:
+            self._end_row()
+
+    def _open(self, tag):
+        node = [tag, []]
+        self._stack[-1][1].append(node)
+        self._stack.append(node)
+
+    def _close(self):
+        self._stack.pop()
+
+    def _end_row(self):
+        (kind, children) = self._stack[0]
+        self._stack = []
+        self._bundle_ok = False
+
+        # the first two <tr>s are a weird empty row and the header row
+        if kind == 'discard' or (kind == 'tr' and self._tr_count <= 2):
+            return
+
+        row = []
+        for child in children:
+            string = self._string(child)
+            if not string or string.isspace():
+                row.append(None)
+            else:
+                row.append(string)
+
+        if kind == 'tr' and row and row[0] and not row[0].isdigit():
+            self._bundle_ok = True
+        self.on_row(row)
+
+    @staticmethod
+    def _string(node):
+        # mirror bs4's .string: the only string inside, or None
+        while not isinstance(node, str):
+            if len(node[1]) != 1:
+                return None
+            node = node[1][0]
+        return node
+
+
+def iter_rows(page):
+    '''
+    yield (kind, data) for every row of a Schedule Of Classes page, as
+    parse_row would return them after fix_known_errors, and finally
+    ('semester', semester)
+
+    page: the page as raw HTML (bytes or str)
+
+    This applies the same repairs as fix_known_errors, but on the fly, one
+    row at a time, without building a tree of the page.
+    '''
+    if isinstance(page, bytes):
+        page = bs4.UnicodeDammit(page, is_html=True).unicode_markup
+
+    rows = []
+    tokenizer = ScheduleTokenizer(rows.append)
+    pending = None      # (course number, units) from an orphan row
+
+    chunk_size = 1 << 16
+    for start in range(0, len(page) + 1, chunk_size):
+        if start >= len(page):
+            tokenizer.close()
+        else:
+            tokenizer.feed(page[start:start + chunk_size])
+
+        for row in rows:
+            # an orphan row donates its course number and units to the
+            # following row
+            if pending is not None and len(row) > 2:
+                (row[0], row[2]) = pending
+            pending = None
+
+            # department names are passed through untouched
+            if row and row[0] and not row[0].isdigit():
+                yield parse_row(row)
+                continue
+            # detect a row with only a course number, title, and credits
+            if all(row[:3]) and not any(row[3:]):
+                pending = (row[0], row[2])
+                continue
+            # detect a row that's empty except for possibly the course title
+            if row and not row[0] and len(row) > 1 and row[1] and \
+                    not any(row[2:]):
+                continue
+
+            # ensure that the row has 10 columns
+            row.extend([None] * (10 - len(row)))
+            yield parse_row(row)
+        rows.clear()
+
+    yield ('semester', tokenizer.semester)
+
+
+def parse_schedules(quarter, cache=None):
     '''
     given a quarter, return a Python dictionary representing the data for it
 
     quarter: one of ['S', 'M1', 'M2', 'F']
+    cache: optional HTTPCache to revalidate the page against
     '''
     # get the HTML page
     print('Requesting the HTML page from the network...')
-    page = get_page(quarter)
-    if not page:
+    try:
+        (page, _) = urlopen(get_url(quarter), cache)
+    except:
         print('Failed to obtain the HTML document! '
               'Check your internet connection.')
         sys.exit()
     print('Done.')
 
+    return parse_schedules_page(page)
+
+
+def parse_schedules_page(page, observer=None):
+    '''
+    return a Python dictionary representing the data on a Schedule Of Classes
+    page
+
+    page: the page as raw HTML (bytes or str), or as a BeautifulSoup, in
+          which case parse_schedules_page_bs4 is used
+    observer: optional Observer to report progress and stage times to,
+              defaults to a ProgressPrinter
+    '''
+    if isinstance(page, bs4.BeautifulSoup):
+        return parse_schedules_page_bs4(page, observer)
+    if observer is None:
+        observer = ProgressPrinter()
+
+    curr_state = new_state()
+    data = []
+    semester = None
+    observer.message('Parsing rows...')
+    with observer.timer('parse_rows'):
+        for (kind, row_data) in iter_rows(page):
+            if kind == 'semester':
+                semester = row_data[10:]
+            else:
+                add_row_data(kind, row_data, data, curr_state)
+    observer.message('Done.')
+
+    return {
+        'schedules': data,
+        'semester': semester
+    }
+
+
+def parse_schedules_page_bs4(page, observer=None):
+    '''
+    return a Python dictionary representing the data on a Schedule Of Classes
+    page, by repairing a BeautifulSoup of the whole page
+
+    page: the page, either as raw HTML or as a BeautifulSoup
+    observer: optional Observer to report progress and stage times to,
+              defaults to a ProgressPrinter
+
+    This is slower and uses much more memory than parse_schedules_page, and is
+    kept as a reference to check the streaming parser against.
+    '''
+    if observer is None:
+        observer = ProgressPrinter()
+    if not isinstance(page, bs4.BeautifulSoup):
+        with observer.timer('soup'):
+            page = bs4.BeautifulSoup(page, 'html.parser')
+
     # get the semester
     semester = page.find_all('b')[1].get_text()[10:]
 
     # fix errors on page and extract rows
-    print('Fixing errors on page...')
-    fix_known_errors(page)
-    print('Done.')
-    print('Finding table rows on page...')
-    trs = get_table_rows(page)
-    print('Done.')
+    observer.message('Fixing errors on page...')
+    with observer.timer('fix_known_errors'):
+        fix_known_errors(page)
+    observer.message('Done.')
+    observer.message('Finding table rows on page...')
+    with observer.timer('get_table_rows'):
+        trs = get_table_rows(page)
+    observer.message('Done.')
     # parse each row and insert it into 'data' as appropriate
-    curr_state = {
-        'curr_course': None,        # where the course should go
-        'curr_lec_sec': None,       # where meeting times should go
-        'curr_lecture': None,       # where lectures should go
-        'curr_department': None,    # where the department should go
-        'is_letter_lecture': False  # whether lectures are denoted by letters
-    }
+    curr_state = new_state()
     data = []
-    print('Parsing rows...')
-    for tr in trs:
-        extract_data_from_row(tr, data, curr_state)
-    print('Done.')
+    observer.message('Parsing rows...')
+    with observer.timer('parse_rows'):
+        for tr in trs:
+            extract_data_from_row(tr, data, curr_state)
+    observer.message('Done.')
 
     return {
         'schedules': data,
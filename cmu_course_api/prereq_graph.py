@@ -0,0 +1,288 @@
+# @file prereq_graph.py
+# @brief Queryable graph of course prerequisites (or corequisites).
+#
+#        Compiles the prereqs_obj/coreqs_obj of every course in a semester's
+#        output into a graph over integer course IDs. Sets of courses are
+#        bitsets (Python ints, bit i for course ID i), so transitive closures
+#        are precomputed as one int per course and most queries are a lookup
+#        plus a few bitwise operations.
+#
+#        Usage:
+#            graph = PrereqGraph.from_course_data(data)
+#            graph.transitive_prereqs('15-451')
+#            graph.dependents('21-127')
+#            graph.unlocked_by(['15-122', '21-127'])
+# @since 2026-10-17
+
+
+import json
+import re
+
+
+# Constants
+COURSE_PATTERN = re.compile(r'\d{2}-\d{3}')
+FORMAT_VERSION = 1
+
+
+# @function iter_bits
+# @brief Yields the index of every set bit of a bitset, lowest first.
+def iter_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+# @class PrereqGraph
+# @brief Prerequisite graph of a semester's courses.
+#
+#        Each course's requirement is stored as a list of bitsets. If the
+#        requirement is not inverted (see README.md), every bitset must share
+#        a course with the set taken (an AND of ORs); if it is inverted, some
+#        bitset must be a subset of it (an OR of ANDs).
+class PrereqGraph:
+
+    def __init__(self, names, requirements, inverted, closure=None,
+                 reverse_closure=None):
+        self.names = names
+        self.ids = {name: i for (i, name) in enumerate(names)}
+        self.requirements = requirements
+        self.inverted = inverted
+
+        # direct edges in both directions
+        self.direct = [0] * len(names)
+        self.reverse = [0] * len(names)
+        for (i, groups) in requirements.items():
+            for group in groups:
+                self.direct[i] |= group
+            for j in iter_bits(self.direct[i]):
+                self.reverse[j] |= 1 << i
+
+        if closure is None:
+            closure = self._close(self.direct)
+        if reverse_closure is None:
+            reverse_closure = self._close(self.reverse)
+        self.closure = closure
+        self.reverse_closure = reverse_closure
+
+    # @function from_course_data
+    # @brief Builds the graph from the output of get_course_data.
+    # @param data: Object returned by get_course_data, or its 'courses'.
+    # @param key: 'prereqs_obj' or 'coreqs_obj'.
+    @classmethod
+    def from_course_data(cls, data, key='prereqs_obj'):
+        courses = data.get('courses', data)
+
+        # every course offered or mentioned gets an ID
+        names = set(courses)
+        for course in courses.values():
+            for item in cls._items(course.get(key)):
+                names.update(COURSE_PATTERN.findall(item))
+        names = sorted(names)
+        ids = {name: i for (i, name) in enumerate(names)}
+
+        requirements = {}
+        inverted = 0
+        for (number, course) in courses.items():
+            reqs = course.get(key) or {}
+            groups = []
+            for group in reqs.get('reqs_list') or []:
+                mask = 0
+                for item in group:
+                    for name in COURSE_PATTERN.findall(item):
+                        mask |= 1 << ids[name]
+                if mask:
+                    groups.append(mask)
+            if groups:
+                requirements[ids[number]] = groups
+                if reqs.get('invert'):
+                    inverted |= 1 << ids[number]
+
+        return cls(names, requirements, inverted)
+
+    @staticmethod
+    def _items(reqs):
+        for group in (reqs or {}).get('reqs_list') or []:
+            for item in group:
+                yield item
+
+    @staticmethod
+    def _close(edges):
+        # Tarjan's algorithm finds strongly connected components (cycles are
+        # common among corequisites) in an order where every component comes
+        # after the components it points to, so each closure is computed once
+        # from already finished ones.
+        count = len(edges)
+        closure = [0] * count
+        index = [None] * count
+        lowlink = [0] * count
+        on_stack = [False] * count
+        stack = []
+        counter = 0
+
+        for root in range(count):
+            if index[root] is not None:
+                continue
+            work = [(root, iter_bits(edges[root]))]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+
+            while work:
+                (node, children) = work[-1]
+                for child in children:
+                    if index[child] is None:
+                        index[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack[child] = True
+                        work.append((child, iter_bits(edges[child])))
+                        break
+                    elif on_stack[child]:
+                        lowlink[node] = min(lowlink[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] != index[node]:
+                        continue
+
+                    # node is the root of a component; pop its members
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        members.append(member)
+                        if member == node:
+                            break
+                    reach = 0
+                    for member in members:
+                        for child in iter_bits(edges[member]):
+                            reach |= edges[child] | closure[child]
+                        reach |= edges[member]
+                    for member in members:
+                        closure[member] = reach
+        return closure
+
+    # @function mask
+    # @brief Converts course numbers to a bitset. Unknown courses are ignored.
+    def mask(self, numbers):
+        if isinstance(numbers, str):
+            numbers = (numbers,)
+        mask = 0
+        for number in numbers:
+            i = self.ids.get(number)
+            if i is not None:
+                mask |= 1 << i
+        return mask
+
+    # @function decode
+    # @brief Converts a bitset to a sorted list of course numbers.
+    def decode(self, mask):
+        return [self.names[i] for i in iter_bits(mask)]
+
+    # @function prereqs
+    # @brief Returns every course mentioned in a course's requirement.
+    def prereqs(self, number):
+        return self.decode(self._lookup(self.direct, number))
+
+    # @function transitive_prereqs
+    # @brief Returns every course mentioned in a course's requirement, their
+    #        requirements, and so on.
+    def transitive_prereqs(self, number):
+        return self.decode(self._lookup(self.closure, number))
+
+    # @function dependents
+    # @brief Returns the courses whose requirement mentions a course.
+    # @param transitive: If True, also include courses that depend on those
+    #        courses, and so on.
+    def dependents(self, number, transitive=False):
+        edges = self.reverse_closure if transitive else self.reverse
+        return self.decode(self._lookup(edges, number))
+
+    # @function is_satisfied
+    # @brief Checks whether having taken a set of courses satisfies a course's
+    #        requirement. A course with no requirement is always satisfied.
+    # @param taken: Iterable of course numbers, or a bitset from mask().
+    def is_satisfied(self, number, taken):
+        if not isinstance(taken, int):
+            taken = self.mask(taken)
+        i = self.ids.get(number)
+        if i is None or i not in self.requirements:
+            return True
+        return self._satisfied(i, taken)
+
+    # @function unlocked_by
+    # @brief Returns the courses whose requirement mentions one of the given
+    #        courses and is satisfied by them. Only these courses are
+    #        evaluated, so the cost depends on the number of dependents rather
+    #        than the size of the catalog.
+    # @param taken: Iterable of course numbers, or a bitset from mask().
+    # @param include_taken: Whether to include courses in `taken`.
+    def unlocked_by(self, taken, include_taken=False):
+        if not isinstance(taken, int):
+            taken = self.mask(taken)
+        candidates = 0
+        for i in iter_bits(taken):
+            candidates |= self.reverse[i]
+        if not include_taken:
+            candidates &= ~taken
+
+        unlocked = 0
+        for i in iter_bits(candidates):
+            if self._satisfied(i, taken):
+                unlocked |= 1 << i
+        return self.decode(unlocked)
+
+    def _satisfied(self, i, taken):
+        groups = self.requirements[i]
+        if self.inverted >> i & 1:
+            return any(group & taken == group for group in groups)
+        return all(group & taken for group in groups)
+
+    def _lookup(self, edges, number):
+        i = self.ids.get(number)
+        return 0 if i is None else edges[i]
+
+    # @function to_dict
+    # @brief Returns a JSON-serializable representation of the graph,
+    #        including its precomputed closures.
+    def to_dict(self):
+        return {
+            'version': FORMAT_VERSION,
+            'names': self.names,
+            'requirements': {str(i): ['%x' % group for group in groups]
+                             for (i, groups) in self.requirements.items()},
+            'inverted': '%x' % self.inverted,
+            'closure': ['%x' % mask for mask in self.closure],
+            'reverse_closure': ['%x' % mask for mask in self.reverse_closure]
+        }
+
+    # @function from_dict
+    # @brief Rebuilds a graph from to_dict's output without recomputing its
+    #        closures.
+    @classmethod
+    def from_dict(cls, obj):
+        if obj.get('version') != FORMAT_VERSION:
+            raise ValueError('unsupported prerequisite graph version %r' %
+                             obj.get('version'))
+        requirements = {int(i): [int(group, 16) for group in groups]
+                        for (i, groups) in obj['requirements'].items()}
+        return cls(obj['names'], requirements, int(obj['inverted'], 16),
+                   [int(mask, 16) for mask in obj['closure']],
+                   [int(mask, 16) for mask in obj['reverse_closure']])
+
+    # @function save
+    # @brief Writes the graph to a JSON file.
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    # @function load
+    # @brief Reads a graph written by save.
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
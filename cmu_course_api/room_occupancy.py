@@ -0,0 +1,170 @@
+# @file room_occupancy.py
+# @brief Weekly occupancy of every room used in a semester's output.
+#
+#        Each room's week is a bitmap (a Python int) with one bit per minute,
+#        bit day * 1440 + minute, set while a lecture or section meets there.
+#        Whether a room is free during a window is then a single AND against
+#        the window's bitmap, and utilization is a population count, so
+#        queries over every room of a building or campus never look at the
+#        meetings themselves.
+#
+#        Usage:
+#            occupancy = RoomOccupancy(data)
+#            occupancy.free_rooms('GHC', 'W', '02:00PM', '04:00PM')
+#            occupancy.utilization_by_building()
+# @since 2026-10-17
+
+
+from cmu_course_api.course_index import parse_time, parse_day
+
+
+# Constants
+MINUTES_PER_DAY = 24 * 60
+IGNORED_BUILDINGS = {'DNM'}             # 'does not meet'
+WEEKDAYS = (1, 2, 3, 4, 5)
+DEFAULT_HOURS = ('08:00AM', '10:00PM')  # window used for utilization
+
+
+# @function window_mask
+# @brief Returns the bitmap of a time window on one or more days.
+# @param days: A day number, a list of day numbers, or a string of day
+#        letters as on the schedule page ('W', 'MWF').
+# @param start: Start of the window, like '02:00PM', or minutes after
+#        midnight.
+# @param end: End of the window (exclusive).
+def window_mask(days, start, end):
+    if isinstance(days, int):
+        days = (days,)
+    start = parse_time(start)
+    end = parse_time(end)
+    if end <= start:
+        return 0
+    span = ((1 << (end - start)) - 1) << start
+    mask = 0
+    for day in days:
+        mask |= span << (parse_day(day) * MINUTES_PER_DAY)
+    return mask
+
+
+if hasattr(int, 'bit_count'):
+    _popcount = int.bit_count
+else:
+    def _popcount(mask):
+        return bin(mask).count('1')
+
+
+# @class RoomOccupancy
+# @brief Occupancy bitmaps of the rooms of a semester, by building.
+class RoomOccupancy:
+
+    def __init__(self, data):
+        courses = data.get('courses', data)
+        self.occupied = {}      # (building, room) -> minute bitmap
+        self.meetings = {}      # (building, room) -> [(number, lecsec, time)]
+        self.buildings = {}     # building -> sorted list of rooms
+
+        for (number, course) in courses.items():
+            for key in ('lectures', 'sections'):
+                for lecsec in course.get(key) or []:
+                    for time in lecsec.get('times') or []:
+                        self._add(number, lecsec, time)
+
+        for (building, room) in sorted(self.occupied):
+            self.buildings.setdefault(building, []).append(room)
+
+    def _add(self, number, lecsec, time):
+        building = time.get('building')
+        if not building or building in IGNORED_BUILDINGS:
+            return
+        key = (building.upper(), time.get('room') or '')
+        self.meetings.setdefault(key, []).append((number, lecsec, time))
+
+        mask = 0
+        if time.get('days') and time.get('begin') and time.get('end'):
+            mask = window_mask(time['days'], time['begin'], time['end'])
+        self.occupied[key] = self.occupied.get(key, 0) | mask
+
+    def _rooms(self, building):
+        if building is None:
+            return self.occupied.items()
+        building = building.upper()
+        return (((building, room), self.occupied[(building, room)])
+                for room in self.buildings.get(building, ()))
+
+    # @function is_free
+    # @brief Checks whether a room is free for a whole window of time.
+    #        Rooms that are never used in the semester count as free.
+    def is_free(self, building, room, days, start, end):
+        occupied = self.occupied.get((building.upper(), room), 0)
+        return not occupied & window_mask(days, start, end)
+
+    # @function free_rooms
+    # @brief Returns the rooms free for a whole window of time.
+    # @param building: Building to search, like 'GHC', or None for every
+    #        building.
+    # @return: Sorted list of room names, or of (building, room) if
+    #        building is None.
+    def free_rooms(self, building, days, start, end):
+        window = window_mask(days, start, end)
+        free = [key for (key, occupied) in self._rooms(building)
+                if not occupied & window]
+        if building is None:
+            return sorted(free)
+        return [room for (_, room) in free]
+
+    # @function free_rooms_by_building
+    # @brief Returns {building: sorted list of free rooms} for every building
+    #        at once.
+    def free_rooms_by_building(self, days, start, end):
+        window = window_mask(days, start, end)
+        free = {}
+        for (building, rooms) in self.buildings.items():
+            free[building] = [room for room in rooms
+                              if not self.occupied[(building, room)] & window]
+        return free
+
+    # @function busy
+    # @brief Returns the (begin, end) intervals, in minutes after midnight,
+    #        during which a room is in use on a day.
+    def busy(self, building, room, day):
+        occupied = self.occupied.get((building.upper(), room), 0)
+        minutes = occupied >> (parse_day(day) * MINUTES_PER_DAY)
+        minutes &= (1 << MINUTES_PER_DAY) - 1
+
+        intervals = []
+        offset = 0
+        while minutes:
+            # skip free minutes, then measure the run of busy ones
+            skip = (minutes & -minutes).bit_length() - 1
+            minutes >>= skip
+            offset += skip
+            length = (~minutes & (minutes + 1)).bit_length() - 1
+            intervals.append((offset, offset + length))
+            minutes >>= length
+            offset += length
+        return intervals
+
+    # @function utilization
+    # @brief Returns the fraction of a room's (or a building's rooms') time
+    #        that is in use during a weekly window.
+    # @param room: Room name, or None for every room of the building.
+    # @param days: Days of the window, Monday to Friday by default.
+    # @param hours: (start, end) of the window on each day, 8AM to 10PM by
+    #        default.
+    def utilization(self, building, room=None, days=WEEKDAYS,
+                    hours=DEFAULT_HOURS):
+        window = window_mask(days, *hours)
+        if room is None:
+            masks = [occupied for (_, occupied) in self._rooms(building)]
+        else:
+            masks = [self.occupied.get((building.upper(), room), 0)]
+        size = _popcount(window) * len(masks)
+        if not size:
+            return 0.0
+        return sum(_popcount(mask & window) for mask in masks) / size
+
+    # @function utilization_by_building
+    # @brief Returns {building: utilization} for every building at once.
+    def utilization_by_building(self, days=WEEKDAYS, hours=DEFAULT_HOURS):
+        return {building: self.utilization(building, None, days, hours)
+                for building in self.buildings}
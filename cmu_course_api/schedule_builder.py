@@ -0,0 +1,161 @@
+# @file schedule_builder.py
+# @brief Generates conflict-free schedules for a list of courses.
+#
+#        A week is divided into 5 minute slots, and every lecture and section
+#        is encoded as a bitset (a Python int) of the slots its meetings
+#        occupy, so checking two choices for a conflict is a bitwise AND.
+#        Each course contributes one choice per valid lecture + section pair;
+#        choices occupying the same slots are grouped together, so the search
+#        only branches on distinct time patterns and expands the groups once
+#        a conflict-free combination is found.
+#
+#        Usage:
+#            for schedule in generate_schedules(data, ['15-122', '21-127'],
+#                                               limit=100):
+#                (lecture, section) = schedule['15-122']
+# @since 2026-10-17
+
+
+from itertools import product
+from cmu_course_api.course_index import parse_time
+
+
+# Constants
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+
+# @function meeting_mask
+# @brief Returns the bitset of weekly time slots a lecture or section
+#        occupies. Meetings whose days or times are TBA occupy no slots.
+def meeting_mask(lecsec):
+    mask = 0
+    for time in lecsec.get('times') or []:
+        begin = parse_time(time.get('begin'))
+        end = parse_time(time.get('end'))
+        if begin is None or end is None or not time.get('days'):
+            continue
+        first = begin // SLOT_MINUTES
+        last = -(-end // SLOT_MINUTES)
+        if last <= first:
+            continue
+        span = ((1 << (last - first)) - 1) << first
+        for day in time['days']:
+            mask |= span << (day * SLOTS_PER_DAY)
+    return mask
+
+
+# @function course_options
+# @brief Lists the ways a course can be taken.
+#
+#        If the course has sections, every section is paired with the lecture
+#        it was listed under on the schedule page; sections without a known
+#        lecture (from older output) are paired with every lecture. If it has
+#        no sections, every lecture is a choice on its own. Pairs whose
+#        lecture and section conflict with each other are left out.
+# @param course: A course, from get_course_data or parse_schedules.
+# @return: Dictionary from time slot bitset to the list of (lecture, section)
+#        pairs occupying those slots. section is None for courses without
+#        sections.
+def course_options(course):
+    lectures = [(lecture, meeting_mask(lecture))
+                for lecture in course.get('lectures') or []]
+    sections = course.get('sections') or []
+
+    pairs = []
+    if not sections:
+        pairs = [(lecture, None, mask) for (lecture, mask) in lectures]
+    for section in sections:
+        section_mask = meeting_mask(section)
+        for (lecture, mask) in lectures:
+            if section.get('lecture') not in (None, lecture['name']):
+                continue
+            if mask & section_mask:
+                continue
+            pairs.append((lecture, section, mask | section_mask))
+
+    options = {}
+    for (lecture, section, mask) in pairs:
+        options.setdefault(mask, []).append((lecture, section))
+    return options
+
+
+def _get_courses(data):
+    if 'schedules' in data:
+        return {course['num'][:2] + '-' + course['num'][2:]: course
+                for course in data['schedules']}
+    return data.get('courses', data)
+
+
+# @function generate_schedules
+# @brief Generates every conflict-free combination of one lecture + section
+#        pair per course.
+#
+#        Courses with the fewest distinct time patterns are placed first, and
+#        after every placement the remaining courses are checked for at least
+#        one option that still fits, so dead ends are cut off early.
+# @param data: Object returned by get_course_data or parse_schedules, or the
+#        'courses' of get_course_data.
+# @param numbers: List of course numbers, like '15-122'.
+# @param limit: Maximum number of schedules to generate, or None for all.
+# @return: Generator of dictionaries from course number (in the order given)
+#        to (lecture, section), where section is None for courses without
+#        sections. The lectures and sections are the objects of `data`.
+def generate_schedules(data, numbers, limit=None):
+    (numbers, order, groups, masks) = _plan(data, numbers)
+    if limit is not None and limit <= 0:
+        return
+    count = 0
+
+    for picked in _search(groups, masks, 0, 0, []):
+        for combination in product(*picked):
+            by_course = dict(zip(order, combination))
+            yield {number: by_course[i] for (i, number) in enumerate(numbers)}
+            count += 1
+            if count == limit:
+                return
+
+
+def _plan(data, numbers):
+    courses = _get_courses(data)
+    numbers = list(dict.fromkeys(numbers))
+    for number in numbers:
+        if number not in courses:
+            raise ValueError('course %s is not offered' % number)
+
+    options = [list(course_options(courses[number]).items())
+               for number in numbers]
+    order = sorted(range(len(numbers)), key=lambda i: len(options[i]))
+    groups = [options[i] for i in order]
+    masks = [[mask for (mask, _) in group] for group in groups]
+    return (numbers, order, groups, masks)
+
+
+def _search(groups, masks, depth, occupied, picked):
+    if depth == len(groups):
+        yield picked
+        return
+    for (mask, choices) in groups[depth]:
+        if mask & occupied:
+            continue
+        taken = occupied | mask
+        if not all(any(not other & taken for other in later)
+                   for later in masks[depth + 1:]):
+            continue
+        picked.append(choices)
+        yield from _search(groups, masks, depth + 1, taken, picked)
+        picked.pop()
+
+
+# @function count_schedules
+# @brief Counts the conflict-free schedules of a list of courses without
+#        building them.
+def count_schedules(data, numbers):
+    (_, _, groups, masks) = _plan(data, numbers)
+    total = 0
+    for picked in _search(groups, masks, 0, 0, []):
+        size = 1
+        for choices in picked:
+            size *= len(choices)
+        total += size
+    return total
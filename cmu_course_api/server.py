@@ -0,0 +1,362 @@
+# @file server.py
+# @brief Serves an output file of get_course_data over HTTP.
+#
+#        The file is loaded once and indexed with a CourseIndex. Every course
+#        is serialized (and gzipped) up front; department pages and filtered
+#        listings are serialized on first request and kept in a cache of the
+#        most recently used, bounded by their total size in bytes. Responses
+#        carry strong ETags and honor If-None-Match, and the file is reloaded
+#        when it is replaced, e.g. by a new run writing to a temporary file
+#        and renaming it over the old one.
+#
+#        Routes:
+#            GET /                          semester, rundate, course count
+#            GET /courses/<num>             one course ('15-122' or '15122')
+#            GET /departments/<dept>        courses of a department, by name
+#                                           or number prefix ('15')
+#            GET /courses?department=...&instructor=...&building=...
+#                        &room=...&day=...&after=...&before=...
+#                                           filtered listing
+# @since 2026-10-17
+
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, unquote
+from cmu_course_api.course_index import CourseIndex
+from cmu_course_api.formats import load_course_data
+
+
+# Constants
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+MIN_GZIP_SIZE = 256         # smaller bodies are always sent uncompressed
+MAX_CACHED_LISTING_BYTES = 64 * 1024 * 1024     # all cached listings
+MAX_CACHED_LISTING_SIZE = 2 * 1024 * 1024       # larger ones aren't cached
+RELOAD_INTERVAL = 1.0       # seconds between checks for a replaced file
+LISTING_FILTERS = ('department', 'instructor', 'building', 'room', 'day',
+                   'after', 'before')
+
+
+# @class Body
+# @brief A pre-serialized response body, with its gzipped form and ETags.
+class Body:
+
+    def __init__(self, raw):
+        self.raw = raw
+        digest = hashlib.sha1(raw).hexdigest()[:20]
+        self.etag = '"%s"' % digest
+        self.gzipped = None
+        self.gzip_etag = None
+        if len(raw) >= MIN_GZIP_SIZE:
+            self.gzipped = gzip.compress(raw, 6, mtime=0)
+            self.gzip_etag = '"%s-gz"' % digest
+
+    # @function size
+    # @brief Returns the memory taken by the body's raw and gzipped forms.
+    def size(self):
+        return len(self.raw) + len(self.gzipped or b'')
+
+    # @function matches
+    # @brief Checks whether an If-None-Match header matches this body.
+    def matches(self, header):
+        if header.strip() == '*':
+            return True
+        for tag in header.split(','):
+            tag = tag.strip()
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag in (self.etag, self.gzip_etag):
+                return True
+        return False
+
+
+# @class DataStore
+# @brief One loaded output file, its index and its cached response bodies.
+class DataStore:
+
+    def __init__(self, data, stat=None):
+        self.data = data
+        self.stat = stat
+        self.courses = data.get('courses', {})
+        self.index = CourseIndex(data)
+
+        self.serialized = {}
+        self.bodies = {}
+        for (number, course) in self.courses.items():
+            self.serialized[number] = json.dumps(course)
+            self.bodies[('course', number)] = self.make_body(
+                self.serialized[number])
+        self.bodies[('info',)] = self.make_body(json.dumps({
+            'semester': data.get('semester'),
+            'rundate': data.get('rundate'),
+            'courses': len(self.courses)
+        }))
+
+        self._lock = threading.Lock()
+        self._listings = OrderedDict()      # least recently used first
+        self._listings_size = 0
+
+    # @function load
+    # @brief Loads an output file written by cmu-course-api, in any format.
+    @classmethod
+    def load(cls, path):
+        stat = os.stat(path)
+        return cls(load_course_data(path), stat)
+
+    @staticmethod
+    def make_body(text):
+        return Body(text.encode())
+
+    # @function course
+    # @brief Returns the Body of a course, or None if it isn't offered.
+    def course(self, number):
+        if '-' not in number and len(number) == 5:
+            number = number[:2] + '-' + number[2:]
+        return self.bodies.get(('course', number))
+
+    # @function department
+    # @brief Returns the Body of a department's courses, or None if there are
+    #        none.
+    def department(self, department):
+        body = self.listing({'department': department})
+        return None if body.raw == b'{}' else body
+
+    # @function listing
+    # @brief Returns the Body of the courses matching a set of filters.
+    # @param filters: Dictionary with keys from LISTING_FILTERS.
+    def listing(self, filters):
+        key = ('listing',) + tuple(sorted(filters.items()))
+        with self._lock:
+            body = self._listings.get(key)
+            if body is not None:
+                self._listings.move_to_end(key)
+                return body
+
+        numbers = self.query(filters).course_numbers()
+        body = self.make_body('{' + ', '.join(
+            '%s: %s' % (json.dumps(number), self.serialized[number])
+            for number in numbers) + '}')
+
+        # broad listings are nearly the whole file; caching them would let
+        # varied filters fill memory with copies of it
+        size = body.size()
+        if size > MAX_CACHED_LISTING_SIZE:
+            return body
+        with self._lock:
+            if key not in self._listings:
+                self._listings[key] = body
+                self._listings_size += size
+            while self._listings_size > MAX_CACHED_LISTING_BYTES:
+                (_, old) = self._listings.popitem(last=False)
+                self._listings_size -= old.size()
+        return body
+
+    # @function query
+    # @brief Converts listing filters to a CourseIndex query.
+    # @raise ValueError: If a filter's value is invalid.
+    def query(self, filters):
+        query = self.index.query()
+        for (name, value) in filters.items():
+            if name == 'department':
+                query = query.department(value)
+            elif name == 'instructor':
+                query = query.instructor(value)
+            elif name == 'building':
+                query = query.building(value, filters.get('room'))
+            elif name == 'room':
+                if 'building' not in filters:
+                    raise ValueError('room requires building')
+            elif name == 'day':
+                # '2,4' or 'TR'
+                query = query.day(*(int(day) if day.isdigit() else day
+                                    for day in value.replace(',', '')))
+            elif name == 'after':
+                query = query.starts_after(value)
+            elif name == 'before':
+                query = query.ends_before(value)
+            else:
+                raise ValueError('unknown filter %s' % name)
+        return query
+
+
+# @class ReloadingStore
+# @brief Holds the current DataStore of a file, swapping in a new one when the
+#        file is replaced. Requests in progress keep the store they started
+#        with.
+class ReloadingStore:
+
+    def __init__(self, path, interval=RELOAD_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.store = DataStore.load(path)
+        self._checked = time.monotonic()
+        self._reloading = False
+        self._lock = threading.Lock()
+
+    # @function get
+    # @brief Returns the current DataStore, starting a reload in the
+    #        background if the file has changed.
+    def get(self):
+        now = time.monotonic()
+        if now - self._checked >= self.interval:
+            self._checked = now
+            self._check()
+        return self.store
+
+    def _check(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return
+        old = self.store.stat
+        if (stat.st_ino, stat.st_size, stat.st_mtime_ns) == \
+                (old.st_ino, old.st_size, old.st_mtime_ns):
+            return
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        threading.Thread(target=self._reload, daemon=True).start()
+
+    def _reload(self):
+        try:
+            self.store = DataStore.load(self.path)
+            print('Reloaded %s (%d courses)' % (self.path,
+                                                len(self.store.courses)))
+        except (OSError, ValueError) as e:
+            # keep serving the old data; a half-written file is retried at
+            # the next check
+            print('Failed to reload %s: %s' % (self.path, e))
+        finally:
+            self._reloading = False
+
+
+# @class RequestHandler
+# @brief Routes requests to the bodies of the server's current DataStore.
+class RequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'cmu-course-api'
+
+    def do_GET(self):
+        self.respond(head=False)
+
+    def do_HEAD(self):
+        self.respond(head=True)
+
+    def respond(self, head):
+        store = self.server.store.get()
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.split('/') if part]
+
+        try:
+            body = self.route(store, parts, dict(parse_qsl(url.query)))
+        except ValueError as e:
+            return self.send_error_body(400, str(e), head)
+        if body is None:
+            return self.send_error_body(404, 'not found', head)
+
+        use_gzip = body.gzipped is not None and \
+            accepts_gzip(self.headers.get('Accept-Encoding', ''))
+        etag = body.gzip_etag if use_gzip else body.etag
+        match = self.headers.get('If-None-Match')
+
+        if match is not None and body.matches(match):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return
+
+        payload = body.gzipped if use_gzip else body.raw
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('ETag', etag)
+        self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        if not head:
+            self.wfile.write(payload)
+
+    @staticmethod
+    def route(store, parts, params):
+        if not parts:
+            return store.bodies[('info',)]
+        if parts[0] == 'courses' and len(parts) == 2:
+            return store.course(parts[1])
+        if parts[0] == 'courses' and len(parts) == 1:
+            filters = {name: value for (name, value) in params.items()
+                       if value}
+            for name in filters:
+                if name not in LISTING_FILTERS:
+                    raise ValueError('unknown filter %s' % name)
+            return store.listing(filters)
+        if parts[0] == 'departments' and len(parts) == 2:
+            return store.department(parts[1])
+        return None
+
+    def send_error_body(self, status, message, head):
+        payload = json.dumps({'error': message}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+# @function accepts_gzip
+# @brief Checks whether an Accept-Encoding header allows gzip.
+def accepts_gzip(header):
+    for item in header.split(','):
+        (coding, _, params) = item.strip().partition(';')
+        if coding.strip().lower() not in ('gzip', '*'):
+            continue
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+# @function make_server
+# @brief Creates (but does not start) a server for an output file.
+# @param path: Output file written by cmu-course-api.
+# @param verbose: Whether to log every request to stderr.
+# @return: A ThreadingHTTPServer; call serve_forever() to start it.
+def make_server(path, host=DEFAULT_HOST, port=DEFAULT_PORT, verbose=False):
+    server = ThreadingHTTPServer((host, port), RequestHandler)
+    server.daemon_threads = True
+    server.store = ReloadingStore(path)
+    server.verbose = verbose
+    return server
+
+
+# @function serve
+# @brief Serves an output file until interrupted.
+def serve(path, host=DEFAULT_HOST, port=DEFAULT_PORT, verbose=False):
+    server = make_server(path, host, port, verbose)
+    print('Serving %s on http://%s:%d/' % (path, host,
+                                           server.server_address[1]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
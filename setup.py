@@ -15,7 +15,11 @@ setup(name='cmu-course-api',
       author_email='info@scottylabs.org',
       license='MIT',
       packages=['cmu_course_api'],
+      python_requires='>=3.9',
       install_requires=[
         'beautifulsoup4==4.4.1'
       ],
+      extras_require={
+        'numpy': ['numpy']
+      },
       scripts=['bin/cmu-course-api', 'bin/cmu-fce-api'])